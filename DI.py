@@ -6,11 +6,14 @@ from typing import (
     Awaitable,
     get_type_hints,
 )
+from time import perf_counter
 
 from aiogram.types import TelegramObject
 
 from fastbot.logger import Logger
 from fastbot.core import Result
+from fastbot.metrics.metrics import RESOLVER_DURATION, RESOLVER_ERRORS
+from fastbot.tracing.tracing import start_span
 
 
 class DependencyContainer:
@@ -55,12 +58,25 @@ class DependencyContainer:
         for dep_type, resolver in self._resolvers.items():
             if dep_type not in resolved:
                 resolver_deps = self._resolver_dependencies.get(dep_type, {})
-                result = await resolver(event, **resolver_deps)
+                resolver_name = getattr(dep_type, "__name__", str(dep_type))
+
+                started = perf_counter()
+                try:
+                    with start_span("resolver", resolver=resolver_name):
+                        result = await resolver(event, **resolver_deps)
+                except Exception:
+                    RESOLVER_ERRORS.labels(resolver_name).inc()
+                    raise
+                finally:
+                    RESOLVER_DURATION.labels(resolver_name).observe(
+                        perf_counter() - started
+                    )
 
                 if isinstance(result, Result):
                     if result.is_ok():
                         resolved[dep_type] = result.unwrap()
                     else:
+                        RESOLVER_ERRORS.labels(resolver_name).inc()
                         Logger.error(f"Failed to resolve {dep_type}: {result.unwrap()}")
                 else:
                     resolved[dep_type] = result
@@ -0,0 +1,279 @@
+import asyncio
+import html
+import json
+import secrets
+from time import monotonic, perf_counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+
+from fastbot.logger import Logger
+from fastbot.metrics.metrics import (
+    CACHE_REQUESTS,
+    HANDLER_CALLS,
+    HANDLER_DURATION,
+    HANDLER_ERRORS,
+    HANDLER_IN_FLIGHT,
+    OUTBOUND_DURATION,
+    OUTBOUND_IN_FLIGHT,
+    RESOLVER_DURATION,
+    RESOLVER_ERRORS,
+    TEMPLATE_RENDER_DURATION,
+)
+from fastbot.monitoring import get_loop_monitor
+from fastbot.profiling import setup_profiling_route
+from fastbot.tracing import get_tracer
+
+
+class FastAdminPanel:
+    """Mountable FastAPI sub-app with a live view of the bot runtime
+
+    Every route requires ``token``, sent as a bearer token or a ``token``
+    query parameter, and passes the auth ``dependencies``; at least one of
+    them must be given.
+    """
+
+    def __init__(
+        self,
+        title: str = "FastBot Admin",
+        refresh_interval: float = 2.0,
+        max_stream_clients: int = 16,
+        enable_profiling: bool = False,
+        token: Optional[str] = None,
+        dependencies: Optional[Sequence[Any]] = None,
+    ):
+        if not token and not dependencies:
+            raise ValueError("FastAdminPanel needs a token or auth dependencies")
+        self.title = title
+        self.refresh_interval = refresh_interval
+        self.max_stream_clients = max_stream_clients
+        self.token = token
+        self.app = FastAPI(
+            title=title,
+            docs_url=None,
+            redoc_url=None,
+            dependencies=[Depends(self._authorize), *(dependencies or [])],
+        )
+
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_at = 0.0
+        self._snapshot_lock = asyncio.Lock()
+        self._stream_clients = 0
+
+        self._setup_routes(enable_profiling)
+
+    def _authorize(self, request: Request) -> None:
+        if not self.token:
+            return
+        header = request.headers.get("Authorization", "")
+        if header.startswith("Bearer "):
+            supplied = header[len("Bearer ") :]
+        else:
+            # EventSource cannot send headers
+            supplied = request.query_params.get("token", "")
+        if not secrets.compare_digest(supplied.encode(), self.token.encode()):
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid admin token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+    def _setup_routes(self, enable_profiling: bool):
+        @self.app.get("/", response_class=HTMLResponse)
+        async def dashboard():
+            title = html.escape(self.title)
+            return HTMLResponse(_DASHBOARD_HTML.replace("{{title}}", title))
+
+        @self.app.get("/snapshot")
+        async def snapshot():
+            return JSONResponse(await self.get_snapshot())
+
+        @self.app.get("/stream")
+        async def stream(request: Request):
+            return StreamingResponse(
+                self._stream(request),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        if enable_profiling:
+            setup_profiling_route(self.app, "/profile")
+
+    async def get_snapshot(self) -> Dict[str, Any]:
+        """Collect runtime stats at most once per refresh interval for all clients"""
+        async with self._snapshot_lock:
+            if (
+                self._snapshot is None
+                or monotonic() - self._snapshot_at >= self.refresh_interval
+            ):
+                self._snapshot = await self._collect()
+                self._snapshot_at = monotonic()
+            return self._snapshot
+
+    def _stream(self, request: Request):
+        """Admit a stream client and return its events
+
+        The limit check and the count share no await, so concurrent
+        connections cannot both take the last slot.
+        """
+        if self._stream_clients >= self.max_stream_clients:
+            raise HTTPException(status_code=503, detail="Too many stream clients")
+        self._stream_clients += 1
+        return self._events(request)
+
+    async def _events(self, request: Request):
+        try:
+            while not await request.is_disconnected():
+                snapshot = await self.get_snapshot()
+                yield f"data: {json.dumps(snapshot)}\n\n"
+                await asyncio.sleep(self.refresh_interval)
+        except Exception as e:
+            Logger.error(f"Admin panel stream failed: {e}")
+        finally:
+            self._stream_clients -= 1
+
+    async def _collect(self) -> Dict[str, Any]:
+        monitor = get_loop_monitor()
+        if monitor:
+            loop_lag = monitor.current_lag
+        else:
+            started = perf_counter()
+            await asyncio.sleep(0)
+            loop_lag = perf_counter() - started
+
+        tracer = get_tracer()
+        handlers = self._handler_stats()
+
+        return {
+            "timestamp": monotonic(),
+            "loop_lag": loop_lag,
+            "loop_blocked": monitor.blocked_count if monitor else 0,
+            "queues": {
+                "asyncio_tasks": len(asyncio.all_tasks()),
+                "trace_export": tracer.pending_traces if tracer else 0,
+            },
+            "in_flight": sum(handler["in_flight"] for handler in handlers),
+            "outbound_backlog": {
+                labels[0]: child.value
+                for labels, child in OUTBOUND_IN_FLIGHT.children()
+                if child.value
+            },
+            "handlers": handlers,
+            "resolvers": self._duration_stats(RESOLVER_DURATION, RESOLVER_ERRORS),
+            "templates": self._duration_stats(TEMPLATE_RENDER_DURATION),
+            "outbound": self._duration_stats(OUTBOUND_DURATION),
+            "caches": self._cache_stats(),
+        }
+
+    @staticmethod
+    def _handler_stats() -> List[Dict[str, Any]]:
+        stats = []
+        for labels, histogram in HANDLER_DURATION.children():
+            stats.append(
+                {
+                    "handler": labels[0],
+                    "event_type": labels[1],
+                    "calls": HANDLER_CALLS.labels(*labels).value,
+                    "errors": HANDLER_ERRORS.labels(*labels).value,
+                    "in_flight": HANDLER_IN_FLIGHT.labels(*labels).value,
+                    **_percentiles(histogram),
+                }
+            )
+        return sorted(stats, key=lambda s: s["p99"], reverse=True)
+
+    @staticmethod
+    def _duration_stats(duration_metric, errors_metric=None) -> List[Dict[str, Any]]:
+        stats = []
+        for labels, histogram in duration_metric.children():
+            entry = {
+                "name": labels[0],
+                "calls": histogram.count,
+                **_percentiles(histogram),
+            }
+            if errors_metric is not None:
+                entry["errors"] = errors_metric.labels(*labels).value
+            stats.append(entry)
+        return sorted(stats, key=lambda s: s["p99"], reverse=True)
+
+    @staticmethod
+    def _cache_stats() -> Dict[str, Dict[str, float]]:
+        caches: Dict[str, Dict[str, float]] = {}
+        for (cache, result), counter in CACHE_REQUESTS.children():
+            caches.setdefault(cache, {"hit": 0.0, "miss": 0.0})[result] = counter.value
+
+        for counts in caches.values():
+            total = counts["hit"] + counts["miss"]
+            counts["hit_rate"] = counts["hit"] / total if total else 0.0
+        return caches
+
+
+def _percentiles(histogram) -> Dict[str, float]:
+    return {
+        "p50": histogram.quantile(0.5),
+        "p90": histogram.quantile(0.9),
+        "p99": histogram.quantile(0.99),
+    }
+
+
+_DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{{title}}</title>
+<style>
+body { font-family: sans-serif; margin: 1.5em; color: #222; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { border: 1px solid #ccc; padding: 4px 10px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.summary span { margin-right: 2em; font-weight: bold; }
+</style>
+</head>
+<body>
+<h1>{{title}}</h1>
+<div class="summary">
+  <span id="lag"></span><span id="in-flight"></span><span id="tasks"></span>
+  <span id="backlog"></span>
+</div>
+<h2>Handlers</h2><table id="handlers"></table>
+<h2>Resolvers</h2><table id="resolvers"></table>
+<h2>Templates</h2><table id="templates"></table>
+<h2>Outbound</h2><table id="outbound"></table>
+<h2>Caches</h2><table id="caches"></table>
+<script>
+const ms = v => (v * 1000).toFixed(1) + " ms";
+function row(tag, values) {
+  const tr = document.createElement("tr");
+  for (const value of values) {
+    const cell = tr.appendChild(document.createElement(tag));
+    cell.textContent = value;
+  }
+  return tr;
+}
+function table(id, columns, rows) {
+  document.getElementById(id).replaceChildren(
+    row("th", columns.map(c => c[0])),
+    ...rows.map(r => row("td", columns.map(c => c[1](r)))));
+}
+const latency = [["p50", r => ms(r.p50)], ["p90", r => ms(r.p90)], ["p99", r => ms(r.p99)]];
+function render(s) {
+  document.getElementById("lag").textContent = "loop lag: " + ms(s.loop_lag);
+  document.getElementById("in-flight").textContent = "in flight: " + s.in_flight;
+  document.getElementById("tasks").textContent = "tasks: " + s.queues.asyncio_tasks;
+  const backlog = Object.values(s.outbound_backlog).reduce((a, b) => a + b, 0);
+  document.getElementById("backlog").textContent = "send backlog: " + backlog;
+  table("handlers", [["handler", r => r.handler], ["event", r => r.event_type],
+    ["calls", r => r.calls], ["errors", r => r.errors], ["in flight", r => r.in_flight]]
+    .concat(latency), s.handlers);
+  for (const id of ["resolvers", "templates", "outbound"]) {
+    table(id, [["name", r => r.name], ["calls", r => r.calls]].concat(latency), s[id]);
+  }
+  table("caches", [["cache", r => r[0]], ["hits", r => r[1].hit], ["misses", r => r[1].miss],
+    ["hit rate", r => (r[1].hit_rate * 100).toFixed(1) + "%"]], Object.entries(s.caches));
+}
+const source = new EventSource("stream" + location.search);
+source.onmessage = event => render(JSON.parse(event.data));
+</script>
+</body>
+</html>
+"""
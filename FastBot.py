@@ -4,7 +4,10 @@ import inspect
 from contextlib import suppress
 import json
 import os
+import sys
+from time import perf_counter
 from typing import (
+    TYPE_CHECKING,
     Any,
     Callable,
     Dict,
@@ -18,8 +21,6 @@ from typing import (
 
 from asyncio import Future
 
-from pampy import match, _
-
 from aiogram import F, Bot, Dispatcher, Router, types
 from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramAPIError
@@ -29,12 +30,6 @@ from aiogram.types import Message, CallbackQuery, InlineQuery
 from aiogram.types.base import TelegramObject
 from aiogram.fsm.state import State
 
-from fastapi import FastAPI, Request, WebSocket, APIRouter, Depends, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.routing import APIRoute
-import uvicorn
-
 from fastbot.engine import ContextEngine
 from fastbot.logger import Logger
 
@@ -43,6 +38,36 @@ from fastbot.filters import StateFilter
 from fastbot.DI import DependencyContainer
 from fastbot.configs import HandlerConfig, HTTPHandlerConfig
 from fastbot.strategies import HandlerStrategy
+from fastbot.metrics import (
+    MetricsRequestMiddleware,
+    instrument_middleware,
+    setup_metrics_route,
+)
+from fastbot.metrics.metrics import (
+    HANDLER_CALLS,
+    HANDLER_DURATION,
+    HANDLER_ERRORS,
+    HANDLER_IN_FLIGHT,
+)
+from fastbot.profiling import get_active_session, setup_profiling_route
+from fastbot.recording import RecordingMiddleware, UpdateRecorder
+from fastbot.snapshot import BuildSnapshot, source_fingerprint
+from fastbot.registry import HandlerRegistry, HandlerSignature, analyze_signature
+from fastbot.monitoring import LoopLagMonitor, get_loop_monitor
+from fastbot.tracing import (
+    Tracer,
+    TracingMiddleware,
+    TracingRequestMiddleware,
+    set_tracer,
+    start_span,
+    trace_filter,
+    trace_middleware,
+)
+
+if TYPE_CHECKING:
+    from fastapi import APIRouter, FastAPI
+
+    from fastbot.FastAdminPanel import FastAdminPanel
 
 
 class FastBotError(Exception):
@@ -79,9 +104,12 @@ class FastBot:
         self._startup_callbacks: List[Callable] = []
         self.dependency_container = DependencyContainer()
         self.mini_app: Optional[MiniAppManager] = None
-        self.app: Optional[FastAPI] = None
+        self._app: Optional["FastAPI"] = None
+        self._app_factory: Optional[Callable[[], "FastAPI"]] = None
         self.handler_strategy = HandlerStrategy()
+        self.handler_registry: Optional[HandlerRegistry] = None
         self._http_handlers: List[HTTPHandlerConfig] = []
+        self.loop_monitor: Optional[LoopLagMonitor] = LoopLagMonitor()
 
         self.dp.include_router(self._default_router)
 
@@ -98,6 +126,19 @@ class FastBot:
     def get_dependency(self, key: str) -> Any:
         return self.dependency_container._dependencies.get(key)
 
+    @property
+    def app(self) -> Optional["FastAPI"]:
+        """FastAPI application, created on first access unless built polling-only"""
+        if self._app is None and self._app_factory is not None:
+            factory, self._app_factory = self._app_factory, None
+            self._app = factory()
+        return self._app
+
+    @app.setter
+    def app(self, app: Optional["FastAPI"]) -> None:
+        self._app = app
+        self._app_factory = None
+
     def setup_mini_app(self, config: MiniAppConfig) -> "FastBot":
         """Setup Mini App after bot creation"""
         self.mini_app = MiniAppManager(self.bot, config)
@@ -107,6 +148,7 @@ class FastBot:
         Logger.info("Starting bot polling...")
 
         try:
+            self._start_loop_monitor()
             for callback in self._startup_callbacks:
                 if asyncio.iscoroutinefunction(callback):
                     await callback(self)
@@ -124,16 +166,23 @@ class FastBot:
                         await callback(self)
                     else:
                         callback(self)
+            await self._stop_loop_monitor()
 
     async def run_web_server(self, port: int = 8000):
         if not self.app:
             Logger.error("Cannot start web server: FastAPI app not configured")
             return
 
+        import uvicorn
+
         Logger.info(f"Starting FastAPI server on port {port}")
         config = uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="info")
         server = uvicorn.Server(config)
-        await server.serve()
+        self._start_loop_monitor()
+        try:
+            await server.serve()
+        finally:
+            await self._stop_loop_monitor()
 
     async def start_with_webhook(
         self, webhook_url: str, host: str = "127.0.0.1", port: int = 8000
@@ -144,18 +193,37 @@ class FastBot:
 
         await self.bot.set_webhook(webhook_url)
 
+        import uvicorn
+
         config = uvicorn.Config(
             self.mini_app.app, host=host, port=port, log_level="info"
         )
         server = uvicorn.Server(config)
 
         Logger.info(f"Starting bot with webhook at {webhook_url}")
-        await server.serve()
+        self._start_loop_monitor()
+        try:
+            await server.serve()
+        finally:
+            await self._stop_loop_monitor()
 
     def add_startup_callback(self, callback: Callable) -> "FastBot":
         self._startup_callbacks.append(callback)
         return self
 
+    def get_loop_stats(self) -> Dict[str, Any]:
+        if not self.loop_monitor:
+            return {"running": False}
+        return self.loop_monitor.get_stats()
+
+    def _start_loop_monitor(self) -> None:
+        if self.loop_monitor and get_loop_monitor() is None:
+            self.loop_monitor.start()
+
+    async def _stop_loop_monitor(self) -> None:
+        if self.loop_monitor and self.loop_monitor.is_running:
+            await self.loop_monitor.stop()
+
     def add_shutdown_callback(self, callback: Callable) -> "FastBot":
         self._shutdown_callbacks.append(callback)
         return self
@@ -175,6 +243,7 @@ class FastBot:
 
     def _wrap_http_handler(self, handler: Callable, dependencies: dict) -> Callable:
         """Обертка для HTTP handlers с поддержкой DI"""
+        from fastapi import HTTPException
 
         async def wrapped_handler(*args, **kwargs):
             try:
@@ -225,6 +294,8 @@ class FastBot:
         if not self.app:
             return
 
+        from fastapi import APIRouter
+
         http_router = APIRouter(prefix="/api/v1", tags=["API"])
 
         for handler_config in self._http_handlers:
@@ -273,6 +344,18 @@ class FastBotBuilder:
         self._mini_app_config: Optional[MiniAppConfig] = None
         self._mini_app_manager: Optional[MiniAppManager] = None
         self.handler_strategy = HandlerStrategy()
+        self._metrics_path: Optional[str] = None
+        self._tracer: Optional[Tracer] = None
+        self._profiling_path: Optional[str] = None
+        self._admin_panel: Optional["FastAdminPanel"] = None
+        self._admin_panel_path = "/admin"
+        self._loop_monitor: Union[LoopLagMonitor, None, bool] = True
+        self._recorder: Optional[UpdateRecorder] = None
+        self._polling_only = False
+        self._snapshot_path: Optional[str] = None
+        self._snapshot_sources: List[str] = []
+        self._template_warmup: Optional[Dict[str, Any]] = None
+        self._button_templates: List[str] = []
 
     def set_bot(self, bot: Bot) -> "FastBotBuilder":
         self._bot = bot
@@ -349,14 +432,11 @@ class FastBotBuilder:
 
         if final_state is not None:
             if isinstance(final_state, list):
-                state_filter = StateFilter(final_state[0])
-                for s in final_state[1:]:
-                    state_filter = state_filter | StateFilter(s)
-                filters.append(state_filter)
+                filters.append(StateFilter(*final_state))
             else:
                 filters.append(StateFilter(final_state))
 
-        return self.add_handler(
+        return self._register_handler(
             handler, *filters, router=router, dependencies=dependencies
         )
 
@@ -394,7 +474,7 @@ class FastBotBuilder:
                     f"does not match menu state ({menu_meta['state']})"
                 )
 
-            self.add_handler(
+            self._register_handler(
                 button_handler,
                 F.text.in_(handler_meta["buttons"]),
                 StateFilter(handler_meta["state"]),
@@ -412,6 +492,22 @@ class FastBotBuilder:
         router: Optional[Router] = None,
         dependencies: Optional[Dict[str, Any]] = None,
     ) -> Future["FastBotBuilder"]:
+        return self._register_handler(
+            handler,
+            *filters,
+            event_type=event_type,
+            router=router,
+            dependencies=dependencies,
+        )
+
+    def _register_handler(
+        self,
+        handler: Callable,
+        *filters: Union[BaseFilter, State],
+        event_type: Type[TelegramObject] = Message,
+        router: Optional[Router] = None,
+        dependencies: Optional[Dict[str, Any]] = None,
+    ) -> "FastBotBuilder":
         handler_name = self._get_handler_name(handler)
 
         base_filters = []
@@ -424,10 +520,7 @@ class FastBotBuilder:
                 base_filters.append(f)
 
         if state_filters:
-            state_filter = StateFilter(state_filters[0])
-            for s in state_filters[1:]:
-                state_filter = state_filter | StateFilter(s)
-            base_filters.append(state_filter)
+            base_filters.append(StateFilter(*state_filters))
 
         handler_config = HandlerConfig(
             handler=handler,
@@ -451,12 +544,16 @@ class FastBotBuilder:
         state: Optional[Any] = None,
         router: Optional[Router] = None,
     ) -> "FastBotBuilder":
+        target_state = state
+
         async def wrapped_handler(message: types.Message, state: FSMContext, **kwargs):
-            if state is not None:
-                await state.set_state(state)
+            if target_state is not None:
+                await state.set_state(target_state)
             return await handler(message, state, **kwargs)
 
-        return self.add_command_handler(command, wrapped_handler, description, router)
+        return self._register_command_handler(
+            command, wrapped_handler, description, router
+        )
 
     def add_async_state_command_handler(
         self,
@@ -466,12 +563,16 @@ class FastBotBuilder:
         state: Optional[Any] = None,
         router: Optional[Router] = None,
     ) -> "FastBotBuilder":
+        target_state = state
+
         async def wrapped_handler(message: types.Message, state: FSMContext, **kwargs):
-            if state is not None:
-                await state.set_state(state)
+            if target_state is not None:
+                await state.set_state(target_state)
             asyncio.create_task(handler(message, state, **kwargs))
 
-        return self.add_command_handler(command, wrapped_handler, description, router)
+        return self._register_command_handler(
+            command, wrapped_handler, description, router
+        )
 
     async def add_command_handler(
         self,
@@ -480,6 +581,15 @@ class FastBotBuilder:
         description: Optional[str] = None,
         router: Optional[Router] = None,
     ) -> Future["FastBotBuilder"]:
+        return self._register_command_handler(command, handler, description, router)
+
+    def _register_command_handler(
+        self,
+        command: Union[str, List[str]],
+        handler: Callable,
+        description: Optional[str] = None,
+        router: Optional[Router] = None,
+    ) -> "FastBotBuilder":
         commands = [command] if isinstance(command, str) else command
 
         original_handler = handler.func if hasattr(handler, "func") else handler
@@ -492,21 +602,21 @@ class FastBotBuilder:
         Logger.info(
             f"Registering command handler: {handler_name} for commands: {commands}"
         )
-        return await self.add_handler(
+        return self._register_handler(
             handler, Command(commands=commands), router=router
         )
 
     async def add_callback_query_handler(
         self, handler: Callable, *filters: BaseFilter, router: Optional[Router] = None
     ) -> Future["FastBotBuilder"]:
-        return await self.add_handler(
+        return self._register_handler(
             handler, *filters, event_type=CallbackQuery, router=router
         )
 
     async def add_inline_query_handler(
         self, handler: Callable, *filters: BaseFilter, router: Optional[Router] = None
     ) -> Future["FastBotBuilder"]:
-        return await self.add_handler(
+        return self._register_handler(
             handler, *filters, event_type=InlineQuery, router=router
         )
 
@@ -535,6 +645,91 @@ class FastBotBuilder:
                 return router
         raise ValueError(f"Router with name '{name}' not found")
 
+    def enable_metrics(self, path: str = "/metrics") -> "FastBotBuilder":
+        """Expose the collected metrics to Prometheus over HTTP"""
+        self._metrics_path = path
+        Logger.info(f"Metrics endpoint enabled at {path}")
+        return self
+
+    def enable_tracing(
+        self,
+        exporter: Any,
+        sample_rate: float = 1.0,
+        service_name: str = "fastbot",
+    ) -> "FastBotBuilder":
+        self._tracer = Tracer(
+            exporter, sample_rate=sample_rate, service_name=service_name
+        )
+        Logger.info(
+            f"Tracing enabled with {type(exporter).__name__}, sample rate {sample_rate}"
+        )
+        return self
+
+    def enable_recording(self, directory: str, **options) -> "FastBotBuilder":
+        """Record incoming updates with timing for later replay"""
+        self._recorder = UpdateRecorder(directory, **options)
+        Logger.info(f"Update recording enabled in {directory}")
+        return self
+
+    def enable_snapshot(
+        self, path: str, sources: Optional[List[str]] = None
+    ) -> "FastBotBuilder":
+        """Reuse handler analysis and template bytecode from a previous build
+
+        The snapshot is rebuilt whenever a handler module, fastbot itself or
+        one of the extra ``sources`` files or directories changes.
+        """
+        self._snapshot_path = path
+        self._snapshot_sources = list(sources or [])
+        Logger.info(f"Build snapshot enabled at {path}")
+        return self
+
+    def enable_template_warmup(
+        self,
+        concurrency: int = 4,
+        extensions: Optional[List[str]] = None,
+        buttons: Optional[List[str]] = None,
+    ) -> "FastBotBuilder":
+        """Precompile the templates of every TemplateEngine dependency at startup
+
+        Keyboards of the ``buttons`` templates that need no context are built
+        up front as well.
+        """
+        self._template_warmup = {"concurrency": concurrency, "extensions": extensions}
+        self._button_templates = buttons or []
+        return self
+
+    def enable_profiling(self, path: str = "/debug/profile") -> "FastBotBuilder":
+        """Expose an HTTP endpoint that profiles live handlers for N seconds"""
+        self._profiling_path = path
+        Logger.info(f"Profiling endpoint enabled at {path}")
+        return self
+
+    def add_admin_panel(
+        self,
+        path: str = "/admin",
+        panel: Optional["FastAdminPanel"] = None,
+        token: Optional[str] = None,
+    ) -> "FastBotBuilder":
+        """Mount a FastAdminPanel, or a default one guarded by ``token``"""
+        from fastbot.FastAdminPanel import FastAdminPanel
+
+        self._admin_panel = panel or FastAdminPanel(token=token)
+        self._admin_panel_path = path
+        Logger.info(f"Admin panel added at {path}")
+        return self
+
+    def set_loop_monitor(self, monitor: Optional[LoopLagMonitor]) -> "FastBotBuilder":
+        """Replace the default event loop monitor, or disable it with None"""
+        self._loop_monitor = monitor
+        return self
+
+    def set_polling_only(self, enabled: bool = True) -> "FastBotBuilder":
+        """Build without a web application, so FastAPI and uvicorn are never imported"""
+        self._polling_only = enabled
+        Logger.info(f"Polling-only build {'enabled' if enabled else 'disabled'}")
+        return self
+
     def set_default_rate_limit(self, rate_limit: float) -> "FastBotBuilder":
         self._default_rate_limit = rate_limit
         Logger.info(f"Default rate limit set to {rate_limit} seconds")
@@ -563,7 +758,7 @@ class FastBotBuilder:
         handler: Callable,
         dependencies: Optional[Dict[str, Any]] = None,
     ) -> "FastBotBuilder":
-        return self._add_http_handler("GET", path, handler, dependencies or {})
+        return await self._add_http_handler("GET", path, handler, dependencies or {})
 
     async def add_post_handler(
         self,
@@ -571,7 +766,7 @@ class FastBotBuilder:
         handler: Callable,
         dependencies: Optional[Dict[str, Any]] = None,
     ) -> "FastBotBuilder":
-        return self._add_http_handler("POST", path, handler, dependencies or {})
+        return await self._add_http_handler("POST", path, handler, dependencies or {})
 
     async def add_put_handler(
         self,
@@ -579,7 +774,7 @@ class FastBotBuilder:
         handler: Callable,
         dependencies: Optional[Dict[str, Any]] = None,
     ) -> "FastBotBuilder":
-        return self._add_http_handler("PUT", path, handler, dependencies or {})
+        return await self._add_http_handler("PUT", path, handler, dependencies or {})
 
     async def add_delete_handler(
         self,
@@ -587,7 +782,7 @@ class FastBotBuilder:
         handler: Callable,
         dependencies: Optional[Dict[str, Any]] = None,
     ) -> "FastBotBuilder":
-        return self._add_http_handler("DELETE", path, handler, dependencies or {})
+        return await self._add_http_handler("DELETE", path, handler, dependencies or {})
 
     async def add_patch_handler(
         self,
@@ -595,7 +790,7 @@ class FastBotBuilder:
         handler: Callable,
         dependencies: Optional[Dict[str, Any]] = None,
     ) -> "FastBotBuilder":
-        return self._add_http_handler("PATCH", path, handler, dependencies or {})
+        return await self._add_http_handler("PATCH", path, handler, dependencies or {})
 
     async def add_websocket_handler(
         self,
@@ -603,9 +798,13 @@ class FastBotBuilder:
         handler: Callable,
         dependencies: Optional[Dict[str, Any]] = None,
     ) -> "FastBotBuilder":
-        return self._add_http_handler("WEBSOCKET", path, handler, dependencies or {})
+        return await self._add_http_handler(
+            "WEBSOCKET", path, handler, dependencies or {}
+        )
 
     def create_depends(self, dependency_key: str):
+        from fastapi import Depends, HTTPException, Request
+
         def dependency(request: Request):
             if hasattr(request.app.state, "bot_instance"):
                 bot_instance = request.app.state.bot_instance
@@ -626,7 +825,7 @@ class FastBotBuilder:
         Logger.info(f"HTTP handler added: {method} {path}")
         return self
 
-    def add_http_router(self, router: APIRouter) -> "FastBotBuilder":
+    def add_http_router(self, router: "APIRouter") -> "FastBotBuilder":
         if not hasattr(self, "_http_routers"):
             self._http_routers = []
 
@@ -694,93 +893,137 @@ class FastBotBuilder:
         resolved = await self.dependency_container.resolve(event, dependencies)
         return resolved
 
-    def _wrap_handler(self, handler: Callable, dependencies: dict) -> Callable:
+    def _wrap_handler(
+        self,
+        handler: Callable,
+        dependencies: dict,
+        event_type: Type[TelegramObject] = Message,
+        signature: Optional[HandlerSignature] = None,
+    ) -> Callable:
         original_handler = handler.func if isinstance(handler, partial) else handler
 
-        async def wrapped_handler(event: TelegramObject, **kwargs):
-            try:
-                sig = inspect.signature(original_handler)
+        # Signature analysis happens once here instead of on every update
+        signature = signature or analyze_signature(handler, event_type)
+        parameters = signature.parameters
+        event_arguments = signature.event_arguments
+        wants_state = "state" in parameters
+        injected = signature.injected
+        partial_keywords = [
+            (k, v)
+            for k, v in (
+                handler.keywords if isinstance(handler, partial) else {}
+            ).items()
+            if k in parameters
+        ]
+        is_coroutine = signature.is_coroutine
 
-                resolved_deps = await self._resolve_dependencies(event, dependencies)
+        metric_labels = (self._get_handler_name(handler), event_type.__name__)
+        calls = HANDLER_CALLS.labels(*metric_labels)
+        errors = HANDLER_ERRORS.labels(*metric_labels)
+        in_flight = HANDLER_IN_FLIGHT.labels(*metric_labels)
+        duration = HANDLER_DURATION.labels(*metric_labels)
 
-                bound_args = {}
-
-                match_result = match(
-                    event,
-                    Message,
-                    lambda msg: {
-                        "message": msg if "message" in sig.parameters else None,
-                        "msg": msg if "msg" in sig.parameters else None,
-                    },
-                    CallbackQuery,
-                    lambda cb: {
-                        "callback": cb if "callback" in sig.parameters else None,
-                        "callback_query": (
-                            cb if "callback_query" in sig.parameters else None
-                        ),
-                        "query": cb if "query" in sig.parameters else None,
-                    },
-                    InlineQuery,
-                    lambda iq: {
-                        "inline_query": (
-                            iq if "inline_query" in sig.parameters else None
-                        ),
-                        "query": iq if "query" in sig.parameters else None,
-                    },
-                    _,
-                    lambda x: {},
+        async def wrapped_handler(event: TelegramObject, **kwargs):
+            calls.inc()
+            in_flight.inc()
+            started = perf_counter()
+            session = get_active_session()
+            profiling_token = (
+                session.enter(metric_labels[0], sys._getframe()) if session else None
+            )
+            monitor = get_loop_monitor()
+            if monitor:
+                update = kwargs.get("event_update")
+                monitor_token = monitor.enter(
+                    metric_labels[0],
+                    update.update_id if update else None,
+                    sys._getframe(),
                 )
+            with start_span(
+                "handler", handler=metric_labels[0], event_type=metric_labels[1]
+            ):
+                try:
+                    resolved_deps = await self._resolve_dependencies(
+                        event, dependencies
+                    )
 
-                for key, value in match_result.items():
-                    if value is not None and key in sig.parameters:
-                        bound_args[key] = value
+                    bound_args = {name: event for name in event_arguments}
 
-                if "state" in sig.parameters and "state" in kwargs:
-                    bound_args["state"] = kwargs["state"]
+                    if wants_state and "state" in kwargs:
+                        bound_args["state"] = kwargs["state"]
 
-                for name, param in sig.parameters.items():
-                    if name in bound_args:
-                        continue
+                    for name, annotation in injected:
+                        if name in bound_args:
+                            continue
 
-                    if param.annotation != param.empty:
-                        for dep in resolved_deps.values():
-                            if isinstance(dep, param.annotation):
-                                bound_args[name] = dep
-                                break
+                        if annotation is not inspect.Parameter.empty:
+                            for dep in resolved_deps.values():
+                                if isinstance(dep, annotation):
+                                    bound_args[name] = dep
+                                    break
 
-                    elif name in resolved_deps:
-                        bound_args[name] = resolved_deps[name]
-                    elif name in kwargs:
-                        bound_args[name] = kwargs[name]
+                        elif name in resolved_deps:
+                            bound_args[name] = resolved_deps[name]
+                        elif name in kwargs:
+                            bound_args[name] = kwargs[name]
 
-                if isinstance(handler, partial):
-                    for k, v in handler.keywords.items():
-                        if k not in bound_args and k in sig.parameters:
+                    for k, v in partial_keywords:
+                        if k not in bound_args:
                             bound_args[k] = v
 
-                if inspect.iscoroutinefunction(original_handler):
-                    return await original_handler(**bound_args)
-                else:
-                    return original_handler(**bound_args)
-
-            except Exception as e:
-                Logger.error(
-                    f"Error in wrapped handler {self._get_handler_name(handler)}: {e}"
-                )
-                raise
+                    if is_coroutine:
+                        return await original_handler(**bound_args)
+                    else:
+                        return original_handler(**bound_args)
+
+                except Exception as e:
+                    errors.inc()
+                    Logger.error(
+                        f"Error in wrapped handler {self._get_handler_name(handler)}: {e}"
+                    )
+                    raise
+                finally:
+                    duration.observe(perf_counter() - started)
+                    in_flight.dec()
+                    if session:
+                        session.exit(profiling_token)
+                    if monitor:
+                        monitor.exit(monitor_token)
 
         wrapped_handler.__name__ = self._get_handler_name(handler)
         wrapped_handler._original_handler = original_handler
 
         return wrapped_handler
 
+    def _instrument_middleware(
+        self, middleware: Callable, event_type: Type[TelegramObject]
+    ) -> Callable:
+        if self._tracer:
+            middleware = trace_middleware(middleware, event_type)
+        return instrument_middleware(middleware, event_type)
+
+    async def _close_recorder(self, _: "FastBot") -> None:
+        await asyncio.to_thread(self._recorder.close)
+
+    async def _shutdown_tracer(self, _: "FastBot") -> None:
+        # Flushing joins the exporter thread; keep the loop free meanwhile
+        await asyncio.to_thread(self._tracer.shutdown)
+
+    def _add_session_middleware(self, middleware_type: Type) -> None:
+        """Add a Bot API middleware unless an earlier build already did"""
+        middlewares = self._bot.session.middleware
+        if not any(isinstance(m, middleware_type) for m in middlewares):
+            middlewares(middleware_type())
+
     def _setup_mini_app_handlers(self):
         if not self._mini_app_manager:
             return
 
-        self.add_command_handler("app", self._handle_app_command, "Open Mini App")
+        self._register_command_handler("app", self._handle_app_command, "Open Mini App")
 
-        self.add_handler(self._handle_web_app_data, F.content_type == "web_app_data")
+        self._register_handler(
+            self._handle_web_app_data, F.content_type == "web_app_data"
+        )
 
     async def _handle_app_command(self, message: types.Message):
         if not self._mini_app_manager:
@@ -793,12 +1036,14 @@ class FastBotBuilder:
             reply_markup=types.InlineKeyboardMarkup(inline_keyboard=[[button]]),
         )
 
-    def _setup_http_handlers(self, app: FastAPI):
+    def _setup_http_handlers(self, app: "FastAPI"):
         """Настройка HTTP handlers для FastAPI приложения"""
         if not self._http_handlers:
             Logger.info("No HTTP handlers to register")
             return
 
+        from fastapi import APIRouter, HTTPException, Request
+
         api_router = APIRouter(prefix="/api/v1", tags=["API"])
 
         root_router = APIRouter()
@@ -806,7 +1051,9 @@ class FastBotBuilder:
         for handler_config in self._http_handlers:
 
             def create_wrapped_handler(handler_cfg):
-                async def wrapped_handler(request: Request, **kwargs):
+                # Only ``request`` is declared, so FastAPI does not try to
+                # validate the handler's own parameters itself
+                async def wrapped_handler(request: Request):
                     try:
                         resolved_deps = await self.dependency_container.resolve(
                             request, handler_cfg.dependencies
@@ -815,6 +1062,8 @@ class FastBotBuilder:
                         sig = inspect.signature(handler_cfg.handler)
                         bound_args = {}
 
+                        params = {**request.query_params, **request.path_params}
+
                         if "request" in sig.parameters:
                             bound_args["request"] = request
 
@@ -822,15 +1071,15 @@ class FastBotBuilder:
                             if name in bound_args:
                                 continue
 
-                            if param.annotation != param.empty:
+                            if name in params:
+                                bound_args[name] = params[name]
+                            elif param.annotation != param.empty:
                                 for dep in resolved_deps.values():
                                     if isinstance(dep, param.annotation):
                                         bound_args[name] = dep
                                         break
                             elif name in resolved_deps:
                                 bound_args[name] = resolved_deps[name]
-                            elif name in kwargs:
-                                bound_args[name] = kwargs[name]
 
                         if inspect.iscoroutinefunction(handler_cfg.handler):
                             result = await handler_cfg.handler(**bound_args)
@@ -859,21 +1108,8 @@ class FastBotBuilder:
                 else handler_config.path
             )
 
-            match(
-                handler_config.method,
-                "GET",
-                target_router.get(actual_path)(wrapped_handler),
-                "POST",
-                target_router.post(actual_path)(wrapped_handler),
-                "PUT",
-                target_router.put(actual_path)(wrapped_handler),
-                "DELETE",
-                target_router.delete(actual_path)(wrapped_handler),
-                "PATCH",
-                target_router.patch(actual_path)(wrapped_handler),
-                "WEBSOCKET",
-                target_router.websocket(actual_path)(wrapped_handler),
-            )
+            register = getattr(target_router, handler_config.method.lower())
+            register(actual_path)(wrapped_handler)
 
             Logger.info(
                 f"HTTP handler registered: {handler_config.method} {handler_config.path}"
@@ -895,15 +1131,114 @@ class FastBotBuilder:
             Logger.error(f"Error processing Mini App data: {e}")
             await message.answer("Error processing data from Mini App")
 
-    def build(self) -> "FastBot":
-        if not self._bot:
-            raise BotNotSetError("Bot is not set")
+    def _load_snapshot(self) -> BuildSnapshot:
+        sources = set(self._snapshot_sources)
+        sources.update(
+            sys.modules[module].__file__
+            for module in (__name__, HandlerRegistry.__module__)
+        )
+        for config in self._handlers:
+            handler = config.handler
+            while isinstance(handler, partial):
+                handler = handler.func
+            module = sys.modules.get(getattr(handler, "__module__", None))
+            if getattr(module, "__file__", None):
+                sources.add(module.__file__)
+
+        snapshot = BuildSnapshot.load(self._snapshot_path, source_fingerprint(sources))
+        if snapshot.loaded:
+            Logger.info(
+                f"Build snapshot loaded: {len(snapshot.handlers)} handlers, "
+                f"{len(snapshot.templates)} templates"
+            )
+        return snapshot
+
+    def _template_engines(self) -> List[Any]:
+        # Without the module loaded there can be no TemplateEngine instances,
+        # and checking first keeps Jinja out of bots that do not use it
+        module = sys.modules.get("fastbot.engine.templates.template_engine")
+        if module is None:
+            return []
+        return [
+            dependency
+            for dependency in self.dependency_container._dependencies.values()
+            if isinstance(dependency, module.TemplateEngine)
+        ]
 
-        if not self._dp:
-            self._dp = Dispatcher()
-            Logger.info("Created default Dispatcher")
+    def _compile_templates(self, snapshot: BuildSnapshot) -> None:
+        """Compile every template so its bytecode ends up in the snapshot
 
-        bot_instance = FastBot(self._bot, self._dp)
+        Skipped when the snapshot already holds the bytecode of the current
+        template files; templates then load from it on first use.
+        """
+        engines = self._template_engines()
+        if not engines:
+            return
+
+        from fastbot.snapshot import SnapshotBytecodeCache
+
+        cache = SnapshotBytecodeCache(snapshot)
+        for engine in engines:
+            if engine.env.bytecode_cache is None:
+                engine.env.bytecode_cache = cache
+
+        fingerprint = source_fingerprint(
+            str(directory) for engine in engines for directory in engine.template_dirs
+        )
+        if snapshot.update_templates(fingerprint):
+            Logger.info("Templates unchanged since the snapshot, not recompiling")
+            return
+
+        for engine in engines:
+            for name in engine.env.list_templates():
+                try:
+                    engine.env.get_template(name)
+                except Exception as e:
+                    Logger.warning(f"Template {name} was not precompiled: {e}")
+
+    async def _warmup_templates(
+        self, bot_instance: FastBot, snapshot: Optional[BuildSnapshot] = None
+    ) -> None:
+        for engine in self._template_engines():
+            await engine.warmup(**self._template_warmup)
+            if not self._button_templates:
+                continue
+            key = os.pathsep.join(str(d) for d in engine.template_dirs)
+            prebuilt = snapshot.keyboards.get(key) if snapshot else None
+            await engine.prebuild_buttons(self._button_templates, prebuilt=prebuilt)
+            if snapshot:
+                snapshot.update_keyboards(key, engine.prebuilt_keyboards())
+
+        if snapshot and snapshot.dirty:
+            await asyncio.to_thread(snapshot.save)
+
+    def _web_features(self) -> List[str]:
+        """HTTP features that need the web application built together with the bot"""
+        features = []
+        if self._http_handlers:
+            features.append("HTTP handlers")
+        if getattr(self, "_http_routers", None):
+            features.append("HTTP routers")
+        if self._mini_app_config:
+            features.append("Mini App")
+        if self._admin_panel:
+            features.append("admin panel")
+        if self._profiling_path:
+            features.append("profiling endpoint")
+        return features
+
+    def _check_polling_only(self) -> None:
+        features = self._web_features()
+        if features:
+            raise ConfigurationError(
+                f"Polling-only build cannot serve: {', '.join(features)}"
+            )
+        Logger.info("Polling-only build, web application disabled")
+
+    def _build_app(self, bot_instance: FastBot) -> "FastAPI":
+        from fastapi import FastAPI, WebSocket
+        from fastapi.middleware.cors import CORSMiddleware
+        from fastapi.staticfiles import StaticFiles
 
         app = FastAPI()
         app.add_middleware(
@@ -946,16 +1281,49 @@ class FastBotBuilder:
                 async def websocket_endpoint(websocket: WebSocket):
                     await self._mini_app_config.ws_handler(websocket)
 
-            self._setup_mini_app_handlers()
-
         self._setup_http_handlers(app)
 
         if hasattr(self, "_http_routers"):
             for router in self._http_routers:
                 app.include_router(router)
 
-        bot_instance.app = app
+        if self._metrics_path:
+            setup_metrics_route(app, self._metrics_path)
+            Logger.info(f"Metrics endpoint registered: GET {self._metrics_path}")
+
+        if self._profiling_path:
+            setup_profiling_route(app, self._profiling_path)
+            Logger.info(f"Profiling endpoint registered: GET {self._profiling_path}")
+
+        if self._admin_panel:
+            app.mount(self._admin_panel_path, self._admin_panel.app, "admin")
+            Logger.info(f"Admin panel mounted at {self._admin_panel_path}")
+
         Logger.info("FastAPI app created and configured")
+        return app
+
+    def build(self) -> "FastBot":
+        if not self._bot:
+            raise BotNotSetError("Bot is not set")
+
+        if not self._dp:
+            self._dp = Dispatcher()
+            Logger.info("Created default Dispatcher")
+
+        bot_instance = FastBot(self._bot, self._dp)
+        if self._loop_monitor is not True:
+            bot_instance.loop_monitor = self._loop_monitor
+
+        if self._polling_only:
+            self._check_polling_only()
+        elif self._web_features():
+            Logger.info(f"Building web app for {', '.join(self._web_features())}")
+            bot_instance.app = self._build_app(bot_instance)
+        else:
+            bot_instance._app_factory = partial(self._build_app, bot_instance)
+
+        if self._mini_app_config:
+            self._setup_mini_app_handlers()
 
         for key in self.dependency_container._dependencies:
             bot_instance.add_dependency(
@@ -967,34 +1335,76 @@ class FastBotBuilder:
 
         self._dp.include_router(self._default_router)
 
+        self._add_session_middleware(MetricsRequestMiddleware)
+
+        if self._recorder:
+            self._dp.update.outer_middleware(RecordingMiddleware(self._recorder))
+            bot_instance.add_shutdown_callback(self._close_recorder)
+
+        if self._tracer:
+            set_tracer(self._tracer)
+            self._dp.update.outer_middleware(TracingMiddleware(self._tracer))
+            self._add_session_middleware(TracingRequestMiddleware)
+            bot_instance.add_shutdown_callback(self._shutdown_tracer)
+
         for middleware in self._message_middlewares:
-            self._dp.message.middleware.register(middleware)
+            self._dp.message.middleware.register(
+                self._instrument_middleware(middleware, Message)
+            )
 
         for middleware in self._callback_query_middlewares:
-            self._dp.callback_query.middleware.register(middleware)
+            self._dp.callback_query.middleware.register(
+                self._instrument_middleware(middleware, CallbackQuery)
+            )
 
         for middleware in self._inline_query_middlewares:
-            self._dp.inline_query.middleware.register(middleware)
+            self._dp.inline_query.middleware.register(
+                self._instrument_middleware(middleware, InlineQuery)
+            )
 
         for router in self._routers:
             self._dp.include_router(router)
 
-        for handler_config in self._handlers:
-            router = handler_config.router or self._default_router
+        snapshot = self._load_snapshot() if self._snapshot_path else None
+
+        registry = HandlerRegistry.compile(
+            self._handlers,
+            self._default_router,
+            lambda config, signature: self._wrap_handler(
+                config.handler,
+                {**self.dependency_container._dependencies, **config.dependencies},
+                config.event_type,
+                signature,
+            ),
+            wrap_filter=trace_filter if self._tracer else None,
+            name=self._get_handler_name,
+            signatures=snapshot.handlers if snapshot else None,
+        )
+        problems = registry.validate()
+        if problems:
+            # An earlier handler that raises SkipHandler still lets these run
+            Logger.warning(
+                "Possibly unreachable handlers:\n"
+                + "\n".join(f"  {p}" for p in problems)
+            )
+        registry.install(self.handler_strategy)
+        bot_instance.handler_registry = registry
+        Logger.info(
+            f"Compiled {len(registry)} handlers into {len(registry.groups)} groups"
+        )
 
-            wrapped_handler = self._wrap_handler(
-                handler_config.handler,
-                {
-                    **self.dependency_container._dependencies,
-                    **handler_config.dependencies,
-                },
+        if snapshot:
+            snapshot.update_handlers(registry.signatures())
+            self._compile_templates(snapshot)
+            if snapshot.dirty:
+                snapshot.save()
+            bot_instance.add_shutdown_callback(
+                lambda _: snapshot.save() if snapshot.dirty else None
             )
 
-            self.handler_strategy.register(
-                router,
-                wrapped_handler,
-                handler_config.filters,
-                handler_config.event_type,
+        if self._template_warmup is not None:
+            bot_instance.add_startup_callback(
+                partial(self._warmup_templates, snapshot=snapshot)
             )
 
         if self._error_handler:
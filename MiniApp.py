@@ -7,11 +7,6 @@ from typing import (
 from aiogram import F, Bot, types
 from aiogram.types import WebAppInfo
 
-from fastapi import FastAPI, Request, WebSocket
-from fastapi.staticfiles import StaticFiles
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-
 
 class MiniAppConfig:
     def __init__(
@@ -35,6 +30,9 @@ class MiniAppConfig:
 
 class MiniAppManager:
     def __init__(self, bot: Bot, config: MiniAppConfig):
+        from fastapi import FastAPI
+        from fastapi.middleware.cors import CORSMiddleware
+
         self.bot = bot
         self.config = config
         self.app = FastAPI(title=config.title, description=config.description)
@@ -48,6 +46,10 @@ class MiniAppManager:
         self._setup_routes()
 
     def _setup_routes(self):
+        from fastapi import Request, WebSocket
+        from fastapi.responses import HTMLResponse
+        from fastapi.staticfiles import StaticFiles
+
         @self.app.get(self.config.path, response_class=HTMLResponse)
         async def mini_app(request: Request):
             return self._generate_mini_app_html(request)
@@ -1,32 +1,65 @@
-from .FastBot import FastBotBuilder, FastBot
-
-from .MiniApp import MiniAppConfig
-
-from .builders import InlineMenuBuilder, ReplyMenuBuilder
-
-from .engine import TemplateEngine, ContextEngine
-
-from .strategies import HandlerStrategy
-
-from .decorators import (
-    reply_menu_decorator,
-    with_template_engine,
-    register_context,
-    with_parse_mode,
-    inject,
-)
+from typing import TYPE_CHECKING
 
 from .core import Result, Ok, Err, result_try
+from .core.lazy import lazy_exports
 
 from .logger import logger
 
-from .configs import HandlerConfig
-
-from .filters import StateFilter
+if TYPE_CHECKING:
+    from .FastBot import FastBotBuilder, FastBot
+    from .MiniApp import MiniAppConfig
+    from .builders import (
+        InlineMenuBuilder,
+        ReplyMenuBuilder,
+        KeyboardProgram,
+        compile_keyboard,
+    )
+    from .engine import TemplateEngine, ContextEngine
+    from .strategies import HandlerStrategy
+    from .decorators import (
+        reply_menu_decorator,
+        with_template_engine,
+        register_context,
+        with_parse_mode,
+        inject,
+    )
+    from .configs import HandlerConfig
+    from .filters import StateFilter
+    from .dependencies import get_context_engine, get_template_engine, get_web_engine
+    from .event import EventManager, EventPriority, Event, EventHandler, EventMixin
 
-from .dependencies import get_context_engine, get_template_engine, get_web_engine
-
-from .event import EventManager, EventPriority, Event, EventHandler, EventMixin
+# Web, template and Telegram stacks are imported on first access, so
+# `import fastbot` stays cheap for workers that only need part of them
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "FastBotBuilder": (".FastBot", "FastBotBuilder"),
+        "FastBot": (".FastBot", "FastBot"),
+        "MiniAppConfig": (".MiniApp", "MiniAppConfig"),
+        "InlineMenuBuilder": (".builders", "InlineMenuBuilder"),
+        "ReplyMenuBuilder": (".builders", "ReplyMenuBuilder"),
+        "KeyboardProgram": (".builders", "KeyboardProgram"),
+        "compile_keyboard": (".builders", "compile_keyboard"),
+        "TemplateEngine": (".engine", "TemplateEngine"),
+        "ContextEngine": (".engine", "ContextEngine"),
+        "HandlerStrategy": (".strategies", "HandlerStrategy"),
+        "reply_menu_decorator": (".decorators", "reply_menu_decorator"),
+        "with_template_engine": (".decorators", "with_template_engine"),
+        "register_context": (".decorators", "register_context"),
+        "with_parse_mode": (".decorators", "with_parse_mode"),
+        "inject": (".decorators", "inject"),
+        "HandlerConfig": (".configs", "HandlerConfig"),
+        "StateFilter": (".filters", "StateFilter"),
+        "get_context_engine": (".dependencies", "get_context_engine"),
+        "get_template_engine": (".dependencies", "get_template_engine"),
+        "get_web_engine": (".dependencies", "get_web_engine"),
+        "EventManager": (".event", "EventManager"),
+        "EventPriority": (".event", "EventPriority"),
+        "Event": (".event", "Event"),
+        "EventHandler": (".event", "EventHandler"),
+        "EventMixin": (".event", "EventMixin"),
+    },
+)
 
 __all__ = [
     "Result",
@@ -38,6 +71,8 @@ __all__ = [
     "FastBot",
     "InlineMenuBuilder",
     "ReplyMenuBuilder",
+    "KeyboardProgram",
+    "compile_keyboard",
     "TemplateEngine",
     "ContextEngine",
     "HandlerStrategy",
@@ -0,0 +1,88 @@
+import json
+import platform
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+
+# metric path -> True when a higher value is better
+Direction = Dict[str, bool]
+
+
+def percentiles(
+    samples: Sequence[float], points: Iterable[float] = (50, 90, 99)
+) -> Dict[str, float]:
+    if not samples:
+        return {f"p{p:g}": 0.0 for p in points}
+
+    ordered = sorted(samples)
+    result = {}
+    for point in points:
+        index = min(len(ordered) - 1, int(round(point / 100 * (len(ordered) - 1))))
+        result[f"p{point:g}"] = ordered[index]
+    result["max"] = ordered[-1]
+    return result
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+    }
+
+
+def write_results(results: Dict[str, Any], path: Union[str, Path, None]) -> None:
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if path is None or str(path) == "-":
+        print(text)
+        return
+    Path(path).write_text(text + "\n", encoding="utf-8")
+
+
+def load_results(path: Union[str, Path]) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _lookup(results: Dict[str, Any], metric: str) -> Any:
+    value: Any = results
+    for key in metric.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    directions: Direction,
+    tolerance: float = 0.2,
+) -> List[Tuple[str, float, float, float]]:
+    """Return (metric, baseline, current, change) for every metric that regressed"""
+    regressions = []
+    for metric, higher_is_better in directions.items():
+        before = _lookup(baseline, metric)
+        after = _lookup(current, metric)
+        if not before or after is None:
+            continue
+
+        change = (after - before) / before
+        regressed = change < -tolerance if higher_is_better else change > tolerance
+        if regressed:
+            regressions.append((metric, before, after, change))
+    return regressions
+
+
+def report_comparison(
+    regressions: List[Tuple[str, float, float, float]], tolerance: float
+) -> int:
+    if not regressions:
+        print(f"No regressions beyond {tolerance:.0%} against baseline")
+        return 0
+
+    print(f"Regressions beyond {tolerance:.0%} against baseline:")
+    for metric, before, after, change in regressions:
+        print(f"  {metric}: {before:.6g} -> {after:.6g} ({change:+.1%})")
+    return 1
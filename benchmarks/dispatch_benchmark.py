@@ -0,0 +1,257 @@
+"""End-to-end dispatch benchmark.
+
+Builds a bot through FastBotBuilder with a realistic number of handlers and feeds
+synthetic updates through ``dp.feed_update`` against an in-memory Bot session.
+
+    python -m fastbot.benchmarks.dispatch_benchmark --output results.json
+    python -m fastbot.benchmarks.dispatch_benchmark --compare baselines/dispatch.json
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import sys
+import tracemalloc
+from dataclasses import asdict, dataclass
+from time import perf_counter
+from typing import Any, Dict, List
+
+from aiogram import Bot, F
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import CallbackQuery, Message, Update
+
+from fastbot import FastBot, FastBotBuilder
+from fastbot.logger import Logger
+from fastbot.testing import FakeSession, make_callback_update, make_message_update
+
+from fastbot.benchmarks.common import (
+    BASELINES_DIR,
+    compare_results,
+    environment,
+    load_results,
+    percentiles,
+    report_comparison,
+    write_results,
+)
+
+BOT_TOKEN = "123456:BENCHMARK-TOKEN-abcdefghijklmnopqrstu"
+
+DIRECTIONS = {
+    "updates_per_sec": True,
+    "latency.p50": False,
+    "latency.p99": False,
+    "allocations.peak_bytes_per_update": False,
+}
+
+
+@dataclass
+class DispatchConfig:
+    commands: int = 200
+    menus: int = 20
+    buttons_per_menu: int = 5
+    callbacks: int = 200
+    states: int = 50
+    resolvers: int = 5
+    users: int = 100
+    updates: int = 2000
+    warmup: int = 200
+    allocation_samples: int = 200
+    seed: int = 42
+
+
+def _named(name: str, func):
+    func.__name__ = name
+    return func
+
+
+def _command_handler(name: str):
+    async def handler(message: Message):
+        await message.answer(name)
+
+    return _named(name, handler)
+
+
+def _callback_handler(name: str):
+    async def handler(callback: CallbackQuery):
+        await callback.answer(name)
+
+    return _named(name, handler)
+
+
+def _resolver(type_: type):
+    async def resolver(event):
+        return type_()
+
+    return resolver
+
+
+async def build_bot(config: DispatchConfig) -> FastBot:
+    builder = FastBotBuilder().set_bot(Bot(BOT_TOKEN, session=FakeSession()))
+
+    for i in range(config.commands):
+        await builder.add_command_handler(f"cmd{i}", _command_handler(f"cmd{i}"))
+
+    for i in range(config.menus):
+        buttons = [f"menu{i} button{j}" for j in range(config.buttons_per_menu)]
+        state = State(f"menu{i}", "benchmark")
+        await builder.add_handler(
+            _command_handler(f"menu{i}"), F.text.in_(buttons), state
+        )
+
+    for i in range(config.callbacks):
+        await builder.add_callback_query_handler(
+            _callback_handler(f"callback{i}"), F.data == f"callback:{i}"
+        )
+
+    for i in range(config.states):
+        state = State(f"state{i}", "benchmark")
+        await builder.add_handler(_command_handler(f"state{i}"), state)
+
+    for i in range(config.resolvers):
+        resolved_type = type(f"Resolved{i}", (), {})
+        builder.add_dependency_resolver(resolved_type, _resolver(resolved_type))
+
+    return builder.build()
+
+
+async def assign_states(bot: FastBot, config: DispatchConfig) -> Dict[int, str]:
+    """Put every user into a menu or plain state so state-filtered handlers match"""
+    user_states = {}
+    for user_id in range(1, config.users + 1):
+        if user_id % 2 and config.menus:
+            state = State(f"menu{user_id % config.menus}", "benchmark")
+        elif config.states:
+            state = State(f"state{user_id % config.states}", "benchmark")
+        else:
+            continue
+
+        key = StorageKey(bot_id=bot.bot.id, chat_id=user_id, user_id=user_id)
+        await FSMContext(bot.dp.storage, key).set_state(state)
+        user_states[user_id] = state.state
+    return user_states
+
+
+def make_updates(config: DispatchConfig, user_states: Dict[int, str]) -> List[Update]:
+    rng = random.Random(config.seed)
+    updates = []
+    for update_id in range(1, config.updates + config.warmup + 1):
+        user_id = rng.randint(1, config.users)
+        kind = rng.random()
+        state = user_states.get(user_id, "")
+
+        if kind < 0.4 and config.commands:
+            text = f"/cmd{rng.randrange(config.commands)}"
+            updates.append(make_message_update(update_id, text, user_id))
+        elif kind < 0.7 and config.callbacks:
+            data = f"callback:{rng.randrange(config.callbacks)}"
+            updates.append(make_callback_update(update_id, data, user_id))
+        elif state.startswith("benchmark:menu"):
+            menu = state.split(":menu", 1)[1]
+            button = rng.randrange(config.buttons_per_menu)
+            text = f"menu{menu} button{button}"
+            updates.append(make_message_update(update_id, text, user_id))
+        else:
+            updates.append(make_message_update(update_id, "free text", user_id))
+    return updates
+
+
+async def run_benchmark(config: DispatchConfig) -> Dict[str, Any]:
+    build_started = perf_counter()
+    bot = await build_bot(config)
+    build_time = perf_counter() - build_started
+
+    user_states = await assign_states(bot, config)
+    updates = make_updates(config, user_states)
+    warmup, measured = updates[: config.warmup], updates[config.warmup :]
+
+    for update in warmup:
+        await bot.dp.feed_update(bot.bot, update)
+
+    gc.collect()
+    latencies = []
+    started = perf_counter()
+    for update in measured:
+        update_started = perf_counter()
+        await bot.dp.feed_update(bot.bot, update)
+        latencies.append(perf_counter() - update_started)
+    elapsed = perf_counter() - started
+
+    return {
+        "benchmark": "dispatch",
+        "environment": environment(),
+        "config": asdict(config),
+        "handlers": config.commands + config.menus + config.callbacks + config.states,
+        "build_seconds": build_time,
+        "updates": len(measured),
+        "elapsed_seconds": elapsed,
+        "updates_per_sec": len(measured) / elapsed if elapsed else 0.0,
+        "latency": percentiles(latencies),
+        "allocations": await measure_allocations(
+            bot, measured[: config.allocation_samples]
+        ),
+        "bot_api_requests": bot.bot.session.request_count,
+    }
+
+
+async def measure_allocations(bot: FastBot, updates: List[Update]) -> Dict[str, float]:
+    if not updates:
+        return {"peak_bytes_per_update": 0.0, "retained_blocks_per_update": 0.0}
+
+    gc.collect()
+    tracemalloc.start()
+    peaks = 0
+    blocks_before = sys.getallocatedblocks()
+    for update in updates:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        await bot.dp.feed_update(bot.bot, update)
+        peaks += tracemalloc.get_traced_memory()[1] - current
+    gc.collect()
+    blocks_after = sys.getallocatedblocks()
+    tracemalloc.stop()
+
+    return {
+        "peak_bytes_per_update": peaks / len(updates),
+        "retained_blocks_per_update": (blocks_after - blocks_before) / len(updates),
+    }
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    defaults = DispatchConfig()
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value)
+    parser.add_argument("--output", default="-", help="JSON file, '-' for stdout")
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const=str(BASELINES_DIR / "dispatch.json"),
+        help="Baseline JSON to compare against",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    config = DispatchConfig(
+        **{name: getattr(args, name) for name in asdict(DispatchConfig())}
+    )
+
+    Logger.configure(level="WARNING")
+    results = asyncio.run(run_benchmark(config))
+    write_results(results, args.output)
+
+    if args.compare:
+        regressions = compare_results(
+            results, load_results(args.compare), DIRECTIONS, args.tolerance
+        )
+        return report_comparison(regressions, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
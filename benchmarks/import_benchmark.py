@@ -0,0 +1,129 @@
+"""Import-time benchmark.
+
+Times common import statements in fresh interpreters and lists which heavy
+optional stacks each of them pulls in, so lazy loading does not regress.
+
+    python -m fastbot.benchmarks.import_benchmark --output imports.json
+    python -m fastbot.benchmarks.import_benchmark --compare
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from fastbot.benchmarks.common import (
+    BASELINES_DIR,
+    compare_results,
+    environment,
+    load_results,
+    report_comparison,
+    write_results,
+)
+
+HEAVY_MODULES = (
+    "aiogram",
+    "fastapi",
+    "starlette",
+    "uvicorn",
+    "jinja2",
+    "pampy",
+    "loguru",
+)
+
+STATEMENTS = {
+    "package": "import fastbot",
+    "core": "from fastbot import Result, Ok, Err",
+    "builder": "from fastbot import FastBotBuilder",
+    "templates": "from fastbot import TemplateEngine",
+    "polling_build": (
+        "from aiogram import Bot; from fastbot import FastBotBuilder; "
+        "FastBotBuilder().set_bot(Bot('123456:TOKEN')).set_polling_only().build()"
+    ),
+}
+
+_PROBE = """
+import json, sys
+from time import perf_counter
+started = perf_counter()
+exec({statement!r})
+elapsed = perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": [m for m in {modules!r} if m in sys.modules],
+}}))
+"""
+
+
+def probe_import(statement: str) -> Dict[str, Any]:
+    """Run one import statement in a fresh interpreter"""
+    code = _PROBE.format(statement=statement, modules=HEAVY_MODULES)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(p for p in sys.path if p)}
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_benchmark(repeat: int) -> Dict[str, Any]:
+    results = {}
+    for name, statement in STATEMENTS.items():
+        probes = [probe_import(statement) for _ in range(repeat)]
+        timings = [probe["seconds"] for probe in probes]
+        results[name] = {
+            "statement": statement,
+            "median_seconds": statistics.median(timings),
+            "min_seconds": min(timings),
+            "loaded": probes[0]["loaded"],
+        }
+        print(
+            f"{statement:<40} {results[name]['median_seconds'] * 1000:>9.1f} ms  "
+            f"{', '.join(results[name]['loaded']) or '-'}",
+            file=sys.stderr,
+        )
+    return {"benchmark": "imports", "environment": environment(), "imports": results}
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="-", help="JSON file, '-' for stdout")
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const=str(BASELINES_DIR / "imports.json"),
+        help="Baseline JSON to compare against",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    results = run_benchmark(args.repeat)
+    write_results(results, args.output)
+
+    if args.compare:
+        baseline = load_results(args.compare)
+        directions = {f"imports.{name}.median_seconds": False for name in STATEMENTS}
+        regressions = compare_results(results, baseline, directions, args.tolerance)
+
+        for name, entry in results["imports"].items():
+            previous = baseline.get("imports", {}).get(name, {}).get("loaded")
+            added = sorted(set(entry["loaded"]) - set(previous or entry["loaded"]))
+            if added:
+                print(f"  {entry['statement']} now imports {', '.join(added)}")
+                regressions.append((f"imports.{name}.loaded", 0, len(added), 1.0))
+        return report_comparison(regressions, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Load test against a local fake Telegram Bot API server.
+
+Starts FakeTelegramServer and a FastBotBuilder-built bot pointed at it, drives
+updates through real long polling or webhook delivery and reports latency from
+update creation to the bot's reply, including 429 retries.
+
+    python -m fastbot.benchmarks.load_driver --mode polling --rate 500
+    python -m fastbot.benchmarks.load_driver --mode webhook --chat-rate-limit 1
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+from contextlib import suppress
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List
+
+import uvicorn
+from aiogram import Bot, F
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import CallbackQuery, Message
+from fastapi import Request
+
+from fastbot import FastBot, FastBotBuilder
+from fastbot.logger import Logger
+from fastbot.testing.fake_api_server import FakeTelegramServer, UpdateStream
+
+from fastbot.benchmarks.common import environment, percentiles, write_results
+
+BOT_TOKEN = "123456:LOAD-TEST-TOKEN-abcdefghijklmnopqrst"
+WEBHOOK_PATH = "/telegram/webhook"
+
+
+async def _with_retry(call: Callable[[], Awaitable[Any]], attempts: int = 20) -> Any:
+    for _ in range(attempts - 1):
+        try:
+            return await call()
+        except TelegramRetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+    return await call()
+
+
+async def reply(message: Message):
+    await _with_retry(lambda: message.answer(f"echo: {message.text}"))
+
+
+async def reply_callback(callback: CallbackQuery):
+    await _with_retry(lambda: callback.answer(callback.data))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _serve(app, port: int) -> Callable[[], Awaitable[None]]:
+    """Run a uvicorn server in the background and return its shutdown coroutine"""
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    async def shutdown() -> None:
+        server.should_exit = True
+        await task
+
+    return shutdown
+
+
+async def build_bot(api_url: str) -> FastBot:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_url))
+    builder = FastBotBuilder().set_bot(Bot(BOT_TOKEN, session=session))
+    await builder.add_handler(reply, F.text)
+    await builder.add_callback_query_handler(reply_callback)
+    return builder.build()
+
+
+async def run_polling(bot: FastBot, fake: FakeTelegramServer, args) -> None:
+    polling = asyncio.ensure_future(
+        bot.start_polling(handle_signals=False, polling_timeout=10)
+    )
+    try:
+        await fake.generate_at_rate(args.updates, args.rate)
+        await fake.wait_for_replies(args.timeout)
+    finally:
+        await bot.dp.stop_polling()
+        with suppress(asyncio.CancelledError):
+            await polling
+
+
+async def run_webhook(bot: FastBot, fake: FakeTelegramServer, args) -> None:
+    async def webhook(request: Request):
+        await bot.dp.feed_raw_update(bot.bot, await request.json())
+        return {"ok": True}
+
+    bot.app.add_api_route(WEBHOOK_PATH, webhook, methods=["POST"])
+    port = _free_port()
+    shutdown = await _serve(bot.app, port)
+    try:
+        await bot.bot.set_webhook(f"http://127.0.0.1:{port}{WEBHOOK_PATH}")
+        await fake.push_webhooks(args.updates, args.rate, args.concurrency)
+        await fake.wait_for_replies(args.timeout)
+    finally:
+        await shutdown()
+        await bot.bot.session.close()
+
+
+async def run_load(args) -> Dict[str, Any]:
+    fake = FakeTelegramServer(
+        UpdateStream(users=args.users, seed=args.seed),
+        latency=args.api_latency,
+        chat_rate_limit=args.chat_rate_limit,
+        global_rate_limit=args.global_rate_limit,
+    )
+    port = _free_port()
+    shutdown = await _serve(fake.app, port)
+
+    try:
+        bot = await build_bot(f"http://127.0.0.1:{port}")
+        started = perf_counter()
+        if args.mode == "polling":
+            await run_polling(bot, fake, args)
+        else:
+            await run_webhook(bot, fake, args)
+        elapsed = perf_counter() - started
+    finally:
+        fake.close()
+        await shutdown()
+
+    stats = fake.get_stats()
+    return {
+        "benchmark": "load",
+        "environment": environment(),
+        "mode": args.mode,
+        "target_rate": args.rate,
+        "elapsed_seconds": elapsed,
+        "replies_per_sec": stats["replies"] / elapsed if elapsed else 0.0,
+        "latency": percentiles(fake.reply_latencies),
+        **stats,
+    }
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=("polling", "webhook"), default="polling")
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=500.0, help="Updates per second")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--api-latency", type=float, default=0.0)
+    parser.add_argument("--chat-rate-limit", type=float, default=None)
+    parser.add_argument("--global-rate-limit", type=float, default=None)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="-", help="JSON file, '-' for stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    Logger.configure(level="WARNING")
+    results = asyncio.run(run_load(args))
+    write_results(results, args.output)
+    return 0 if not results["pending_replies"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
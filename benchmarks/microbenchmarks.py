@@ -0,0 +1,491 @@
+"""Microbenchmarks for the primitives on the dispatch hot path.
+
+Every case runs at several sizes so scaling behavior is visible. Run them with
+the plain runner, or through pytest-benchmark via test_microbenchmarks.py.
+
+    python -m fastbot.benchmarks.microbenchmarks --output micro.json
+    python -m fastbot.benchmarks.microbenchmarks --filter template --compare
+"""
+
+import argparse
+import asyncio
+import inspect
+import statistics
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from fastbot.builders import compile_keyboard
+from fastbot.core import Err, Ok, Result, result_try
+from fastbot.engine import ContextEngine, TemplateEngine
+from fastbot.engine.templates.filters import escape_html, escape_markdown, truncate
+from fastbot.engine.templates.splitter import split_message
+from fastbot.event import Event
+from fastbot.logger import Logger
+
+from fastbot.benchmarks.common import (
+    BASELINES_DIR,
+    compare_results,
+    environment,
+    load_results,
+    report_comparison,
+    write_results,
+)
+
+SIZES = (1, 10, 100)
+
+Operation = Callable[[], Union[Any, Awaitable[Any]]]
+Setup = Callable[[int], Union[Operation, Awaitable[Operation]]]
+
+
+@dataclass
+class MicroBenchmark:
+    name: str
+    setup: Setup
+    sizes: Tuple[int, ...] = SIZES
+
+    def cases(self) -> List[Tuple[str, int]]:
+        return [(f"{self.name}[{size}]", size) for size in self.sizes]
+
+
+BENCHMARKS: List[MicroBenchmark] = []
+
+
+def microbenchmark(name: str, sizes: Tuple[int, ...] = SIZES):
+    """Register a setup function that takes a size and returns the operation to time"""
+
+    def decorator(setup: Setup) -> Setup:
+        BENCHMARKS.append(MicroBenchmark(name, setup, sizes))
+        return setup
+
+    return decorator
+
+
+async def prepare(benchmark: MicroBenchmark, size: int) -> Operation:
+    operation = benchmark.setup(size)
+    if inspect.isawaitable(operation):
+        operation = await operation
+    return operation
+
+
+async def measure(
+    operation: Operation, min_time: float = 0.1, repeat: int = 5
+) -> Dict[str, float]:
+    """Time an operation the way timeit does: calibrate a loop count, keep the best"""
+    probe = operation()
+    is_async = inspect.isawaitable(probe)
+    if is_async:
+        await probe
+
+    async def run(loops: int) -> float:
+        started = perf_counter()
+        if is_async:
+            for _ in range(loops):
+                await operation()
+        else:
+            for _ in range(loops):
+                operation()
+        return perf_counter() - started
+
+    loops = 1
+    elapsed = await run(loops)
+    while elapsed < min_time / 10:
+        loops *= 10
+        elapsed = await run(loops)
+
+    loops = max(1, int(loops * min_time / elapsed))
+    timings = [await run(loops) / loops for _ in range(repeat)]
+    return {
+        "ns_per_op": min(timings) * 1e9,
+        "median_ns": statistics.median(timings) * 1e9,
+        "loops": loops,
+    }
+
+
+# Event
+
+
+def _event_handlers(size: int) -> List[Callable]:
+    handlers = []
+    for i in range(size):
+        if i % 2:
+
+            def handler(value, i=i):
+                return value + i
+
+        else:
+
+            async def handler(value, i=i):
+                return value + i
+
+        handlers.append(handler)
+    return handlers
+
+
+async def _event(size: int) -> Event:
+    event = Event("benchmark")
+    for i, handler in enumerate(_event_handlers(size)):
+        await event.add(handler, name=f"handler_{i}")
+    return event
+
+
+@microbenchmark("event_trigger")
+async def event_trigger(size: int) -> Operation:
+    event = await _event(size)
+    return lambda: event.trigger(1)
+
+
+@microbenchmark("event_trigger_parallel")
+async def event_trigger_parallel(size: int) -> Operation:
+    event = await _event(size)
+    return lambda: event.trigger_parallel(1)
+
+
+# Result
+
+
+@microbenchmark("result_create")
+def result_create(size: int) -> Operation:
+    values = list(range(size))
+    error = ValueError("benchmark")
+
+    def operation():
+        for value in values:
+            Ok(value)
+            Err(error)
+
+    return operation
+
+
+@microbenchmark("result_chain")
+def result_chain(size: int) -> Operation:
+    increment = lambda x: x + 1
+    wrap = lambda x: Ok(x * 2)
+
+    def operation():
+        result = Ok(0)
+        for _ in range(size):
+            result = result.map(increment).and_then(wrap)
+        return result.unwrap()
+
+    return operation
+
+
+@microbenchmark("result_sequence")
+def result_sequence(size: int) -> Operation:
+    results = [Ok(i) for i in range(size)]
+    return lambda: Result.sequence(results)
+
+
+@microbenchmark("result_try_sync")
+def result_try_sync(size: int) -> Operation:
+    @result_try
+    def add(a, b):
+        return a + b
+
+    def operation():
+        for i in range(size):
+            add(i, 1)
+
+    return operation
+
+
+@microbenchmark("result_try_async")
+def result_try_async(size: int) -> Operation:
+    @result_try
+    async def add(a, b):
+        return a + b
+
+    async def operation():
+        for i in range(size):
+            await add(i, 1)
+
+    return operation
+
+
+@microbenchmark("result_try_error")
+def result_try_error(size: int) -> Operation:
+    @result_try
+    def fail(value):
+        raise ValueError(value)
+
+    def operation():
+        for i in range(size):
+            fail(i)
+
+    return operation
+
+
+# ContextEngine
+
+
+def _context_template(params: int, prefix: str = "key") -> Callable:
+    names = [f"{prefix}_{i}" for i in range(params)]
+    namespace: Dict[str, Any] = {}
+    exec(
+        f"def template({', '.join(f'{n}=None' for n in names)}):\n"
+        f"    return {{{', '.join(f'{n!r}: {n}' for n in names)}}}\n",
+        namespace,
+    )
+    return namespace["template"]
+
+
+@microbenchmark("context_get")
+def context_get(size: int) -> Operation:
+    engine = ContextEngine()
+    engine.add("user", _context_template(size))
+    kwargs = {f"key_{i}": i for i in range(size)}
+    return lambda: engine.get("user", **kwargs)
+
+
+@microbenchmark("context_combine")
+def context_combine(size: int) -> Operation:
+    engine = ContextEngine()
+    names = []
+    for i in range(size):
+        engine.add(f"context_{i}", _context_template(5, prefix=f"c{i}"))
+        names.append(f"context_{i}")
+    return lambda: engine.combine(names)
+
+
+# TemplateEngine
+
+_TEMPLATES = {
+    "message.j2": (
+        "Hello, {{ user|bold }}!\n"
+        "{% for item in items %}{{ loop.index }}. {{ item.name|italic }}"
+        " - {{ item.price }}\n{% endfor %}"
+    ),
+    "fragment.j2": (
+        "Hello, {{ user|bold }}!\n"
+        '{% cache "items", 60 %}'
+        "{% for item in items %}{{ loop.index }}. {{ item.name|italic }}"
+        " - {{ item.price }}\n{% endfor %}{% endcache %}"
+    ),
+    "buttons.j2": (
+        "[{% for item in items %}"
+        '{"text": "{{ item.name }}", "callback_data": "item:{{ item.id }}"}'
+        "{% if not loop.last %},{% endif %}{% endfor %}]"
+    ),
+}
+
+_template_dir: Optional[tempfile.TemporaryDirectory] = None
+
+
+def _template_engine(**options) -> TemplateEngine:
+    global _template_dir
+    if _template_dir is None:
+        _template_dir = tempfile.TemporaryDirectory(prefix="fastbot-bench-")
+        for name, source in _TEMPLATES.items():
+            Path(_template_dir.name, name).write_text(source, encoding="utf-8")
+    return TemplateEngine(_template_dir.name, **options)
+
+
+def _items(size: int) -> List[Dict[str, Any]]:
+    return [{"id": i, "name": f"Item {i}", "price": i * 10} for i in range(size)]
+
+
+@microbenchmark("template_render")
+def template_render(size: int) -> Operation:
+    engine = _template_engine()
+    items = _items(size)
+    return lambda: engine.render_template("message.j2", user="Alice", items=items)
+
+
+@microbenchmark("template_render_async")
+def template_render_async(size: int) -> Operation:
+    """Like template_render, without the synchronous fast path"""
+    engine = _template_engine(sync_render=False)
+    items = _items(size)
+    return lambda: engine.render_template("message.j2", user="Alice", items=items)
+
+
+@microbenchmark("template_render_watched")
+def template_render_watched(size: int) -> Operation:
+    """Like template_render, with a file watcher instead of a stat per lookup"""
+    engine = _template_engine()
+    engine.start_watching(wait=True)
+    items = _items(size)
+    return lambda: engine.render_template("message.j2", user="Alice", items=items)
+
+
+@microbenchmark("template_render_cached")
+def template_render_cached(size: int) -> Operation:
+    """Like template_render, answered from the rendered-output cache"""
+    engine = _template_engine()
+    engine.cache_template("message.j2")
+    items = _items(size)
+    return lambda: engine.render_template("message.j2", user="Alice", items=items)
+
+
+@microbenchmark("template_render_fragment")
+def template_render_fragment(size: int) -> Operation:
+    """Like template_render, with the item list in a cached fragment"""
+    engine = _template_engine()
+    items = _items(size)
+    return lambda: engine.render_template("fragment.j2", user="Alice", items=items)
+
+
+@microbenchmark("template_render_loop")
+def template_render_loop(size: int) -> Operation:
+    """``size`` users rendered one render_template call at a time"""
+    engine = _template_engine()
+    items = _items(10)
+
+    async def operation():
+        for i in range(size):
+            await engine.render_template("message.j2", user=f"user{i}", items=items)
+
+    return operation
+
+
+@microbenchmark("template_render_many")
+def template_render_many(size: int) -> Operation:
+    """The same ``size`` users through render_many"""
+    engine = _template_engine()
+    items = _items(10)
+
+    async def operation():
+        contexts = ({"user": f"user{i}", "items": items} for i in range(size))
+        async for _ in engine.render_many("message.j2", contexts):
+            pass
+
+    return operation
+
+
+@microbenchmark("template_render_concurrent", sizes=(1, 10, 100))
+def template_render_concurrent(size: int) -> Operation:
+    """``size`` renders in flight at once, as under a burst of updates"""
+    engine = _template_engine()
+    items = _items(10)
+
+    async def operation():
+        await asyncio.gather(
+            *(
+                engine.render_template("message.j2", user="Alice", items=items)
+                for _ in range(size)
+            )
+        )
+
+    return operation
+
+
+@microbenchmark("template_load_buttons")
+def template_load_buttons(size: int) -> Operation:
+    engine = _template_engine()
+    items = _items(size)
+    return lambda: engine.load_buttons_from_template("buttons.j2", items=items)
+
+
+@microbenchmark("template_load_keyboard")
+def template_load_keyboard(size: int) -> Operation:
+    engine = _template_engine()
+    items = _items(size)
+    return lambda: engine.load_keyboard_from_template("buttons.j2", items=items)
+
+
+@microbenchmark("keyboard_program")
+def keyboard_program(size: int) -> Operation:
+    """The keyboard of buttons.j2 from a compiled keyboard definition"""
+    program = compile_keyboard(
+        {
+            "rows": [
+                {
+                    "foreach": "items",
+                    "button": {
+                        "text": "{item.name}",
+                        "callback_data": "item:{item.id}",
+                    },
+                }
+            ]
+        }
+    )
+    items = _items(size)
+    return lambda: program(items=items)
+
+
+def _text(size: int) -> str:
+    """``size`` sentences of user-supplied text with markup characters"""
+    return "Price: 1.5 * (a_b) - c! <Tom & Jerry> " * size
+
+
+@microbenchmark("filter_markdown_escape")
+def filter_markdown_escape(size: int) -> Operation:
+    text = _text(size)
+    return lambda: escape_markdown(text)
+
+
+@microbenchmark("filter_html_escape")
+def filter_html_escape(size: int) -> Operation:
+    text = _text(size)
+    return lambda: escape_html(text)
+
+
+@microbenchmark("filter_truncate")
+def filter_truncate(size: int) -> Operation:
+    """Truncating escaped HTML, the slow path that has to skip entities"""
+    text = escape_html(_text(size))
+    return lambda: truncate(text, len(text) // 2)
+
+
+@microbenchmark("split_message", sizes=(1, 10, 100))
+def split_message_html(size: int) -> Operation:
+    """A report of ``size`` messages worth of formatted HTML lines"""
+    line = "<b>Order</b> #123: <i>2 × item</i> &amp; <a href='https://x.y'>link</a>\n"
+    text = line * (4096 * size // len(line))
+    return lambda: list(split_message(text, "HTML"))
+
+
+async def run_benchmarks(
+    name_filter: str = "", min_time: float = 0.1, repeat: int = 5
+) -> Dict[str, Any]:
+    results = {}
+    for benchmark in BENCHMARKS:
+        if name_filter not in benchmark.name:
+            continue
+        for case, size in benchmark.cases():
+            operation = await prepare(benchmark, size)
+            results[case] = await measure(operation, min_time, repeat)
+            print(
+                f"{case:<32} {results[case]['ns_per_op']:>14,.0f} ns/op",
+                file=sys.stderr,
+            )
+    return {"benchmark": "micro", "environment": environment(), "results": results}
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--filter", default="", help="Only run matching benchmarks")
+    parser.add_argument("--min-time", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="-", help="JSON file, '-' for stdout")
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const=str(BASELINES_DIR / "micro.json"),
+        help="Baseline JSON to compare against",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    Logger.configure(level="CRITICAL")
+    results = asyncio.run(run_benchmarks(args.filter, args.min_time, args.repeat))
+    write_results(results, args.output)
+
+    if args.compare:
+        directions = {f"results.{case}.ns_per_op": False for case in results["results"]}
+        regressions = compare_results(
+            results, load_results(args.compare), directions, args.tolerance
+        )
+        return report_comparison(regressions, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Replay a recorded update trace against a bot with an in-memory Bot session.
+
+The bot factory is ``module:attribute`` returning a FastBot or FastBotBuilder,
+directly or as a coroutine. Bot API calls are answered by FakeSession, so the
+run measures the new release's own dispatch and handler latency.
+
+    python -m fastbot.benchmarks.replay traces/ --bot app.bot:builder --output new.json
+    python -m fastbot.benchmarks.replay traces/ --bot app.bot:builder --max-speed \\
+        --compare old.json
+"""
+
+import argparse
+import asyncio
+import importlib
+import inspect
+import sys
+from itertools import islice
+from typing import Any, Dict, List
+
+from fastbot import FastBot, FastBotBuilder
+from fastbot.logger import Logger
+from fastbot.recording import read_trace, replay_trace
+from fastbot.testing import FakeSession
+
+from fastbot.benchmarks.common import (
+    compare_results,
+    environment,
+    load_results,
+    percentiles,
+    report_comparison,
+    write_results,
+)
+
+
+async def load_bot(spec: str) -> FastBot:
+    module_name, _, attribute = spec.partition(":")
+    target = getattr(importlib.import_module(module_name), attribute or "bot")
+    if callable(target) and not isinstance(target, (FastBot, FastBotBuilder)):
+        target = target()
+    if inspect.isawaitable(target):
+        target = await target
+    if isinstance(target, FastBotBuilder):
+        target = target.build()
+
+    session = FakeSession(max_recorded=0)
+    session.middleware = target.bot.session.middleware
+    target.bot.session = session
+    return target
+
+
+async def run_replay(args) -> Dict[str, Any]:
+    records = list(islice(read_trace(args.trace), args.limit))
+    bot = await load_bot(args.bot)
+    speed = None if args.max_speed else args.speed
+    result = await replay_trace(bot, records, speed, args.concurrency)
+
+    return {
+        "benchmark": "replay",
+        "environment": environment(),
+        "trace": args.trace,
+        "speed": speed or "max",
+        "updates": result.updates,
+        "errors": result.errors,
+        "elapsed_seconds": result.elapsed,
+        "latency": percentiles(result.latencies),
+        "recorded_latency": percentiles(result.recorded_durations),
+        "handlers": result.handlers,
+    }
+
+
+def directions(results: Dict[str, Any]) -> Dict[str, bool]:
+    metrics = {"latency.p50": False, "latency.p99": False}
+    for handler in results["handlers"]:
+        metrics[f"handlers.{handler}.p50"] = False
+        metrics[f"handlers.{handler}.p99"] = False
+    return metrics
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("trace", help="Segment file or recording directory")
+    parser.add_argument("--bot", required=True, help="module:attribute bot factory")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--max-speed", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--output", default="-", help="JSON file, '-' for stdout")
+    parser.add_argument("--compare", help="Results of a previous replay")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    Logger.configure(level="WARNING")
+    results = asyncio.run(run_replay(args))
+    write_results(results, args.output)
+
+    if args.compare:
+        regressions = compare_results(
+            results, load_results(args.compare), directions(results), args.tolerance
+        )
+        return report_comparison(regressions, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""pytest-benchmark entry point for the microbenchmark suite.
+
+pytest fastbot/benchmarks/test_microbenchmarks.py --benchmark-group-by=group
+"""
+
+import asyncio
+import inspect
+
+import pytest
+
+from fastbot.benchmarks.microbenchmarks import BENCHMARKS, prepare
+
+pytest.importorskip("pytest_benchmark")
+
+CASES = [
+    pytest.param(benchmark, size, id=case)
+    for benchmark in BENCHMARKS
+    for case, size in benchmark.cases()
+]
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.parametrize("micro, size", CASES)
+def test_microbenchmark(benchmark, loop, micro, size):
+    benchmark.group = micro.name
+    operation = loop.run_until_complete(prepare(micro, size))
+
+    probe = operation()
+    if inspect.isawaitable(probe):
+        loop.run_until_complete(probe)
+        benchmark(lambda: loop.run_until_complete(operation()))
+    else:
+        benchmark(operation)
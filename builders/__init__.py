@@ -1,4 +1,17 @@
 from .inline_menu_builder import InlineMenuBuilder
+from .keyboard_program import (
+    KeyboardProgram,
+    KeyboardProgramError,
+    compile_keyboard,
+    load_keyboard,
+)
 from .reply_menu_builder import ReplyMenuBuilder
 
-__all__ = ["InlineMenuBuilder", "ReplyMenuBuilder"]
+__all__ = [
+    "InlineMenuBuilder",
+    "KeyboardProgram",
+    "KeyboardProgramError",
+    "ReplyMenuBuilder",
+    "compile_keyboard",
+    "load_keyboard",
+]
@@ -0,0 +1,386 @@
+import json
+import string
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+from aiogram.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    KeyboardButton,
+    ReplyKeyboardMarkup,
+)
+
+Markup = Union[InlineKeyboardMarkup, ReplyKeyboardMarkup]
+
+_KINDS = {
+    "inline": (InlineKeyboardButton, InlineKeyboardMarkup, "inline_keyboard"),
+    "reply": (KeyboardButton, ReplyKeyboardMarkup, "keyboard"),
+}
+_BUTTON_KEYS = {"visible"}
+_FOREACH_KEYS = {"foreach", "as", "columns", "button", "visible"}
+_FORMATTER = string.Formatter()
+
+
+class KeyboardProgramError(Exception):
+    pass
+
+
+class _Scope:
+    """Context values plus the current ``foreach`` item"""
+
+    __slots__ = ("context", "name", "value")
+
+    def __init__(self, context: Mapping[str, Any], name: str = None, value: Any = None):
+        self.context = context
+        self.name = name
+        self.value = value
+
+    def lookup(self, path: Tuple[str, ...]) -> Any:
+        head = path[0]
+        if head == self.name:
+            value = self.value
+        else:
+            try:
+                value = self.context[head]
+            except KeyError:
+                raise KeyboardProgramError(f"Missing keyboard slot: {head}") from None
+
+        for part in path[1:]:
+            if isinstance(value, dict):
+                value = value[part]
+            else:
+                try:
+                    value = getattr(value, part)
+                except AttributeError:
+                    value = value[part]
+        return value
+
+
+# A compiled value is either a constant or a function of the scope
+Slot = Callable[[_Scope], Any]
+
+
+def _compile_string(value: str, where: str) -> Union[str, Slot]:
+    try:
+        parts = list(_FORMATTER.parse(value))
+    except ValueError as e:
+        raise KeyboardProgramError(f"Bad placeholder in {where}: {e}") from e
+
+    pieces: List[Union[str, Tuple[Tuple[str, ...], str, Optional[str]]]] = []
+    for literal, name, spec, conversion in parts:
+        if literal:
+            pieces.append(literal)
+        if name is None:
+            continue
+        if not name or "[" in name or "{" in (spec or ""):
+            raise KeyboardProgramError(f"Unsupported placeholder {{{name}}} in {where}")
+        pieces.append((tuple(name.split(".")), spec or "", conversion))
+
+    if all(isinstance(piece, str) for piece in pieces):
+        return "".join(pieces)
+
+    if all(isinstance(piece, str) or piece[1:] == ("", None) for piece in pieces):
+        # Plain {slot} placeholders, the common case
+        paths = [piece if isinstance(piece, str) else piece[0] for piece in pieces]
+
+        def render_plain(scope: _Scope) -> str:
+            return "".join(
+                [p if isinstance(p, str) else str(scope.lookup(p)) for p in paths]
+            )
+
+        return render_plain
+
+    def render(scope: _Scope) -> str:
+        out = []
+        for piece in pieces:
+            if isinstance(piece, str):
+                out.append(piece)
+                continue
+            path, spec, conversion = piece
+            value = scope.lookup(path)
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "s" or (conversion is None and not spec):
+                value = str(value)
+            out.append(format(value, spec))
+        return "".join(out)
+
+    return render
+
+
+def _compile_value(value: Any, where: str) -> Union[Any, Slot]:
+    """Constant values stay as they are; anything with a placeholder becomes a slot"""
+    if isinstance(value, str):
+        return _compile_string(value, where)
+    if isinstance(value, Mapping):
+        items = {k: _compile_value(v, f"{where}.{k}") for k, v in value.items()}
+        if not any(callable(v) for v in items.values()):
+            return items
+        return lambda scope: {
+            k: v(scope) if callable(v) else v for k, v in items.items()
+        }
+    if isinstance(value, list):
+        values = [_compile_value(v, where) for v in value]
+        if not any(callable(v) for v in values):
+            return values
+        return lambda scope: [v(scope) if callable(v) else v for v in values]
+    return value
+
+
+def _compile_visible(expression: Any, where: str) -> Optional[Callable[[_Scope], bool]]:
+    """``"name"`` shows the button when the slot is truthy, ``"!name"`` when not"""
+    if expression is None:
+        return None
+    if not isinstance(expression, str) or not expression.lstrip("!"):
+        raise KeyboardProgramError(f"{where}.visible must be a slot name")
+    negate = expression.startswith("!")
+    path = tuple(expression.lstrip("!").split("."))
+    if negate:
+        return lambda scope: not scope.lookup(path)
+    return lambda scope: bool(scope.lookup(path))
+
+
+class _Button:
+    def __init__(self, spec: Mapping[str, Any], button_type: type, where: str):
+        if not isinstance(spec, Mapping) or "text" not in spec:
+            raise KeyboardProgramError(f"{where} must be a mapping with a text")
+        unknown = set(spec) - set(button_type.model_fields) - _BUTTON_KEYS
+        if unknown:
+            raise KeyboardProgramError(
+                f"{where} has unknown fields: {', '.join(sorted(unknown))}"
+            )
+
+        self.button_type = button_type
+        self.visible = _compile_visible(spec.get("visible"), where)
+        fields = {
+            name: _compile_value(value, f"{where}.{name}")
+            for name, value in spec.items()
+            if name not in _BUTTON_KEYS
+        }
+        self.constant = {k: v for k, v in fields.items() if not callable(v)}
+        self.slots = [(k, v) for k, v in fields.items() if callable(v)]
+        # Buttons without slots are built once and shared
+        self.prebuilt = None if self.slots else button_type(**self.constant)
+        # Slots that only fill in strings are copied into a validated
+        # prototype, which skips pydantic validation on every call
+        self.prototype = None
+        if self.slots and all(isinstance(spec[k], str) for k, _ in self.slots):
+            self.prototype = button_type(
+                **self.constant, **{k: "" for k, _ in self.slots}
+            )
+
+    @property
+    def is_static(self) -> bool:
+        return self.prebuilt is not None and self.visible is None
+
+    def __call__(self, scope: _Scope) -> Optional[Any]:
+        if self.visible is not None and not self.visible(scope):
+            return None
+        if self.prebuilt is not None:
+            return self.prebuilt
+        if self.prototype is not None:
+            return self.prototype.model_copy(
+                update={name: slot(scope) for name, slot in self.slots}
+            )
+        fields = dict(self.constant)
+        for name, slot in self.slots:
+            fields[name] = slot(scope)
+        return self.button_type(**fields)
+
+
+class _Row:
+    """Fixed buttons, all in one row or wrapped ``columns`` per row"""
+
+    def __init__(self, buttons: List[_Button], columns: Optional[int] = None):
+        self.buttons = buttons
+        self.columns = columns
+
+    @property
+    def is_static(self) -> bool:
+        return all(button.is_static for button in self.buttons)
+
+    def emit(self, scope: _Scope, rows: List[list]) -> None:
+        row = [b for b in (button(scope) for button in self.buttons) if b is not None]
+        if not self.columns:
+            if row:
+                rows.append(row)
+            return
+        for start in range(0, len(row), self.columns):
+            rows.append(row[start : start + self.columns])
+
+
+class _Foreach:
+    """Rows of one button per item of a sequence slot, ``columns`` per row"""
+
+    def __init__(self, spec: Mapping[str, Any], button_type: type, where: str):
+        unknown = set(spec) - _FOREACH_KEYS
+        if unknown:
+            raise KeyboardProgramError(
+                f"{where} has unknown fields: {', '.join(sorted(unknown))}"
+            )
+        self.path = tuple(str(spec["foreach"]).split("."))
+        self.name = spec.get("as", "item")
+        self.columns = int(spec.get("columns", 1))
+        if self.columns < 1:
+            raise KeyboardProgramError(f"{where}.columns must be positive")
+        self.visible = _compile_visible(spec.get("visible"), where)
+        self.button = _Button(spec.get("button"), button_type, f"{where}.button")
+
+    is_static = False
+
+    def emit(self, scope: _Scope, rows: List[list]) -> None:
+        if self.visible is not None and not self.visible(scope):
+            return
+        context = scope.context
+        row = []
+        for value in scope.lookup(self.path) or ():
+            button = self.button(_Scope(context, self.name, value))
+            if button is None:
+                continue
+            row.append(button)
+            if len(row) == self.columns:
+                rows.append(row)
+                row = []
+        if row:
+            rows.append(row)
+
+
+class KeyboardProgram:
+    """A keyboard definition compiled into button factories
+
+    Calling the program with the dynamic slots returns the markup directly.
+    Keyboards without slots are built once, so the returned markup may be
+    shared and must not be modified.
+    """
+
+    def __init__(self, definition: Mapping[str, Any], name: str = "keyboard"):
+        if not isinstance(definition, Mapping):
+            raise KeyboardProgramError(f"{name} must be a mapping")
+
+        self.name = name
+        self.kind = definition.get("type", "inline")
+        if self.kind not in _KINDS:
+            raise KeyboardProgramError(f"{name}.type must be 'inline' or 'reply'")
+        button_type, self.markup_type, self.rows_field = _KINDS[self.kind]
+
+        self._rows = self._compile_rows(definition, button_type)
+        options = {
+            key: value
+            for key, value in definition.items()
+            if key not in ("type", "rows", "buttons", "row_width")
+        }
+        unknown = set(options) - set(self.markup_type.model_fields)
+        if unknown or self.rows_field in options:
+            raise KeyboardProgramError(
+                f"{name} has unknown fields: {', '.join(sorted(unknown))}"
+            )
+        self._options = {
+            k: _compile_value(v, f"{name}.{k}") for k, v in options.items()
+        }
+
+        self._static: Optional[Markup] = None
+        if all(row.is_static for row in self._rows) and not any(
+            callable(v) for v in self._options.values()
+        ):
+            self._static = self(**{})
+
+    def _compile_rows(self, definition: Mapping[str, Any], button_type: type):
+        name = self.name
+        if "buttons" in definition:
+            row_width = int(definition.get("row_width", 1))
+            if row_width < 1:
+                raise KeyboardProgramError(f"{name}.row_width must be positive")
+            buttons = [
+                _Button(button, button_type, f"{name}.buttons[{i}]")
+                for i, button in enumerate(definition["buttons"])
+            ]
+            return [_Row(buttons, row_width)]
+
+        rows = []
+        for index, row in enumerate(definition.get("rows", ())):
+            where = f"{name}.rows[{index}]"
+            if isinstance(row, Mapping) and "foreach" in row:
+                rows.append(_Foreach(row, button_type, where))
+            elif isinstance(row, list):
+                rows.append(
+                    _Row(
+                        [
+                            _Button(button, button_type, f"{where}[{i}]")
+                            for i, button in enumerate(row)
+                        ]
+                    )
+                )
+            else:
+                raise KeyboardProgramError(f"{where} must be a list or a foreach")
+        return rows
+
+    @classmethod
+    def prebuilt(cls, markup: Markup, name: str = "keyboard") -> "KeyboardProgram":
+        """Static program returning ``markup`` built earlier, e.g. in a snapshot"""
+        kind = "reply" if isinstance(markup, ReplyKeyboardMarkup) else "inline"
+        program = cls({"type": kind}, name)
+        program._static = markup
+        return program
+
+    @property
+    def is_static(self) -> bool:
+        return self._static is not None
+
+    def __call__(self, **context) -> Markup:
+        if self._static is not None:
+            return self._static
+        scope = _Scope(context)
+        rows: List[list] = []
+        for row in self._rows:
+            row.emit(scope, rows)
+        options = {k: v(scope) if callable(v) else v for k, v in self._options.items()}
+        return self.markup_type(**{self.rows_field: rows}, **options)
+
+
+def copy_markup(markup: Markup) -> Markup:
+    """Copy of ``markup`` with new rows and buttons, for callers to modify"""
+    field = "keyboard" if isinstance(markup, ReplyKeyboardMarkup) else "inline_keyboard"
+    rows = [[button.model_copy() for button in row] for row in getattr(markup, field)]
+    return markup.model_copy(update={field: rows})
+
+
+def compile_keyboard(
+    definition: Mapping[str, Any], name: str = "keyboard"
+) -> KeyboardProgram:
+    """Compile a keyboard definition
+
+    A definition has a ``type`` (``inline`` or ``reply``), markup options
+    such as ``resize_keyboard``, and either ``rows`` or a flat ``buttons``
+    list laid out ``row_width`` per row. A row is a list of buttons, or
+    ``{"foreach": "items", "as": "item", "columns": 2, "button": {...}}``
+    for one button per item. Button fields are those of the aiogram button
+    types; strings may hold ``{slot}`` or ``{item.field}`` placeholders, and
+    ``visible: "slot"`` or ``"!slot"`` hides a button per call.
+    """
+    return KeyboardProgram(definition, name)
+
+
+def load_keyboard(path: Union[str, Path]) -> KeyboardProgram:
+    """Compile a keyboard definition from a ``.json``, ``.yaml`` or ``.yml`` file"""
+    path = Path(path)
+    return compile_keyboard(
+        parse_keyboard(path.read_text("utf-8"), path.name), path.name
+    )
+
+
+def parse_keyboard(source: str, name: str) -> Dict[str, Any]:
+    if name.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError as e:
+            raise KeyboardProgramError(
+                f"PyYAML is required for YAML keyboards: {name}"
+            ) from e
+        try:
+            return yaml.safe_load(source)
+        except yaml.YAMLError as e:
+            raise KeyboardProgramError(f"Invalid YAML in {name}: {e}") from e
+    try:
+        return json.loads(source)
+    except json.JSONDecodeError as e:
+        raise KeyboardProgramError(f"Invalid JSON in {name}: {e}") from e
@@ -0,0 +1,33 @@
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+Exports = Dict[str, Tuple[str, str]]
+
+
+def lazy_exports(
+    package: str, exports: Exports
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Module ``__getattr__`` and ``__dir__`` that import each export on first access
+
+    ``exports`` maps a public name to ``(module, attribute)``, where ``module``
+    may be relative to ``package``.
+    """
+    namespace = sys.modules[package].__dict__
+
+    def __getattr__(name: str) -> Any:
+        try:
+            module_name, attribute = exports[name]
+        except KeyError:
+            raise AttributeError(
+                f"module '{package}' has no attribute '{name}'"
+            ) from None
+
+        value = getattr(importlib.import_module(module_name, package), attribute)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
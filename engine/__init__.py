@@ -1,5 +1,18 @@
+from typing import TYPE_CHECKING
+
+from fastbot.core.lazy import lazy_exports
+
 from .context import ContextEngine
-from .templates import TemplateEngine
-from .templates import WebTemplateEngine
 
-__all__ = ["ContextEngine", "TemplateEngine","WebTemplateEngine"]
+if TYPE_CHECKING:
+    from .templates import TemplateEngine, WebTemplateEngine
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "TemplateEngine": (".templates", "TemplateEngine"),
+        "WebTemplateEngine": (".templates", "WebTemplateEngine"),
+    },
+)
+
+__all__ = ["ContextEngine", "TemplateEngine", "WebTemplateEngine"]
@@ -1,6 +1,8 @@
 from typing import Dict, Callable, Any
 import inspect
 
+from fastbot.tracing.tracing import start_span
+
 
 class ContextEngine:
     def __init__(self):
@@ -21,9 +23,10 @@ class ContextEngine:
         bound_args = sig.bind_partial(**kwargs)
         bound_args.apply_defaults()
 
-        if inspect.iscoroutinefunction(template):
-            return await template(**bound_args.arguments)
-        return template(**bound_args.arguments)
+        with start_span("context", context=name):
+            if inspect.iscoroutinefunction(template):
+                return await template(**bound_args.arguments)
+            return template(**bound_args.arguments)
 
     async def combine(
         self,
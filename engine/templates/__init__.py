@@ -1,7 +1,33 @@
-from .template_engine import TemplateEngine
-from .web_template_engine import WebTemplateEngine
+from typing import TYPE_CHECKING
+
+from fastbot.core.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .fragment_cache import FragmentCacheExtension
+    from .render_cache import CachePolicy, RenderCache
+    from .splitter import split_message
+    from .template_engine import TemplateEngine, WarmupReport
+    from .web_template_engine import WebTemplateEngine
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "CachePolicy": (".render_cache", "CachePolicy"),
+        "FragmentCacheExtension": (".fragment_cache", "FragmentCacheExtension"),
+        "RenderCache": (".render_cache", "RenderCache"),
+        "TemplateEngine": (".template_engine", "TemplateEngine"),
+        "WarmupReport": (".template_engine", "WarmupReport"),
+        "WebTemplateEngine": (".web_template_engine", "WebTemplateEngine"),
+        "split_message": (".splitter", "split_message"),
+    },
+)
 
 __all__ = [
+    "CachePolicy",
+    "FragmentCacheExtension",
+    "RenderCache",
     "TemplateEngine",
-    "WebTemplateEngine"
-    ]
+    "WarmupReport",
+    "WebTemplateEngine",
+    "split_message",
+]
@@ -0,0 +1,72 @@
+import re
+from typing import Any, Optional
+
+# Telegram requires these to be escaped anywhere in MarkdownV2 text
+MARKDOWN_V2_SPECIAL = "\\_*[]()~`>#+-=|{}.!"
+
+# Replacement pairs applied in order, each as one str.replace pass; for
+# multi-character replacements that beats str.translate several times over.
+# The escape character itself always comes first.
+_MARKDOWN_PAIRS = tuple((c, "\\" + c) for c in MARKDOWN_V2_SPECIAL)
+# Inside `code` and ```pre``` entities only these two are special
+_MARKDOWN_CODE_PAIRS = (("\\", "\\\\"), ("`", "\\`"))
+_HTML_PAIRS = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"))
+
+# One visible character: an HTML entity, a backslash escape or anything else
+_VISIBLE_CHAR = re.compile(
+    r"&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);|\\.|.", re.DOTALL
+)
+
+
+def _replace(text: str, pairs) -> str:
+    for char, replacement in pairs:
+        if char in text:
+            text = text.replace(char, replacement)
+    return text
+
+
+def escape_markdown(value: Any) -> str:
+    """Escape text for ``parse_mode="MarkdownV2"``"""
+    return _replace(str(value), _MARKDOWN_PAIRS)
+
+
+def escape_markdown_code(value: Any) -> str:
+    """Escape text inside a MarkdownV2 code or pre entity"""
+    return _replace(str(value), _MARKDOWN_CODE_PAIRS)
+
+
+def escape_html(value: Any) -> str:
+    """Escape text for ``parse_mode="HTML"``"""
+    return _replace(str(value), _HTML_PAIRS)
+
+
+def telegram_escape(value: Any, parse_mode: str = "MarkdownV2") -> str:
+    """Escape text for the given parse mode"""
+    if parse_mode.upper() == "HTML":
+        return escape_html(value)
+    return escape_markdown(value)
+
+
+def truncate(
+    value: Any, length: int = 100, end: str = "...", parse_mode: Optional[str] = None
+) -> str:
+    """Shorten text to ``length`` visible characters
+
+    HTML entities and backslash escapes count as one character and are
+    never cut in half. With a ``parse_mode``, ``end`` is escaped for it, so
+    escaped text stays valid for Telegram.
+    """
+    value = str(value)
+    if len(value) <= length:
+        return value
+    if parse_mode:
+        end = telegram_escape(end, parse_mode)
+    if "&" not in value and "\\" not in value:
+        return value[:length] + end
+
+    count = 0
+    for match in _VISIBLE_CHAR.finditer(value):
+        if count == length:
+            return value[: match.start()] + end
+        count += 1
+    return value
@@ -0,0 +1,84 @@
+import inspect
+import json
+from typing import Any, Callable, Optional, Tuple
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from fastbot.engine.templates.render_cache import RenderCache
+from fastbot.metrics.metrics import CACHE_REQUESTS
+
+_FRAGMENT_CACHE_HITS = CACHE_REQUESTS.labels("fragment", "hit")
+_FRAGMENT_CACHE_MISSES = CACHE_REQUESTS.labels("fragment", "miss")
+
+
+def _fragment_key(template_name: Optional[str], key: Any) -> Tuple[str, str]:
+    if not isinstance(key, str):
+        key = json.dumps(key, sort_keys=True, default=str)
+    return (template_name or "<string>", key)
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache key, ttl %}...{% endcache %}`` caches a section's output
+
+    Entries are stored in ``environment.fragment_cache`` under the template
+    name and ``key``; ``ttl`` is optional. The default store is an in-process
+    LRU. A shared store needs ``get(key)`` and ``set(key, value, ttl)``,
+    which may be coroutines when templates render asynchronously, and
+    optionally a synchronous ``invalidate(template_names)``, called when
+    templates are reloaded.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=RenderCache(max_size=1024, ttl=300.0))
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [nodes.Const(parser.name), parser.parse_expression()]
+        if parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        method = "_cache_async" if self.environment.is_async else "_cache"
+        return nodes.CallBlock(self.call_method(method, args), [], [], body).set_lineno(
+            lineno
+        )
+
+    def _cache(
+        self, template_name: str, key: Any, ttl: Optional[float], caller: Callable
+    ) -> str:
+        store = self.environment.fragment_cache
+        key = _fragment_key(template_name, key)
+        value = store.get(key)
+        if value is not None:
+            _FRAGMENT_CACHE_HITS.inc()
+            return value
+
+        _FRAGMENT_CACHE_MISSES.inc()
+        value = str(caller())
+        store.set(key, value, ttl)
+        return value
+
+    async def _cache_async(
+        self, template_name: str, key: Any, ttl: Optional[float], caller: Callable
+    ) -> str:
+        store = self.environment.fragment_cache
+        key = _fragment_key(template_name, key)
+        value = store.get(key)
+        if inspect.isawaitable(value):
+            value = await value
+        if value is not None:
+            _FRAGMENT_CACHE_HITS.inc()
+            return value
+
+        _FRAGMENT_CACHE_MISSES.inc()
+        value = str(await caller())
+        stored = store.set(key, value, ttl)
+        if inspect.isawaitable(stored):
+            await stored
+        return value
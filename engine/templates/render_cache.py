@@ -0,0 +1,217 @@
+import dataclasses
+import hashlib
+import inspect
+import json
+from collections import OrderedDict
+from contextlib import suppress
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from time import monotonic
+from typing import Any, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from jinja2 import Environment, meta, nodes
+
+# Globals whose result changes between renders with the same context
+IMPURE_GLOBALS = ("now", "lipsum")
+
+
+@dataclasses.dataclass(frozen=True)
+class CachePolicy:
+    """How one template's output is cached
+
+    ``keys`` are the context keys that decide the output; ``None`` means the
+    whole context. ``ttl`` overrides the cache-wide expiry.
+    """
+
+    keys: Optional[Tuple[str, ...]] = None
+    ttl: Optional[float] = None
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _encode(value: Any) -> Any:
+    """JSON form of the values ``json`` can't encode itself, tagged by type"""
+    if isinstance(value, (set, frozenset)):
+        items = sorted(json.dumps(v, sort_keys=True, default=_encode) for v in value)
+        return {"__set__": items}
+    if isinstance(value, Enum):
+        return {"__enum__": [type(value).__qualname__, value.value]}
+    if isinstance(value, (datetime, date, time)):
+        return {"__time__": [type(value).__name__, value.isoformat()]}
+    if isinstance(value, (bytes, Decimal)):
+        return {"__scalar__": [type(value).__name__, str(value)]}
+    if hasattr(value, "model_dump"):
+        return {"__model__": [type(value).__qualname__, value.model_dump()]}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {"__dataclass__": [type(value).__qualname__, dataclasses.asdict(value)]}
+    raise _Uncacheable(type(value).__name__)
+
+
+def context_digest(
+    context: Mapping[str, Any], keys: Optional[Iterable[str]] = None
+) -> Optional[str]:
+    """Stable hash of the selected context values, or None if one can't be hashed
+
+    Values are compared by their JSON encoding, so lists and tuples, or ``1``
+    and ``"1"`` as mapping keys, hash the same.
+    """
+    if keys is not None:
+        context = {key: context[key] for key in keys if key in context}
+    try:
+        encoded = json.dumps(
+            context, sort_keys=True, separators=(",", ":"), default=_encode
+        )
+    except (_Uncacheable, TypeError, ValueError):
+        return None
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+def uses_globals(
+    env: Environment, template_name: str, names: Iterable[str], seen: Set[str] = None
+) -> bool:
+    """Whether a template, or one it extends, includes or imports, reads ``names``
+
+    Dynamic template references cannot be followed and count as impure.
+    """
+    names = set(names)
+    seen = seen if seen is not None else set()
+    seen.add(template_name)
+
+    source, _, _ = env.loader.get_source(env, template_name)
+    ast = env.parse(source)
+    for node in ast.find_all(nodes.Name):
+        if node.ctx == "load" and node.name in names:
+            return True
+
+    for reference in meta.find_referenced_templates(ast):
+        if reference is None:
+            return True
+        if reference not in seen and uses_globals(env, reference, names, seen):
+            return True
+    return False
+
+
+def is_static(
+    env: Environment, template_name: str, impure: Iterable[str], seen: Set[str] = None
+) -> bool:
+    """Whether a template renders the same whatever its context
+
+    True when neither it nor a template it references reads a context
+    variable or one of the ``impure`` globals.
+    """
+    seen = seen if seen is not None else set()
+    seen.add(template_name)
+
+    source, _, _ = env.loader.get_source(env, template_name)
+    ast = env.parse(source)
+    variables = meta.find_undeclared_variables(ast)
+    if variables - env.globals.keys() or variables & set(impure):
+        return False
+
+    for reference in meta.find_referenced_templates(ast):
+        if reference is None:
+            return False
+        if reference not in seen and not is_static(env, reference, impure, seen):
+            return False
+    return True
+
+
+def _is_async_callable(function: Any) -> bool:
+    return inspect.iscoroutinefunction(function) or inspect.iscoroutinefunction(
+        getattr(function, "__call__", None)
+    )
+
+
+def needs_async(env: Environment, template_name: str, seen: Set[str] = None) -> bool:
+    """Whether rendering a template may have to await something
+
+    Calls are only known to be synchronous when they go to a synchronous
+    global by name; anything else, like methods of context objects, macros
+    or extension tags, counts as possibly async, as do async filters and
+    tests and dynamic template references.
+    """
+    seen = seen if seen is not None else set()
+    seen.add(template_name)
+
+    source, _, _ = env.loader.get_source(env, template_name)
+    ast = env.parse(source)
+    for node in ast.find_all((nodes.Call, nodes.Filter, nodes.Test)):
+        if isinstance(node, nodes.Call):
+            target = node.node
+            if not isinstance(target, nodes.Name) or target.name not in env.globals:
+                return True
+            function = env.globals[target.name]
+        else:
+            functions = env.filters if isinstance(node, nodes.Filter) else env.tests
+            function = functions.get(node.name)
+        if function is None or _is_async_callable(function):
+            return True
+
+    for reference in meta.find_referenced_templates(ast):
+        if reference is None:
+            return True
+        if reference not in seen and needs_async(env, reference, seen):
+            return True
+    return False
+
+
+class RenderCache:
+    """LRU cache of rendered template output with per-entry expiry
+
+    Keys are tuples that start with the template name. Only templates with a
+    policy are cached, unless ``cache_all`` gives every template the default
+    policy.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: Optional[float] = 300.0,
+        cache_all: bool = False,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.policies: Dict[str, CachePolicy] = {}
+        self._default = CachePolicy() if cache_all else None
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def policy_for(self, template_name: str) -> Optional[CachePolicy]:
+        return self.policies.get(template_name, self._default)
+
+    def get(self, key: Tuple) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires and expires < monotonic():
+            self._entries.pop(key, None)
+            return None
+        with suppress(KeyError):
+            self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Tuple, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = (monotonic() + ttl if ttl else 0.0, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, template_names: Optional[Iterable[str]] = None) -> int:
+        """Drop entries of the given templates, or every entry; returns the count"""
+        if template_names is None:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+
+        names = set(template_names)
+        stale = [key for key in self._entries if key[0] in names]
+        for key in stale:
+            self._entries.pop(key, None)
+        return len(stale)
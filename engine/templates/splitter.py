@@ -0,0 +1,259 @@
+import re
+from typing import Iterator, List, Optional, Tuple
+
+# Telegram limits, in UTF-16 code units
+MESSAGE_LIMIT = 4096
+CAPTION_LIMIT = 1024
+
+_HTML_TAG = re.compile(r"(<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>)")
+_MARKDOWN_MARKUP = r"\\.|!?\[(?:\\.|[^\]\\])*\]\((?:\\.|[^)\\])*\)|```|`|__|\|\||[*_~]"
+_MARKDOWN_MARKERS = {"*", "_", "__", "~", "||"}
+_LANGUAGE = re.compile(r"[\w+#-]*")
+
+# Break priorities, best first
+_PARAGRAPH, _LINE, _SPACE = 2, 1, 0
+
+# An open entity: what reopens it in the next chunk and what closes it
+Entity = Tuple[str, str]
+
+
+def _units(text: str) -> int:
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _fit(text: str, budget: int) -> int:
+    """Number of leading characters of ``text`` within ``budget`` units"""
+    if text.isascii() or _units(text) == len(text):
+        return min(budget, len(text))
+    used = 0
+    for index, char in enumerate(text):
+        used += 2 if char > "\uffff" else 1
+        if used > budget:
+            return index
+    return len(text)
+
+
+# Each dialect splits a line into text runs and markup with ``token``,
+# updates open entities for one markup token with ``feed`` and for a whole
+# line at once with ``scan``, which returns ``stack`` itself if unchanged.
+class _Plain:
+    token = re.compile(r"\n|[^\n]+")
+
+    @staticmethod
+    def is_text(token: str) -> bool:
+        return True
+
+    @staticmethod
+    def feed(stack: List[Entity], token: str, text: str, end: int) -> bool:
+        return False
+
+    @staticmethod
+    def scan(stack: List[Entity], text: str, start: int, end: int) -> List[Entity]:
+        return stack
+
+
+class _Html:
+    token = re.compile(r"<[^>]*>|&[^;\s<&]*;|\n|[^<&\n]+|[<&]")
+
+    @staticmethod
+    def is_text(token: str) -> bool:
+        return token[0] not in "<&" or len(token) == 1
+
+    @staticmethod
+    def feed(stack: List[Entity], token: str, text: str, end: int) -> bool:
+        match = _HTML_TAG.fullmatch(token)
+        return match is not None and _html_tag(stack, *match.groups())
+
+    @staticmethod
+    def scan(stack: List[Entity], text: str, start: int, end: int) -> List[Entity]:
+        tags = _HTML_TAG.findall(text, start, end)
+        if not tags:
+            return stack
+        after = list(stack)
+        for tag in tags:
+            _html_tag(after, *tag)
+        return stack if after == stack else after
+
+
+def _html_tag(stack: List[Entity], token: str, closing: str, name: str) -> bool:
+    if token.endswith("/>"):
+        return False
+    closer = f"</{name.lower()}>"
+    if not closing:
+        stack.append((token, closer))
+        return True
+    for index in range(len(stack) - 1, -1, -1):
+        if stack[index][1] == closer:
+            del stack[index]
+            break
+    return True
+
+
+class _Markdown:
+    token = re.compile(_MARKDOWN_MARKUP + r"|\n|[^\\`_|*~\[!\n]+|.", re.DOTALL)
+    markup = re.compile(_MARKDOWN_MARKUP, re.DOTALL)
+
+    @staticmethod
+    def is_text(token: str) -> bool:
+        return token[0] not in "\\`_|*~[!" or len(token) == 1 and token in "|[!"
+
+    @staticmethod
+    def feed(stack: List[Entity], token: str, text: str, end: int) -> bool:
+        top = stack[-1][1] if stack else None
+        if top == "```" or top == "`":
+            # Inside code only the closing marker is special
+            if token == top:
+                stack.pop()
+                return True
+            return False
+
+        if token == "```":
+            language = _LANGUAGE.match(text, end).group()
+            stack.append((f"```{language}\n", "```"))
+            return True
+        if token == "`":
+            stack.append(("`", "`"))
+            return True
+        if token in _MARKDOWN_MARKERS:
+            for index in range(len(stack) - 1, -1, -1):
+                if stack[index][1] == token:
+                    del stack[index]
+                    return True
+            stack.append((token, token))
+            return True
+        return False
+
+    @classmethod
+    def scan(cls, stack: List[Entity], text: str, start: int, end: int):
+        after = None
+        for match in cls.markup.finditer(text, start, end):
+            if after is None:
+                after = list(stack)
+            cls.feed(after, match.group(), text, match.end())
+        return stack if after is None or after == stack else after
+
+
+def _dialect(parse_mode: Optional[str]):
+    mode = str(getattr(parse_mode, "value", parse_mode) or "").lower()
+    if mode == "html":
+        return _Html
+    if mode == "markdownv2":
+        return _Markdown
+    return _Plain
+
+
+def split_message(
+    text: str, parse_mode: Optional[str] = None, limit: int = MESSAGE_LIMIT
+) -> Iterator[str]:
+    """Split ``text`` into messages of at most ``limit`` UTF-16 code units
+
+    Chunks end on a paragraph break if that keeps at least half of the
+    chunk, then on a line break or a space, and only then mid-word. For
+    ``HTML`` and ``MarkdownV2`` tags, entities, escapes and links are never
+    cut; formatting still open at a break is closed at the end of the chunk
+    and reopened at the start of the next one. Chunks are produced lazily,
+    so they can be sent while the rest is still being split.
+    """
+    if _units(text) <= limit:
+        yield text
+        return
+
+    dialect = _dialect(parse_mode)
+    stack: List[Entity] = []
+    start = 0
+    while start < len(text):
+        chunk, start, stack = _next_chunk(dialect, text, start, stack, limit)
+        if chunk:
+            yield chunk
+
+
+def _closing(stack: List[Entity]) -> int:
+    return sum(len(closing) for _, closing in stack)
+
+
+def _next_chunk(dialect, text: str, start: int, stack: List[Entity], limit: int):
+    reopen = "".join(opening for opening, _ in stack)
+    size = _units(reopen)
+    closing = _closing(stack)
+    # (priority, position, entities open there)
+    breaks: List[Tuple[int, int, List[Entity]]] = []
+
+    position = start
+    while position < len(text):
+        end = text.find("\n", position) + 1 or len(text)
+        after = dialect.scan(stack, text, position, end)
+        after_closing = closing if after is stack else _closing(after)
+        units = _units(text[position:end])
+        if size + units + max(closing, after_closing) > limit:
+            cut = _break_in_line(
+                dialect, text, start, position, end, stack, breaks, limit - size
+            )
+            if cut is not None:
+                return _emit(reopen, text, start, *cut)
+        priority = _PARAGRAPH if end - position == 1 else _LINE
+        breaks.append((priority, end, after))
+        stack, closing = after, after_closing
+        size += units
+        position = end
+
+    return reopen + text[start:], len(text), []
+
+
+def _break_in_line(dialect, text, start, position, end, stack, breaks, budget):
+    """Find where to cut a chunk whose last line does not fit in ``budget``"""
+    closing = _closing(stack)
+    for match in dialect.token.finditer(text, position, end):
+        token = match.group()
+        units = _units(token)
+        is_text = dialect.is_text(token)
+        after = stack
+        if not is_text:
+            after = list(stack)
+            if not dialect.feed(after, token, text, match.end()):
+                after = stack
+        after_closing = closing if after is stack else _closing(after)
+
+        if units + max(closing, after_closing) > budget:
+            room = budget - closing
+            if is_text and token != "\n" and room > 0:
+                # A space or, failing anything better, a hard cut in this run
+                fit = _fit(token, room)
+                space = token.rfind(" ", 0, fit)
+                if space > 0:
+                    breaks.append((_SPACE, position + space + 1, stack))
+                elif not breaks and fit > 0:
+                    breaks.append((_SPACE, position + fit, stack))
+            if breaks or position > start:
+                return _best_break(breaks, start, position, stack)
+            # A single tag or link longer than the limit goes out as it is
+
+        if is_text and token != "\n":
+            space = token.rfind(" ")
+            if space >= 0:
+                breaks.append((_SPACE, position + space + 1, stack))
+        stack, closing = after, after_closing
+        budget -= units
+        position = match.end()
+    return None
+
+
+def _best_break(breaks, start: int, position: int, stack: List[Entity]):
+    half = start + (position - start) // 2
+    for priority in (_PARAGRAPH, _LINE, _SPACE):
+        for found, cut, cut_stack in reversed(breaks):
+            if found == priority and cut >= half:
+                return cut, cut_stack
+    if breaks:
+        return breaks[-1][1:]
+    return position, stack
+
+
+def _emit(reopen: str, text: str, start: int, cut: int, stack: List[Entity]):
+    body = text[start:cut].rstrip("\n")
+    closing = "".join(closing for _, closing in reversed(stack))
+    while cut < len(text) and text[cut] == "\n":
+        cut += 1
+    chunk = reopen + body + closing if body.strip() else ""
+    return chunk, cut, stack
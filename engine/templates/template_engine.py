@@ -1,12 +1,33 @@
-from asyncio import Lock
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+import hashlib
 from pathlib import Path
-from typing import Any, Optional, Union, Dict, List
+from contextlib import suppress
+from copy import deepcopy
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    Dict,
+    List,
+)
 import json
-import re
+import os
 from datetime import datetime
+from time import perf_counter
 
 from jinja2 import (
     Environment,
+    FileSystemBytecodeCache,
     FileSystemLoader,
     select_autoescape,
     Template,
@@ -35,7 +56,50 @@ from aiogram.utils.markdown import (
 )
 from aiogram.enums import ParseMode
 
+from fastbot.builders.keyboard_program import (
+    KeyboardProgram,
+    compile_keyboard,
+    copy_markup,
+    parse_keyboard,
+)
+from fastbot.engine.templates.filters import (
+    escape_html,
+    escape_markdown,
+    escape_markdown_code,
+    telegram_escape,
+    truncate,
+)
+from fastbot.engine.templates.render_cache import (
+    IMPURE_GLOBALS,
+    CachePolicy,
+    RenderCache,
+    context_digest,
+    is_static,
+    needs_async,
+    uses_globals,
+)
+from fastbot.engine.templates.splitter import MESSAGE_LIMIT, split_message
+from fastbot.engine.templates.watcher import TemplateGraph, TemplateWatcher
 from fastbot.logger import Logger
+from fastbot.metrics.metrics import (
+    CACHE_REQUESTS,
+    TEMPLATE_RENDER_DURATION,
+    TEMPLATE_RENDER_ERRORS,
+)
+from fastbot.tracing.tracing import start_span
+
+# Buttons templates with these suffixes are keyboard definitions, not Jinja
+KEYBOARD_SUFFIXES = (".kb.json", ".kb.yaml", ".kb.yml")
+
+_TEMPLATE_CACHE_HITS = CACHE_REQUESTS.labels("template", "hit")
+_TEMPLATE_CACHE_MISSES = CACHE_REQUESTS.labels("template", "miss")
+_RENDER_CACHE_HITS = CACHE_REQUESTS.labels("render", "hit")
+_RENDER_CACHE_MISSES = CACHE_REQUESTS.labels("render", "miss")
+_RENDER_CACHE_BYPASSES = CACHE_REQUESTS.labels("render", "bypass")
+_BUTTON_CACHE_HITS = CACHE_REQUESTS.labels("buttons", "hit")
+_BUTTON_CACHE_MISSES = CACHE_REQUESTS.labels("buttons", "miss")
+_KEYBOARD_CACHE_HITS = CACHE_REQUESTS.labels("keyboard", "hit")
+_KEYBOARD_CACHE_MISSES = CACHE_REQUESTS.labels("keyboard", "miss")
 
 
 class TemplateEngineError(Exception):
@@ -58,6 +122,101 @@ class TemplateContextError(TemplateEngineError):
     pass
 
 
+@dataclass
+class WarmupReport:
+    compiled: Dict[str, float] = field(default_factory=dict)
+    failed: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def slowest(self, count: int = 5) -> List[tuple]:
+        return sorted(self.compiled.items(), key=lambda item: -item[1])[:count]
+
+
+async def _chunked(
+    items: Union[Iterable[Any], AsyncIterable[Any]], size: int
+) -> AsyncIterator[List[Any]]:
+    chunk: List[Any] = []
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    else:
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _buffered(pieces: Iterable[str], size: int) -> Iterator[str]:
+    """Join template output into chunks of at least ``size`` characters"""
+    buffer, buffered = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield "".join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+async def _buffered_async(pieces: AsyncIterable[str], size: int) -> AsyncIterator[str]:
+    buffer, buffered = [], 0
+    async for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield "".join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _has_async_values(context: Dict[str, Any]) -> bool:
+    """Whether the context holds async iterables, which only async loops accept"""
+    for value in context.values():
+        if hasattr(value, "__aiter__"):
+            return True
+    return False
+
+
+_worker_engine: Optional["TemplateEngine"] = None
+
+
+def _copy_buttons(buttons: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy of cached buttons, nested values included, for callers to modify"""
+    return [
+        {
+            key: deepcopy(value) if isinstance(value, (dict, list)) else value
+            for key, value in button.items()
+        }
+        for button in buttons
+    ]
+
+
+def _init_render_worker(options: Dict[str, Any]) -> None:
+    global _worker_engine
+    _worker_engine = TemplateEngine(**options)
+
+
+def _render_in_worker(
+    template_name: str, contexts: List[Dict[str, Any]]
+) -> Tuple[List[str], List[float]]:
+    """Rendered texts and the duration of each render"""
+    template = _worker_engine.env.get_template(template_name)
+    texts, durations = [], []
+    for context in contexts:
+        started = perf_counter()
+        texts.append(template.render(**context))
+        durations.append(perf_counter() - started)
+    return texts, durations
+
+
 class TemplateEngine:
     def __init__(
         self,
@@ -66,11 +225,25 @@ class TemplateEngine:
         auto_reload: bool = True,
         cache_size: int = 400,
         enable_async: bool = True,
+        bytecode_cache_dir: Optional[str] = None,
+        watch: bool = False,
+        watch_interval: float = 1.0,
+        button_cache_size: int = 256,
+        fragment_cache: Optional[Any] = None,
+        sync_render: bool = True,
         **env_options,
     ):
         if isinstance(template_dirs, str):
             template_dirs = [template_dirs]
 
+        # Render worker processes build their own synchronous engine
+        self._worker_options = {
+            "template_dirs": [str(d) for d in template_dirs],
+            "extensions": list(extensions) if extensions else extensions,
+            "cache_size": cache_size,
+            "enable_async": False,
+            "bytecode_cache_dir": bytecode_cache_dir,
+        }
         self.template_dirs = [Path(d) for d in template_dirs]
         self.loader = FileSystemLoader(self.template_dirs)
 
@@ -79,26 +252,257 @@ class TemplateEngine:
             "jinja2.ext.do",
             "jinja2.ext.loopcontrols",
             "jinja2.ext.debug",
+            "fastbot.engine.templates.fragment_cache.FragmentCacheExtension",
         ]
 
         if extensions:
             default_extensions.extend(extensions)
 
+        self._env_options = dict(env_options)
+        if bytecode_cache_dir and "bytecode_cache" not in env_options:
+            env_options["bytecode_cache"] = self._bytecode_cache(
+                bytecode_cache_dir, enable_async, default_extensions, env_options
+            )
+
         self.env = Environment(
             loader=self.loader,
             autoescape=select_autoescape(),
             extensions=default_extensions,
-            auto_reload=auto_reload,
+            # A watcher replaces Jinja's stat call on every lookup
+            auto_reload=auto_reload and not watch,
             cache_size=cache_size,
             enable_async=enable_async,
             **env_options,
         )
 
+        if fragment_cache is not None:
+            self.env.fragment_cache = fragment_cache
+
         self._register_custom_filters()
         self._register_custom_functions()
 
+        # Templates that never await render through a synchronous overlay
+        # sharing the loader, filters and globals. Async and sync bytecode
+        # differ, so the overlay only gets a cache keyed for sync code.
+        self._sync_env: Optional[Environment] = None
+        self._sync_templates: Dict[str, Tuple[Template, Optional[Template]]] = {}
+        if enable_async and sync_render:
+            sync_bytecode_cache = None
+            if bytecode_cache_dir and "bytecode_cache" not in self._env_options:
+                sync_bytecode_cache = self._bytecode_cache(
+                    bytecode_cache_dir, False, default_extensions, self._env_options
+                )
+            self._sync_env = self.env.overlay(
+                enable_async=False, bytecode_cache=sync_bytecode_cache
+            )
+
         self._template_cache: Dict[str, Template] = {}
-        self._cache_lock = Lock()
+        self._compiling: Dict[str, "asyncio.Task[Template]"] = {}
+        self._graph = TemplateGraph(self.env)
+        self._watcher: Optional[TemplateWatcher] = None
+        # Loop that owns the caches; watcher callbacks are handed over to it
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._render_cache: Optional[RenderCache] = None
+        self._impure: Dict[str, bool] = {}
+        self._rendered_from: Dict[str, Template] = {}
+        # Parsed button lists and keyboards, keyed by template and context hash
+        self._button_cache = RenderCache(button_cache_size, ttl=None)
+        self._keyboard_cache = RenderCache(button_cache_size, ttl=None)
+        self._static_buttons: Set[str] = set()
+        self._uses_context: Dict[str, bool] = {}
+        self._keyboards: Dict[str, Tuple[KeyboardProgram, Any]] = {}
+        # Static keyboards from prebuild_buttons: row width, buttons, markup
+        self._prebuilt: Dict[str, Tuple[int, Optional[list], Any]] = {}
+        self.impure_globals: Set[str] = set(IMPURE_GLOBALS)
+
+        if watch:
+            self.start_watching(watch_interval)
+
+    @staticmethod
+    def _bytecode_cache(
+        directory: str,
+        enable_async: bool,
+        extensions: List[str],
+        env_options: Dict[str, Any],
+    ) -> FileSystemBytecodeCache:
+        """On-disk bytecode cache that several workers can share
+
+        Jinja writes cache files atomically, and the file names carry a hash of
+        the options that change generated code, so engines configured
+        differently never load each other's bytecode.
+        """
+        options = repr((enable_async, sorted(extensions), sorted(env_options.items())))
+        token = hashlib.sha1(options.encode()).hexdigest()[:12]
+        os.makedirs(directory, exist_ok=True)
+        return FileSystemBytecodeCache(directory, f"fastbot-{token}-%s.cache")
+
+    def start_watching(
+        self, interval: float = 1.0, use_inotify: bool = True, wait: bool = False
+    ) -> TemplateWatcher:
+        """Reload changed templates from a background watcher
+
+        Lookups then skip Jinja's per-render ``stat`` call. Only templates that
+        changed and the ones extending, including or importing them are
+        dropped from the caches, on the event loop running when watching
+        starts or, failing that, the one of the first render.
+        """
+        with suppress(RuntimeError):
+            self._loop = asyncio.get_running_loop()
+        if self._watcher is None:
+            self.env.auto_reload = False
+            if self._sync_env is not None:
+                self._sync_env.auto_reload = False
+            self._watcher = TemplateWatcher(
+                self.template_dirs,
+                self._templates_changed,
+                interval,
+                use_inotify,
+                on_start=self._graph.build,
+            )
+        self._watcher.start(wait)
+        return self._watcher
+
+    def _templates_changed(self, names: Set[str]) -> None:
+        """Watcher thread callback; the caches are only changed on the loop"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            # Nothing has rendered on a loop yet, so nothing can race
+            self.invalidate(names)
+        else:
+            loop.call_soon_threadsafe(self.invalidate, names)
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+
+    def enable_render_cache(
+        self,
+        max_size: int = 1024,
+        ttl: Optional[float] = 300.0,
+        cache_all: bool = False,
+        impure_globals: Optional[Iterable[str]] = None,
+    ) -> RenderCache:
+        """Reuse rendered text for repeated renders with the same context
+
+        Only templates registered with ``cache_template`` are cached unless
+        ``cache_all`` is set. Templates that read one of ``impure_globals``
+        (``now`` and ``lipsum`` by default), directly or through templates they
+        extend, include or import, are always rendered.
+        """
+        self._render_cache = RenderCache(max_size, ttl, cache_all)
+        if impure_globals is not None:
+            self.impure_globals = set(impure_globals)
+            self._impure.clear()
+        return self._render_cache
+
+    def cache_template(
+        self,
+        template_name: str,
+        keys: Optional[Iterable[str]] = None,
+        ttl: Optional[float] = None,
+    ) -> CachePolicy:
+        """Cache a template's output keyed by the ``keys`` context values
+
+        Without ``keys`` the whole context is part of the cache key.
+        """
+        if self._render_cache is None:
+            self.enable_render_cache()
+        policy = CachePolicy(tuple(keys) if keys is not None else None, ttl)
+        self._render_cache.policies[template_name] = policy
+        self._render_cache.invalidate([template_name])
+        return policy
+
+    def invalidate_rendered(
+        self, template_names: Optional[Iterable[str]] = None
+    ) -> int:
+        """Drop cached output, fragments, buttons and keyboards of templates, or all"""
+        if template_names is not None:
+            template_names = set(template_names)
+            for name in template_names:
+                self._impure.pop(name, None)
+                self._uses_context.pop(name, None)
+                self._static_buttons.discard(name)
+                self._prebuilt.pop(name, None)
+        else:
+            self._impure.clear()
+            self._uses_context.clear()
+            self._static_buttons.clear()
+            self._prebuilt.clear()
+
+        count = 0
+        invalidate_fragments = getattr(self.env.fragment_cache, "invalidate", None)
+        if invalidate_fragments is not None:
+            count += invalidate_fragments(template_names) or 0
+        caches = [self._button_cache, self._keyboard_cache, self._render_cache]
+        return count + sum(
+            cache.invalidate(template_names) for cache in caches if cache is not None
+        )
+
+    def invalidate(self, names: Iterable[str]) -> Set[str]:
+        """Drop templates and their dependents so the next render reloads them"""
+        names = set(names)
+        affected = self._graph.affected(names)
+        for name in names:
+            self._graph.update(name)
+
+        for name in affected:
+            self._template_cache.pop(name, None)
+            # A compilation already running may have read the old source
+            self._compiling.pop(name, None)
+            self._sync_templates.pop(name, None)
+            self._keyboards.pop(name, None)
+        for env in (self.env, self._sync_env):
+            if env is None or env.cache is None:
+                continue
+            for key in list(env.cache.keys()):
+                if key[1] in affected:
+                    with suppress(KeyError):
+                        del env.cache[key]
+        self.invalidate_rendered(affected)
+
+        Logger.info(f"Templates reloaded: {', '.join(sorted(affected))}")
+        return affected
+
+    async def warmup(
+        self, concurrency: int = 4, extensions: Optional[Iterable[str]] = None
+    ) -> WarmupReport:
+        """Compile every template under ``template_dirs`` before the first render
+
+        Templates are compiled in worker threads, ``concurrency`` at a time,
+        and stored in the template cache. Failures are reported, not raised.
+        """
+        report = WarmupReport()
+        started = perf_counter()
+        names = await asyncio.to_thread(self.env.list_templates, extensions)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        def compile_template(name: str):
+            compile_started = perf_counter()
+            template = self.env.get_template(name)
+            return template, perf_counter() - compile_started
+
+        async def warm(name: str) -> None:
+            async with semaphore:
+                try:
+                    template, seconds = await asyncio.to_thread(compile_template, name)
+                except Exception as e:
+                    report.failed[name] = str(e)
+                    return
+            self._template_cache[name] = template
+            report.compiled[name] = seconds
+
+        await asyncio.gather(*(warm(name) for name in names))
+        report.elapsed = perf_counter() - started
+
+        Logger.info(
+            f"Templates warmed up in {report.elapsed:.3f}s: "
+            f"{len(report.compiled)} compiled, {len(report.failed)} failed"
+        )
+        for name, seconds in report.slowest():
+            Logger.debug(f"Template {name} compiled in {seconds * 1000:.1f} ms")
+        for name, error in report.failed.items():
+            Logger.warning(f"Template {name} failed to compile: {error}")
+        return report
 
     def _register_custom_filters(self):
         """Регистрация пользовательских фильтров"""
@@ -115,6 +519,8 @@ class TemplateEngine:
                 "format_date": self._format_date,
                 "truncate": self._truncate,
                 "markdown_escape": self._markdown_escape,
+                "markdown_code_escape": escape_markdown_code,
+                "html_escape": escape_html,
                 "telegram_escape": self._telegram_escape,
                 "plural": self._plural_form,
             }
@@ -151,8 +557,16 @@ class TemplateEngine:
         buttons_template: Optional[str] = None,
         buttons_context: Optional[dict] = None,
         row_width: int = 2,
+        split: bool = True,
+        limit: int = MESSAGE_LIMIT,
         **kwargs,
     ) -> Any:
+        """Render a template and send it as an answer to ``message``
+
+        With ``split``, text over ``limit`` UTF-16 units is sent as several
+        messages in order, with the keyboard on the last one. The result is
+        the last message sent.
+        """
         context = context or {}
         buttons_context = buttons_context or {}
 
@@ -161,18 +575,38 @@ class TemplateEngine:
         )
 
         if buttons_template:
-            buttons = await self.load_buttons_from_template(
-                buttons_template, **buttons_context
-            )
-            response["reply_markup"] = await self.generate_inline_keyboard(
-                buttons, row_width=row_width
+            response["reply_markup"] = await self.load_keyboard_from_template(
+                buttons_template, row_width=row_width, **buttons_context
             )
 
         if reply_markup:
             response["reply_markup"] = reply_markup
 
+        # Nothing shorter than half the limit can exceed it in UTF-16
+        if split and len(response["text"]) > limit // 2:
+            return await self._answer_in_parts(message, response, limit)
         return await message.answer(**response)
 
+    @staticmethod
+    async def _answer_in_parts(
+        message: Message, response: Dict[str, Any], limit: int
+    ) -> Any:
+        response = dict(response)
+        reply_markup = response.pop("reply_markup", None)
+        parse_mode = response.get("parse_mode")
+        if parse_mode is None:
+            default = getattr(getattr(message, "bot", None), "default", None)
+            parse_mode = getattr(default, "parse_mode", None)
+
+        parts = split_message(response.pop("text"), parse_mode, limit)
+        part = next(parts)
+        for following in parts:
+            await message.answer(text=part, **response)
+            part = following
+        if reply_markup is not None:
+            response["reply_markup"] = reply_markup
+        return await message.answer(text=part, **response)
+
     async def render(
         self,
         template_name: str,
@@ -188,11 +622,8 @@ class TemplateEngine:
         response = await self.render_template(template_name, **context)
 
         if buttons_template:
-            buttons = await self.load_buttons_from_template(
-                buttons_template, **buttons_context
-            )
-            response["reply_markup"] = await self.generate_inline_keyboard(
-                buttons, row_width=row_width
+            response["reply_markup"] = await self.load_keyboard_from_template(
+                buttons_template, row_width=row_width, **buttons_context
             )
 
         return response
@@ -204,9 +635,33 @@ class TemplateEngine:
         disable_web_page_preview: Optional[bool] = None,
         **context,
     ) -> Union[str, Dict[str, Any]]:
+        started = perf_counter()
+        try:
+            with start_span("template", template=template_name):
+                return await self._render_template(
+                    template_name, parse_mode, disable_web_page_preview, context
+                )
+        except Exception:
+            TEMPLATE_RENDER_ERRORS.labels(template_name).inc()
+            raise
+        finally:
+            TEMPLATE_RENDER_DURATION.labels(template_name).observe(
+                perf_counter() - started
+            )
+
+    async def _render_template(
+        self,
+        template_name: str,
+        parse_mode: Optional[str],
+        disable_web_page_preview: Optional[bool],
+        context: Dict[str, Any],
+    ) -> Dict[str, Any]:
         try:
             template = await self._get_template(template_name)
-            rendered = await template.render_async(**context)
+            if self._render_cache is None:
+                rendered = await self._render(template_name, template, context)
+            else:
+                rendered = await self._render_cached(template_name, template, context)
 
             result = {"text": rendered}
             if parse_mode:
@@ -215,20 +670,113 @@ class TemplateEngine:
                 result["disable_web_page_preview"] = disable_web_page_preview
 
             return result
-        except TemplateNotFound as e:
-            raise TemplateNotFoundError(f"Template not found: {template_name}") from e
-        except TemplateSyntaxError as e:
-            raise TemplateSyntaxError(
-                f"Syntax error in template {template_name}: {e}"
-            ) from e
-        except (TemplateRuntimeError, UndefinedError) as e:
-            raise TemplateRenderError(
-                f"Error rendering template {template_name}: {e}"
-            ) from e
         except Exception as e:
-            raise TemplateEngineError(
-                f"Unexpected error in template {template_name}: {e}"
-            ) from e
+            raise self._render_error(template_name, e) from e
+
+    @staticmethod
+    def _render_error(template_name: str, e: Exception) -> TemplateEngineError:
+        if isinstance(e, TemplateNotFound):
+            return TemplateNotFoundError(f"Template not found: {template_name}")
+        if isinstance(e, TemplateSyntaxError):
+            return TemplateSyntaxError(f"Syntax error in template {template_name}: {e}")
+        if isinstance(e, (TemplateRuntimeError, UndefinedError)):
+            return TemplateRenderError(f"Error rendering template {template_name}: {e}")
+        return TemplateEngineError(f"Unexpected error in template {template_name}: {e}")
+
+    async def render_many(
+        self,
+        template_name: str,
+        contexts: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        parse_mode: Optional[str] = None,
+        disable_web_page_preview: Optional[bool] = None,
+        chunk_size: int = 100,
+        processes: int = 0,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Render one template for many contexts, yielding results in order
+
+        Contexts are read ``chunk_size`` at a time, so only a few chunks are
+        held in memory and other tasks run between chunks. With
+        ``processes`` chunks are rendered in a process pool; workers build
+        their own engine from the constructor arguments, so contexts must be
+        picklable and filters or globals added after construction are not
+        available there.
+        """
+        extra: Dict[str, Any] = {}
+        if parse_mode:
+            extra["parse_mode"] = parse_mode
+        if disable_web_page_preview is not None:
+            extra["disable_web_page_preview"] = disable_web_page_preview
+
+        if processes:
+            chunks = self._render_chunks_in_pool(
+                template_name, contexts, chunk_size, processes
+            )
+        else:
+            chunks = self._render_chunks(template_name, contexts, chunk_size)
+
+        try:
+            async for texts in chunks:
+                for text in texts:
+                    yield {"text": text, **extra}
+        except TemplateEngineError:
+            raise
+        except Exception as e:
+            TEMPLATE_RENDER_ERRORS.labels(template_name).inc()
+            raise self._render_error(template_name, e) from e
+        finally:
+            await chunks.aclose()
+
+    async def _render_chunks(
+        self,
+        template_name: str,
+        contexts: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        chunk_size: int,
+    ) -> AsyncIterator[List[str]]:
+        template = await self._get_template(template_name)
+        duration = TEMPLATE_RENDER_DURATION.labels(template_name)
+        async for chunk in _chunked(contexts, chunk_size):
+            texts = []
+            for context in chunk:
+                started = perf_counter()
+                texts.append(await self._render(template_name, template, context))
+                duration.observe(perf_counter() - started)
+            yield texts
+            await asyncio.sleep(0)
+
+    async def _render_chunks_in_pool(
+        self,
+        template_name: str,
+        contexts: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        chunk_size: int,
+        processes: int,
+    ) -> AsyncIterator[List[str]]:
+        loop = asyncio.get_running_loop()
+        pool = ProcessPoolExecutor(
+            processes,
+            initializer=_init_render_worker,
+            initargs=(self._worker_options,),
+        )
+        duration = TEMPLATE_RENDER_DURATION.labels(template_name)
+        pending: deque = deque()
+
+        async def done() -> List[str]:
+            texts, durations = await pending.popleft()
+            for seconds in durations:
+                duration.observe(seconds)
+            return texts
+
+        try:
+            async for chunk in _chunked(contexts, chunk_size):
+                pending.append(
+                    loop.run_in_executor(pool, _render_in_worker, template_name, chunk)
+                )
+                # Two chunks per worker keep them busy without reading ahead
+                if len(pending) >= processes * 2:
+                    yield await done()
+            while pending:
+                yield await done()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
 
     async def answer(self, message: Message, response) -> Any:
         return await message.answer(**response)
@@ -283,7 +831,7 @@ class TemplateEngine:
     ) -> str:
         try:
             template = await self._get_template(template_name)
-            rendered = await template.render_async(**(context or {}))
+            rendered = await self._render(template_name, template, context or {})
             return rendered
         except TemplateNotFound as e:
             raise TemplateNotFoundError(
@@ -302,6 +850,37 @@ class TemplateEngine:
                 f"Unexpected error in HTML template {template_name}: {e}"
             ) from e
 
+    async def stream_html_template(
+        self,
+        template_name: str,
+        context: Optional[dict] = None,
+        buffer_size: int = 8192,
+    ) -> AsyncIterator[str]:
+        """Render an HTML template as it is generated
+
+        Jinja's output is gathered into chunks of about ``buffer_size``
+        characters, so only one chunk of the page is held at a time.
+        """
+        try:
+            context = context or {}
+            template = await self._get_template(template_name)
+            if self.env.is_async and self._sync_env is not None:
+                sync_template = await self._sync_template(template_name, template)
+                if sync_template is not None and not _has_async_values(context):
+                    template = sync_template
+            if template.environment.is_async:
+                pieces = template.generate_async(**context)
+                try:
+                    async for chunk in _buffered_async(pieces, buffer_size):
+                        yield chunk
+                finally:
+                    await pieces.aclose()
+            else:
+                for chunk in _buffered(template.generate(**context), buffer_size):
+                    yield chunk
+        except Exception as e:
+            raise self._render_error(template_name, e) from e
+
     async def generate_inline_keyboard(
         self, buttons: List[Dict[str, Any]], row_width: int = 3, **kwargs
     ) -> InlineKeyboardMarkup:
@@ -381,9 +960,154 @@ class TemplateEngine:
     async def load_buttons_from_template(
         self, template_name: str, **context
     ) -> List[Dict[str, Any]]:
+        """Render a buttons template into a list of button dicts
+
+        Parsed lists are cached by template and context hash, and templates
+        that use no context variables are parsed once.
+        """
+        template = await self._get_template(template_name)
+        key = await self._buttons_key(template_name, template, context)
+        buttons = self._button_cache.get(key) if key is not None else None
+        if buttons is not None:
+            _BUTTON_CACHE_HITS.inc()
+        else:
+            _BUTTON_CACHE_MISSES.inc()
+            buttons = await self._parse_buttons(template_name, template, context)
+            if key is not None:
+                self._button_cache.set(self._static_key(template_name, key), buttons)
+        return _copy_buttons(buttons)
+
+    async def load_keyboard_from_template(
+        self, template_name: str, row_width: int = 2, **context
+    ) -> InlineKeyboardMarkup:
+        """Inline keyboard built from a buttons template
+
+        Keyboards are cached like the button lists; each call returns a copy
+        whose rows and buttons can be changed. Keyboard definitions (see
+        ``KEYBOARD_SUFFIXES``) go to ``render_keyboard``.
+        """
+        if template_name.endswith(KEYBOARD_SUFFIXES):
+            return await self.render_keyboard(template_name, **context)
+
+        template = await self._get_template(template_name)
+        key = await self._buttons_key(template_name, template, context)
+        if key is not None:
+            markup = self._keyboard_cache.get(key + (row_width,))
+            if markup is not None:
+                _KEYBOARD_CACHE_HITS.inc()
+                return copy_markup(markup)
+
+        _KEYBOARD_CACHE_MISSES.inc()
+        buttons = await self.load_buttons_from_template(template_name, **context)
+        markup = await self.generate_inline_keyboard(buttons, row_width=row_width)
+        if key is not None:
+            key = self._static_key(template_name, key)
+            self._keyboard_cache.set(key + (row_width,), markup)
+            return copy_markup(markup)
+        return markup
+
+    async def render_keyboard(self, name: str, **context) -> Any:
+        """Markup from a compiled keyboard definition in the template directories
+
+        The definition is loaded and compiled once; calls only fill in its
+        slots. See ``compile_keyboard`` for the format.
+        """
+        entry = self._keyboards.get(name)
+        if entry is None or (self.env.auto_reload and entry[1] and not entry[1]()):
+            entry = await asyncio.to_thread(self._load_keyboard, name)
+            self._keyboards[name] = entry
+        return entry[0](**context)
+
+    def _load_keyboard(self, name: str) -> Tuple[KeyboardProgram, Any]:
         try:
-            template = await self._get_template(template_name)
-            rendered = await template.render_async(**context)
+            source, _, uptodate = self.loader.get_source(self.env, name)
+        except TemplateNotFound as e:
+            raise TemplateNotFoundError(f"Keyboard not found: {name}") from e
+        return compile_keyboard(parse_keyboard(source, name), name), uptodate
+
+    async def prebuild_buttons(
+        self,
+        template_names: Iterable[str],
+        row_width: int = 2,
+        prebuilt: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, InlineKeyboardMarkup]:
+        """Build the keyboards of buttons templates that need no context
+
+        Meant for startup, so static keyboards are never built on a reply.
+        Keyboard definitions are compiled whether or not they have slots;
+        Jinja templates that use context variables are skipped. Keyboards in
+        ``prebuilt``, as returned by ``prebuilt_keyboards`` for the same
+        templates, are restored instead of built.
+        """
+        prebuilt = prebuilt or {}
+        keyboards = {}
+        for name in template_names:
+            entry = prebuilt.get(name)
+            try:
+                if entry is not None and entry[0] == row_width:
+                    markup = await self._restore_keyboard(name, *entry)
+                elif name.endswith(KEYBOARD_SUFFIXES):
+                    program, uptodate = await asyncio.to_thread(
+                        self._load_keyboard, name
+                    )
+                    self._keyboards[name] = (program, uptodate)
+                    markup = program() if program.is_static else None
+                else:
+                    markup = await self.load_keyboard_from_template(name, row_width)
+            except Exception as e:
+                Logger.warning(f"Buttons template {name} failed to build: {e}")
+                continue
+            if markup is not None and (
+                name in self._static_buttons or name.endswith(KEYBOARD_SUFFIXES)
+            ):
+                keyboards[name] = markup
+                buttons = self._button_cache.get((name, ""))
+                self._prebuilt[name] = (row_width, buttons, markup)
+            else:
+                Logger.debug(f"Buttons template {name} depends on its context")
+        Logger.info(f"Static keyboards built: {len(keyboards)}")
+        return keyboards
+
+    def prebuilt_keyboards(self) -> Dict[str, Any]:
+        """Static keyboards built so far, for ``prebuild_buttons`` in a later run"""
+        return dict(self._prebuilt)
+
+    async def _restore_keyboard(
+        self, name: str, row_width: int, buttons: Optional[list], markup: Any
+    ) -> Any:
+        if name.endswith(KEYBOARD_SUFFIXES):
+            _, _, uptodate = await asyncio.to_thread(
+                self.loader.get_source, self.env, name
+            )
+            self._keyboards[name] = (KeyboardProgram.prebuilt(markup, name), uptodate)
+            return copy_markup(markup)
+
+        template = await self._get_template(name)
+        self._forget_if_reloaded(name, template)
+        self._static_buttons.add(name)
+        self._button_cache.set((name, ""), buttons)
+        self._keyboard_cache.set((name, "", row_width), markup)
+        return copy_markup(markup)
+
+    async def _buttons_key(
+        self, template_name: str, template: Template, context: Dict[str, Any]
+    ) -> Optional[tuple]:
+        self._forget_if_reloaded(template_name, template)
+        if template_name in self._static_buttons:
+            return (template_name, "")
+        if await self._is_impure(template_name):
+            return None
+        digest = context_digest(context)
+        return None if digest is None else (template_name, digest)
+
+    def _static_key(self, template_name: str, key: tuple) -> tuple:
+        return (template_name, "") if template_name in self._static_buttons else key
+
+    async def _parse_buttons(
+        self, template_name: str, template: Template, context: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        try:
+            rendered = await self._render(template_name, template, context)
 
             rendered_clean = rendered.strip()
             for key, value in context.items():
@@ -399,6 +1123,10 @@ class TemplateEngine:
             if not isinstance(buttons, list):
                 raise ValueError("Buttons template must return a list")
 
+            if "{{" not in rendered_clean and not await self._reads_context(
+                template_name
+            ):
+                self._static_buttons.add(template_name)
             return buttons
 
         except json.JSONDecodeError as e:
@@ -411,14 +1139,124 @@ class TemplateEngine:
             Logger.error(f"Failed to load buttons: {e}")
             raise
 
+    async def _render_cached(
+        self, template_name: str, template: Template, context: Dict[str, Any]
+    ) -> str:
+        cache = self._render_cache
+        policy = cache.policy_for(template_name)
+        if policy is None:
+            return await self._render(template_name, template, context)
+
+        self._forget_if_reloaded(template_name, template)
+        digest = context_digest(context, policy.keys)
+        if digest is None or await self._is_impure(template_name):
+            _RENDER_CACHE_BYPASSES.inc()
+            return await self._render(template_name, template, context)
+
+        key = (template_name, digest)
+        rendered = cache.get(key)
+        if rendered is not None:
+            _RENDER_CACHE_HITS.inc()
+            return rendered
+
+        _RENDER_CACHE_MISSES.inc()
+        rendered = await self._render(template_name, template, context)
+        cache.set(key, rendered, policy.ttl)
+        return rendered
+
+    async def _render(
+        self, template_name: str, template: Template, context: Dict[str, Any]
+    ) -> str:
+        if not self.env.is_async:
+            return template.render(**context)
+        if self._sync_env is not None:
+            sync_template = await self._sync_template(template_name, template)
+            if sync_template is not None and not _has_async_values(context):
+                return sync_template.render(**context)
+        return await template.render_async(**context)
+
+    async def _sync_template(
+        self, template_name: str, template: Template
+    ) -> Optional[Template]:
+        """Synchronous twin of ``template``, or None when it may need to await
+
+        The entry follows the async template, so reloads are picked up.
+        """
+        entry = self._sync_templates.get(template_name)
+        if entry is None or entry[0] is not template:
+            sync_template = await asyncio.to_thread(
+                self._load_sync_template, template_name
+            )
+            entry = (template, sync_template)
+            self._sync_templates[template_name] = entry
+        return entry[1]
+
+    def _load_sync_template(self, template_name: str) -> Optional[Template]:
+        if needs_async(self.env, template_name):
+            return None
+        return self._sync_env.get_template(template_name)
+
+    def _forget_if_reloaded(self, template_name: str, template: Template) -> None:
+        if self._rendered_from.get(template_name) is not template:
+            # New, or reloaded by auto_reload since its output was cached
+            self._rendered_from[template_name] = template
+            self.invalidate_rendered([template_name])
+
+    async def _reads_context(self, template_name: str) -> bool:
+        uses_context = self._uses_context.get(template_name)
+        if uses_context is None:
+            uses_context = not await asyncio.to_thread(
+                is_static, self.env, template_name, self.impure_globals
+            )
+            self._uses_context[template_name] = uses_context
+        return uses_context
+
+    async def _is_impure(self, template_name: str) -> bool:
+        impure = self._impure.get(template_name)
+        if impure is None:
+            impure = await asyncio.to_thread(
+                uses_globals, self.env, template_name, self.impure_globals
+            )
+            self._impure[template_name] = impure
+        return impure
+
     async def _get_template(self, template_name: str) -> Template:
-        async with self._cache_lock:
-            if template_name in self._template_cache:
-                return self._template_cache[template_name]
+        """Cached template lookup without a lock on the hot path
+
+        A cached template is reused unless ``auto_reload`` is on and its source
+        changed. Concurrent misses for the same name share one compilation.
+        """
+        template = self._template_cache.get(template_name)
+        if template is not None and (
+            not self.env.auto_reload or template.is_up_to_date
+        ):
+            _TEMPLATE_CACHE_HITS.inc()
+            return template
 
-            template = self.env.get_template(template_name)
+        task = self._compiling.get(template_name)
+        if task is None:
+            _TEMPLATE_CACHE_MISSES.inc()
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.get_running_loop()
+            task = asyncio.ensure_future(self._load_template(template_name))
+            task.add_done_callback(partial(self._template_loaded, template_name))
+            self._compiling[template_name] = task
+        return await asyncio.shield(task)
+
+    async def _load_template(self, template_name: str) -> Template:
+        template = await asyncio.to_thread(self.env.get_template, template_name)
+        if self._compiling.get(template_name) is asyncio.current_task():
+            # Not invalidated while compiling
             self._template_cache[template_name] = template
-            return template
+            self._forget_if_reloaded(template_name, template)
+        return template
+
+    def _template_loaded(self, template_name: str, task: "asyncio.Task") -> None:
+        if self._compiling.get(template_name) is task:
+            del self._compiling[template_name]
+        if not task.cancelled():
+            # Mark the error as retrieved when every waiter was cancelled
+            task.exception()
 
     @staticmethod
     def _format_date(value, format_str="%Y-%m-%d %H:%M:%S"):
@@ -430,21 +1268,9 @@ class TemplateEngine:
                 return value
         return value.strftime(format_str) if value else ""
 
-    @staticmethod
-    def _truncate(value, length=100, end="..."):
-        if not isinstance(value, str):
-            value = str(value)
-        return value[:length] + (end if len(value) > length else "")
-
-    @staticmethod
-    def _markdown_escape(text: str) -> str:
-        escape_chars = r"_*[]()~`>#+-=|{}.!"
-        return re.sub(f"([{re.escape(escape_chars)}])", r"\\\1", text)
-
-    @staticmethod
-    def _telegram_escape(text: str) -> str:
-        escape_chars = r"_*[]()~`>#+-=|{}.!"
-        return re.sub(f"([{re.escape(escape_chars)}])", r"\\\1", text)
+    _truncate = staticmethod(truncate)
+    _markdown_escape = staticmethod(escape_markdown)
+    _telegram_escape = staticmethod(telegram_escape)
 
     @staticmethod
     def _plural_form(number: int, forms: List[str]) -> str:
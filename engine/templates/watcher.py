@@ -0,0 +1,271 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from jinja2 import Environment, meta
+
+from fastbot.logger import Logger
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+_EVENT = struct.Struct("iIII")
+
+# Editors often write a file in several steps; events this close together are
+# reported as one change
+DEBOUNCE = 0.05
+
+
+def _template_name(directory: Path, path: Path) -> Optional[str]:
+    try:
+        return path.relative_to(directory).as_posix()
+    except ValueError:
+        return None
+
+
+class _InotifyBackend:
+    """Blocks on inotify events for every directory under the template roots"""
+
+    def __init__(self, directories: List[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._watches: Dict[int, Tuple[Path, Path]] = {}
+        for directory in directories:
+            for root, _, _ in os.walk(directory):
+                self._watch(directory, Path(root))
+
+    def _watch(self, directory: Path, path: Path) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            Logger.warning(f"Cannot watch {path}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._watches[wd] = (directory, path)
+
+    def wait(self, timeout: float) -> Set[str]:
+        changed: Set[str] = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            self._read(changed)
+            ready, _, _ = select.select([self.fd], [], [], DEBOUNCE)
+        return changed
+
+    def _read(self, changed: Set[str]) -> None:
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            raw_name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if wd not in self._watches or not raw_name:
+                continue
+            directory, parent = self._watches[wd]
+            path = parent / os.fsdecode(raw_name)
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    for root, _, files in os.walk(path):
+                        self._watch(directory, Path(root))
+                        names = (
+                            _template_name(directory, Path(root, f)) for f in files
+                        )
+                        changed.update(name for name in names if name)
+                continue
+
+            name = _template_name(directory, path)
+            if name:
+                changed.add(name)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _ScanBackend:
+    """Compares modification times of every file under the template roots"""
+
+    def __init__(self, directories: List[Path]):
+        self.directories = directories
+        self._state = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        for directory in self.directories:
+            for root, _, files in os.walk(directory):
+                for file_name in files:
+                    path = Path(root, file_name)
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    name = _template_name(directory, path)
+                    state.setdefault(name, (stat.st_mtime_ns, stat.st_size))
+        return state
+
+    def wait(self, timeout: float, stop: Optional[threading.Event] = None) -> Set[str]:
+        if stop is not None:
+            stop.wait(timeout)
+        state = self._scan()
+        changed = {
+            name
+            for name in state.keys() | self._state.keys()
+            if state.get(name) != self._state.get(name)
+        }
+        self._state = state
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class TemplateGraph:
+    """Which templates extend, include or import which"""
+
+    def __init__(self, env: Environment):
+        self.env = env
+        self._references: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+
+    def build(self) -> None:
+        for name in self.env.list_templates():
+            self.update(name)
+
+    def update(self, name: str) -> None:
+        for reference in self._references.pop(name, ()):
+            self._dependents.get(reference, set()).discard(name)
+
+        try:
+            source, _, _ = self.env.loader.get_source(self.env, name)
+            references = {
+                r
+                for r in meta.find_referenced_templates(self.env.parse(source))
+                if r is not None
+            }
+        except Exception:
+            return
+
+        self._references[name] = references
+        for reference in references:
+            self._dependents.setdefault(reference, set()).add(name)
+
+    def affected(self, names: Iterable[str]) -> Set[str]:
+        """The templates themselves plus everything that depends on them"""
+        affected: Set[str] = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name not in affected:
+                affected.add(name)
+                pending.extend(self._dependents.get(name, ()))
+        return affected
+
+
+class TemplateWatcher:
+    """Background thread that reports changed template names
+
+    Uses inotify on Linux and falls back to scanning modification times every
+    ``interval`` seconds elsewhere or when ``use_inotify`` is False.
+    """
+
+    def __init__(
+        self,
+        directories: Iterable[Path],
+        on_change: Callable[[Set[str]], None],
+        interval: float = 1.0,
+        use_inotify: bool = True,
+        on_start: Optional[Callable[[], None]] = None,
+    ):
+        self.directories = [Path(d) for d in directories if Path(d).is_dir()]
+        self.on_change = on_change
+        self.on_start = on_start
+        self.interval = interval
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.backend_name: Optional[str] = None
+
+        self._backend = None
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, wait: bool = False) -> "TemplateWatcher":
+        """Start watching; with ``wait`` return once changes are being tracked"""
+        if self.is_running:
+            return self
+        self._stop.clear()
+        self._ready.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="fastbot-template-watcher", daemon=True
+        )
+        self._thread.start()
+        if wait:
+            self._ready.wait()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _create_backend(self):
+        if self.use_inotify:
+            try:
+                self.backend_name = "inotify"
+                return _InotifyBackend(self.directories)
+            except (OSError, AttributeError) as e:
+                Logger.info(f"inotify unavailable, scanning templates instead: {e}")
+        self.backend_name = "scan"
+        return _ScanBackend(self.directories)
+
+    def _run(self) -> None:
+        try:
+            self._backend = self._create_backend()
+            if self.on_start:
+                self.on_start()
+        finally:
+            self._ready.set()
+
+        try:
+            while not self._stop.is_set():
+                if isinstance(self._backend, _ScanBackend):
+                    changed = self._backend.wait(self.interval, self._stop)
+                else:
+                    changed = self._backend.wait(self.interval)
+                if changed and not self._stop.is_set():
+                    try:
+                        self.on_change(changed)
+                    except Exception as e:
+                        Logger.error(f"Template invalidation failed: {e}")
+        finally:
+            self._backend.close()
@@ -1,6 +1,6 @@
 from fastapi import Request, HTTPException
-from fastapi.responses import HTMLResponse
-from typing import Any, Dict
+from fastapi.responses import HTMLResponse, StreamingResponse
+from typing import Any, AsyncIterator, Dict, Union
 from .template_engine import TemplateEngine
 from ..context import ContextEngine
 from typing import Optional
@@ -19,7 +19,14 @@ class WebTemplateEngine:
         context_template: Optional[str] = None,
         additional_context: Optional[Dict[str, Any]] = None,
         status_code: int = 200,
-    ) -> HTMLResponse:
+        stream: bool = False,
+    ) -> Union[HTMLResponse, StreamingResponse]:
+        """Render a page, or with ``stream`` send it while it renders
+
+        A streamed page is rendered up to its first chunk before the
+        response starts, so a missing template or an early error still
+        fails the request normally.
+        """
         base_context = {
             "request": request,
             "now": datetime.now(),
@@ -36,9 +43,30 @@ class WebTemplateEngine:
         if additional_context:
             base_context.update(additional_context)
         
+        if stream:
+            chunks = self.template_engine.stream_html_template(
+                template_name,
+                context=base_context
+            )
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                return HTMLResponse(content="", status_code=status_code)
+            return StreamingResponse(
+                _prepend(first, chunks),
+                status_code=status_code,
+                media_type="text/html",
+            )
+
         html_content = await self.template_engine.render_html_template(
             template_name, 
             context=base_context
         )
         
-        return HTMLResponse(content=html_content, status_code=status_code)
\ No newline at end of file
+        return HTMLResponse(content=html_content, status_code=status_code)
+
+
+async def _prepend(first: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    yield first
+    async for chunk in chunks:
+        yield chunk
@@ -14,6 +14,11 @@ class EventPriority(Enum):
     CRITICAL = 3
 
 
+_PRIORITY_ORDER = sorted(
+    EventPriority, key=lambda priority: priority.value, reverse=True
+)
+
+
 @dataclass
 class EventHandler:
     name: str
@@ -102,7 +107,7 @@ class Event:
         handlers_to_remove = []
 
         try:
-            for priority in sorted(EventPriority, reverse=True):
+            for priority in _PRIORITY_ORDER:
                 handler_names = list(self._handler_priorities[priority])
 
                 for handler_name in handler_names:
@@ -142,7 +147,7 @@ class Event:
         handlers_to_remove = []
 
         try:
-            for priority in sorted(EventPriority, reverse=True):
+            for priority in _PRIORITY_ORDER:
                 for handler_name in self._handler_priorities[priority]:
                     if handler_name not in self._handlers:
                         continue
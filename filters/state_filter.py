@@ -5,9 +5,10 @@ from aiogram.fsm.state import State
 
 
 class StateFilter(Filter):
-    def __init__(self, state: State):
+    def __init__(self, state: State, *states: State):
         self.state = state
+        self.states = (state, *states)
 
     async def __call__(self, message: Message, state: FSMContext) -> bool:
         current_state = await state.get_state()
-        return current_state == self.state.state
+        return any(current_state == s.state for s in self.states)
@@ -1,8 +1,25 @@
-from loguru import logger
 import sys
 from typing import Optional, Dict, Any
 import json
 
+_loguru_logger = None
+
+
+def _loguru():
+    """loguru is imported on first use to keep `import fastbot` light"""
+    global _loguru_logger
+    if _loguru_logger is None:
+        from loguru import logger
+
+        _loguru_logger = logger
+    return _loguru_logger
+
+
+def __getattr__(name: str):
+    if name == "logger":
+        return _loguru()
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
 
 class Logger:
     _is_configured = False
@@ -26,7 +43,7 @@ class Logger:
         Logger._default_rotation = rotation or Logger._default_rotation
         Logger._default_retention = retention or Logger._default_retention
 
-        logger.remove()
+        _loguru().remove()
         handlers = [
             {
                 "sink": sys.stderr,
@@ -52,7 +69,7 @@ class Logger:
                 }
             )
 
-        logger.configure(handlers=handlers)
+        _loguru().configure(handlers=handlers)
         Logger._is_configured = True
 
     @staticmethod
@@ -67,7 +84,7 @@ class Logger:
         Logger._ensure_configured()
         if context:
             message = f"{message} | {json.dumps(context, ensure_ascii=False)}"
-        logger.log(level, message, **kwargs)
+        _loguru().log(level, message, **kwargs)
 
     @staticmethod
     def debug(message: str, context: Optional[Dict[str, Any]] = None, **kwargs):
@@ -98,16 +115,16 @@ class Logger:
     @staticmethod
     def exception(message: str, context: Optional[Dict[str, Any]] = None, **kwargs):
         Logger._ensure_configured()
-        logger.exception(message, **kwargs)
+        _loguru().exception(message, **kwargs)
         if context:
-            logger.debug(f"Context: {json.dumps(context, ensure_ascii=False)}")
+            _loguru().debug(f"Context: {json.dumps(context, ensure_ascii=False)}")
 
     @staticmethod
     def add_context(**context):
         Logger._ensure_configured()
-        logger.bind(**context)
+        _loguru().bind(**context)
 
     @staticmethod
     def get_logger():
         Logger._ensure_configured()
-        return logger
+        return _loguru()
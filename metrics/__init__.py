@@ -0,0 +1,25 @@
+from .metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    registry,
+    DEFAULT_BUCKETS,
+)
+from .instrumentation import (
+    MetricsRequestMiddleware,
+    instrument_middleware,
+    setup_metrics_route,
+)
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "registry",
+    "DEFAULT_BUCKETS",
+    "MetricsRequestMiddleware",
+    "instrument_middleware",
+    "setup_metrics_route",
+]
@@ -0,0 +1,98 @@
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, Type
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.types.base import TelegramObject
+
+from fastbot.metrics.metrics import (
+    MIDDLEWARE_DURATION,
+    MIDDLEWARE_ERRORS,
+    OUTBOUND_CALLS,
+    OUTBOUND_DURATION,
+    OUTBOUND_ERRORS,
+    OUTBOUND_IN_FLIGHT,
+    MetricsRegistry,
+    registry,
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def instrument_middleware(
+    middleware: Callable, event_type: Type[TelegramObject]
+) -> Callable:
+    middleware_name = getattr(middleware, "__name__", type(middleware).__name__)
+    event_type_name = event_type.__name__
+    duration = MIDDLEWARE_DURATION.labels(middleware_name, event_type_name)
+    errors = MIDDLEWARE_ERRORS.labels(middleware_name, event_type_name)
+
+    async def instrumented_middleware(
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        inner_elapsed = 0.0
+
+        async def timed_handler(event: TelegramObject, data: Dict[str, Any]) -> Any:
+            nonlocal inner_elapsed
+            started = perf_counter()
+            try:
+                return await handler(event, data)
+            finally:
+                inner_elapsed += perf_counter() - started
+
+        started = perf_counter()
+        try:
+            return await middleware(timed_handler, event, data)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(perf_counter() - started - inner_elapsed)
+
+    instrumented_middleware.__name__ = middleware_name
+    instrumented_middleware._original_middleware = middleware
+    return instrumented_middleware
+
+
+class MetricsRequestMiddleware(BaseRequestMiddleware):
+    """Measures every outgoing Bot API call made through the bot session"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Response:
+        method_name = getattr(method, "__api_method__", type(method).__name__)
+        in_flight = OUTBOUND_IN_FLIGHT.labels(method_name)
+
+        OUTBOUND_CALLS.labels(method_name).inc()
+        in_flight.inc()
+        started = perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            OUTBOUND_ERRORS.labels(method_name).inc()
+            raise
+        finally:
+            OUTBOUND_DURATION.labels(method_name).observe(perf_counter() - started)
+            in_flight.dec()
+
+
+def setup_metrics_route(
+    app: Any, path: str = "/metrics", metrics_registry: MetricsRegistry = registry
+) -> None:
+    from fastapi.responses import Response as HTTPResponse
+
+    async def metrics_endpoint() -> HTTPResponse:
+        return HTTPResponse(
+            content=metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE
+        )
+
+    app.add_api_route(path, metrics_endpoint, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,332 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = array("Q", [0] * (len(buckets) + 1))
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the matching bucket"""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return self.buckets[-1] if self.buckets else 0.0
+
+
+class CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+MetricChild = Union[HistogramChild, CounterChild, GaugeChild]
+
+
+class Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], MetricChild] = {}
+
+    def labels(self, *values: str) -> MetricChild:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"Metric '{self.name}' expects labels {self.labelnames}, got {values}"
+                )
+            child = self._children[values] = self._create_child()
+        return child
+
+    def children(self) -> List[Tuple[Tuple[str, ...], MetricChild]]:
+        return list(self._children.items())
+
+    def clear(self) -> None:
+        self._children.clear()
+
+    def _create_child(self) -> MetricChild:
+        raise NotImplementedError
+
+    def _label_pairs(
+        self, values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None
+    ) -> str:
+        pairs = [
+            f'{name}="{_escape_label(value)}"'
+            for name, value in zip(self.labelnames, values)
+        ]
+        if extra:
+            pairs.append(f'{extra[0]}="{extra[1]}"')
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape_help(self.documentation)}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for values, child in self.children():
+            lines.append(
+                f"{self.name}{self._label_pairs(values)} {_format_value(child.value)}"
+            )
+        return lines
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def _create_child(self) -> CounterChild:
+        return CounterChild()
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+
+    def _create_child(self) -> GaugeChild:
+        return GaugeChild()
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _create_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape_help(self.documentation)}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for values, child in self.children():
+            cumulative = 0
+            for bound, count in zip(self.buckets, child.counts):
+                cumulative += count
+                labels = self._label_pairs(values, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = self._label_pairs(values, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {child.count}")
+            labels = self._label_pairs(values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def metrics(self) -> List[Metric]:
+        return list(self._metrics.values())
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n")
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
+
+
+registry = MetricsRegistry()
+
+HANDLER_DURATION = registry.histogram(
+    "fastbot_handler_duration_seconds",
+    "Time spent executing bot handlers",
+    ("handler", "event_type"),
+)
+HANDLER_CALLS = registry.counter(
+    "fastbot_handler_calls_total",
+    "Number of bot handler invocations",
+    ("handler", "event_type"),
+)
+HANDLER_ERRORS = registry.counter(
+    "fastbot_handler_errors_total",
+    "Number of bot handler invocations that raised",
+    ("handler", "event_type"),
+)
+HANDLER_IN_FLIGHT = registry.gauge(
+    "fastbot_handler_in_flight",
+    "Number of bot handlers currently executing",
+    ("handler", "event_type"),
+)
+
+RESOLVER_DURATION = registry.histogram(
+    "fastbot_resolver_duration_seconds",
+    "Time spent in dependency resolvers",
+    ("resolver",),
+)
+RESOLVER_ERRORS = registry.counter(
+    "fastbot_resolver_errors_total",
+    "Number of dependency resolvers that failed",
+    ("resolver",),
+)
+
+MIDDLEWARE_DURATION = registry.histogram(
+    "fastbot_middleware_duration_seconds",
+    "Time spent in middlewares, excluding the wrapped handler",
+    ("middleware", "event_type"),
+)
+MIDDLEWARE_ERRORS = registry.counter(
+    "fastbot_middleware_errors_total",
+    "Number of middleware invocations that raised",
+    ("middleware", "event_type"),
+)
+
+TEMPLATE_RENDER_DURATION = registry.histogram(
+    "fastbot_template_render_duration_seconds",
+    "Time spent rendering templates",
+    ("template",),
+)
+TEMPLATE_RENDER_ERRORS = registry.counter(
+    "fastbot_template_render_errors_total",
+    "Number of template renders that failed",
+    ("template",),
+)
+
+LOOP_LAG = registry.histogram(
+    "fastbot_event_loop_lag_seconds",
+    "Delay between the scheduled and actual wake-up of the loop monitor",
+)
+LOOP_BLOCKED = registry.counter(
+    "fastbot_event_loop_blocked_total",
+    "Number of times the event loop lag exceeded the threshold, by running handler",
+    ("handler",),
+)
+
+CACHE_REQUESTS = registry.counter(
+    "fastbot_cache_requests_total",
+    "Number of cache lookups by cache and result (hit or miss)",
+    ("cache", "result"),
+)
+
+OUTBOUND_DURATION = registry.histogram(
+    "fastbot_outbound_request_duration_seconds",
+    "Time spent in Bot API requests",
+    ("method",),
+)
+OUTBOUND_CALLS = registry.counter(
+    "fastbot_outbound_requests_total",
+    "Number of Bot API requests",
+    ("method",),
+)
+OUTBOUND_ERRORS = registry.counter(
+    "fastbot_outbound_request_errors_total",
+    "Number of Bot API requests that failed",
+    ("method",),
+)
+OUTBOUND_IN_FLIGHT = registry.gauge(
+    "fastbot_outbound_requests_in_flight",
+    "Number of Bot API requests currently awaiting a response",
+    ("method",),
+)
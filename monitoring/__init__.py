@@ -0,0 +1,3 @@
+from .loop_monitor import LagEvent, LoopLagMonitor, get_loop_monitor
+
+__all__ = ["LagEvent", "LoopLagMonitor", "get_loop_monitor"]
@@ -0,0 +1,186 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from time import perf_counter
+from types import FrameType
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from fastbot.logger import Logger
+from fastbot.metrics.metrics import LOOP_BLOCKED, LOOP_LAG
+
+
+@dataclass
+class LagEvent:
+    timestamp: float
+    lag: float
+    handler: Optional[str] = None
+    update_id: Optional[int] = None
+    stack: List[str] = field(default_factory=list)
+
+
+class LoopLagMonitor:
+    """Measures event-loop scheduling lag and captures the stack of blocking code"""
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        max_events: int = 100,
+        stack_limit: int = 30,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self.samples = 0
+        self.current_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked_count = 0
+
+        self._events: Deque[LagEvent] = deque(maxlen=max_events)
+        self._handler_frames: Dict[FrameType, Tuple[str, Optional[int]]] = {}
+        self._captured: Optional[LagEvent] = None
+        self._heartbeat = perf_counter()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lag = LOOP_LAG.labels()
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> "LoopLagMonitor":
+        global _active_monitor
+        if self.is_running:
+            return self
+
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = perf_counter()
+        self._stop_event.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="fastbot-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+        _active_monitor = self
+        Logger.info(
+            f"Event loop monitor started: interval {self.interval}s, "
+            f"threshold {self.threshold}s"
+        )
+        return self
+
+    async def stop(self) -> None:
+        global _active_monitor
+        if _active_monitor is self:
+            _active_monitor = None
+
+        self._stop_event.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._watchdog is not None:
+            self._watchdog.join(self.interval)
+            self._watchdog = None
+        self._handler_frames.clear()
+
+    def enter(
+        self, handler_name: str, update_id: Optional[int], frame: FrameType
+    ) -> FrameType:
+        """Called by the handler wrapper so blocking stacks can be tied to a handler"""
+        self._handler_frames[frame] = (handler_name, update_id)
+        return frame
+
+    def exit(self, token: FrameType) -> None:
+        self._handler_frames.pop(token, None)
+
+    def events(self) -> List[LagEvent]:
+        return list(self._events)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "samples": self.samples,
+            "current_lag": self.current_lag,
+            "max_lag": self.max_lag,
+            "p50": self._lag.quantile(0.5),
+            "p99": self._lag.quantile(0.99),
+            "blocked_count": self.blocked_count,
+            "recent_events": [asdict(event) for event in self._events],
+        }
+
+    async def _run(self) -> None:
+        while True:
+            expected = perf_counter() + self.interval
+            self._heartbeat = perf_counter()
+            await asyncio.sleep(self.interval)
+
+            lag = max(0.0, perf_counter() - expected)
+            self.samples += 1
+            self.current_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._lag.observe(lag)
+
+            captured, self._captured = self._captured, None
+            if lag >= self.threshold:
+                self._report(lag, captured)
+
+    def _report(self, lag: float, captured: Optional[LagEvent]) -> None:
+        event = captured or LagEvent(timestamp=time.time(), lag=lag)
+        event.lag = lag
+        self._events.append(event)
+        self.blocked_count += 1
+        LOOP_BLOCKED.labels(event.handler or "").inc()
+
+        location = f" in handler '{event.handler}'" if event.handler else ""
+        if event.update_id is not None:
+            location += f" (update {event.update_id})"
+        stack = "".join(event.stack) if event.stack else "  <stack not captured>\n"
+        Logger.warning(f"Event loop blocked for {lag:.3f}s{location}\n{stack}")
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.interval / 2):
+            stalled = perf_counter() - self._heartbeat - self.interval
+            if stalled < self.threshold or self._captured is not None:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._captured = self._capture(frame, stalled)
+            del frame
+
+    def _capture(self, frame: FrameType, stalled: float) -> LagEvent:
+        handler_name, update_id = None, None
+        current = frame
+        while current is not None:
+            owner = self._handler_frames.get(current)
+            if owner is not None:
+                handler_name, update_id = owner
+                break
+            current = current.f_back
+
+        return LagEvent(
+            timestamp=time.time(),
+            lag=stalled,
+            handler=handler_name,
+            update_id=update_id,
+            stack=traceback.format_stack(frame, limit=self.stack_limit),
+        )
+
+
+_active_monitor: Optional[LoopLagMonitor] = None
+
+
+def get_loop_monitor() -> Optional[LoopLagMonitor]:
+    return _active_monitor
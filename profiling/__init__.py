@@ -0,0 +1,4 @@
+from .profiler import ProfilingSession, get_active_session
+from .routes import setup_profiling_route
+
+__all__ = ["ProfilingSession", "get_active_session", "setup_profiling_route"]
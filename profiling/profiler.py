@@ -0,0 +1,218 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Dict, List, Optional, Tuple
+
+IDLE = "<idle>"
+
+SAMPLER = "sampler"
+CPROFILE = "cprofile"
+
+COLLAPSED = "collapsed"
+PSTATS = "pstats"
+FORMATS = {SAMPLER: (COLLAPSED,), CPROFILE: (PSTATS,)}
+
+
+class ProfilingSession:
+    """Profiles live handler executions, either by stack sampling or with cProfile
+
+    The sampler attributes every sample to the handler whose frame is on the
+    stack, so it stays accurate with many updates in flight. A cProfile
+    profile sees everything the event loop runs while it is enabled, so a
+    handler run is only kept when no other handler ran during it; runs that
+    overlap are dropped and counted in ``skipped``. Work the loop does
+    outside of handlers while a handler awaits, such as polling or the
+    middlewares of other updates, is still charged to that handler.
+    """
+
+    def __init__(
+        self, mode: str = SAMPLER, interval: float = 0.005, max_depth: int = 128
+    ):
+        if mode not in FORMATS:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+
+        self.mode = mode
+        self.interval = interval
+        self.max_depth = max_depth
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self.samples = 0
+
+        self._handler_frames: Dict[FrameType, str] = {}
+        self._stacks: Counter = Counter()
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._running: Optional[Tuple[str, cProfile.Profile]] = None
+        self._in_flight = 0
+        self.profiled = 0
+        self.skipped = 0
+        self._target_thread: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self.started_at is not None and self.stopped_at is None
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.stopped_at or time.monotonic()) - self.started_at
+
+    def start(self) -> "ProfilingSession":
+        global _active_session
+        if _active_session is not None:
+            raise RuntimeError("Another profiling session is already running")
+
+        self.started_at = time.monotonic()
+        self._target_thread = threading.get_ident()
+        _active_session = self
+
+        if self.mode == SAMPLER:
+            self._sampler = threading.Thread(
+                target=self._sample_loop, name="fastbot-profiler", daemon=True
+            )
+            self._sampler.start()
+        return self
+
+    def stop(self) -> "ProfilingSession":
+        global _active_session
+        if _active_session is self:
+            _active_session = None
+
+        self._stop_event.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+        if self._running is not None:
+            self._running[1].disable()
+            self._running = None
+
+        self._handler_frames.clear()
+        self.stopped_at = time.monotonic()
+        return self
+
+    def enter(self, handler_name: str, frame: FrameType) -> Optional[object]:
+        """Called by the handler wrapper when a handler starts executing"""
+        if self.mode == SAMPLER:
+            self._handler_frames[frame] = handler_name
+            return frame
+
+        self._in_flight += 1
+        if self._in_flight > 1 or self.stopped_at is not None:
+            # Overlapping runs would be charged with each other's work
+            if self._running is not None:
+                self._running[1].disable()
+                self._running = None
+            return (handler_name, None)
+
+        profile = cProfile.Profile()
+        self._running = (handler_name, profile)
+        profile.enable()
+        return self._running
+
+    def exit(self, token: Optional[object]) -> None:
+        if token is None:
+            return
+
+        if self.mode == SAMPLER:
+            self._handler_frames.pop(token, None)
+            return
+
+        self._in_flight -= 1
+        if token is not self._running:
+            self.skipped += 1
+            return
+
+        handler_name, profile = token
+        profile.disable()
+        self._running = None
+        self.profiled += 1
+        stats = self._stats.get(handler_name)
+        if stats is None:
+            self._stats[handler_name] = pstats.Stats(profile)
+        else:
+            stats.add(profile)
+
+    def handlers(self) -> List[str]:
+        if self.mode == SAMPLER:
+            return sorted({stack.split(";", 1)[0] for stack in self._stacks})
+        return sorted(self._stats)
+
+    def collapsed(self, handler: Optional[str] = None) -> str:
+        """Stacks in the folded format understood by flamegraph.pl and speedscope"""
+        lines = []
+        for stack, count in self._stacks.most_common():
+            if handler is None or stack.split(";", 1)[0] == handler:
+                lines.append(f"{stack} {count}")
+        return "\n".join(lines) + "\n"
+
+    def pstats(
+        self, handler: Optional[str] = None, sort: str = "cumulative", limit: int = 50
+    ) -> str:
+        output = io.StringIO()
+        output.write(
+            f"# {self.profiled} handler runs profiled, {self.skipped} skipped "
+            "because they overlapped with another handler\n"
+        )
+        for name in self.handlers():
+            if handler is not None and name != handler:
+                continue
+
+            output.write(f"=== {name} ===\n")
+            stats = self._stats[name]
+            stats.stream = output
+            stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def render(
+        self, format: Optional[str] = None, handler: Optional[str] = None
+    ) -> str:
+        format = format or FORMATS[self.mode][0]
+        if format not in FORMATS[self.mode]:
+            raise ValueError(
+                f"Format '{format}' is not available in {self.mode} mode, "
+                f"use one of {FORMATS[self.mode]}"
+            )
+
+        if format == COLLAPSED:
+            return self.collapsed(handler)
+        return self.pstats(handler)
+
+    def _sample_loop(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is not None:
+                self._record(frame)
+            del frame
+
+    def _record(self, frame: FrameType) -> None:
+        handler_name = IDLE
+        stack = []
+
+        while frame is not None and len(stack) < self.max_depth:
+            if handler_name == IDLE:
+                handler_name = self._handler_frames.get(frame, IDLE)
+            code = frame.f_code
+            stack.append(
+                f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            )
+            frame = frame.f_back
+
+        stack.append(handler_name)
+        self._stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+
+_active_session: Optional[ProfilingSession] = None
+
+
+def get_active_session() -> Optional[ProfilingSession]:
+    return _active_session
@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Optional
+
+from fastbot.logger import Logger
+from fastbot.profiling.profiler import SAMPLER, ProfilingSession, get_active_session
+
+MAX_PROFILING_SECONDS = 300.0
+
+
+def setup_profiling_route(app: Any, path: str = "/debug/profile") -> None:
+    from fastapi import HTTPException
+    from fastapi.responses import PlainTextResponse
+
+    async def profile_endpoint(
+        seconds: float = 10.0,
+        mode: str = SAMPLER,
+        format: Optional[str] = None,
+        handler: Optional[str] = None,
+        interval: float = 0.005,
+    ) -> PlainTextResponse:
+        if not 0 < seconds <= MAX_PROFILING_SECONDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"seconds must be in (0, {MAX_PROFILING_SECONDS}]",
+            )
+        if get_active_session() is not None:
+            raise HTTPException(
+                status_code=409, detail="A profiling session is already running"
+            )
+
+        try:
+            session = ProfilingSession(mode=mode, interval=interval)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        Logger.info(f"Profiling session started: {mode} for {seconds}s")
+        session.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            session.stop()
+        if mode == SAMPLER:
+            collected = f"{session.samples} samples"
+        else:
+            collected = (
+                f"{session.profiled} runs profiled, "
+                f"{session.skipped} overlapping runs skipped"
+            )
+        Logger.info(
+            f"Profiling session finished: {collected}, "
+            f"handlers: {', '.join(session.handlers()) or 'none'}"
+        )
+
+        try:
+            body = session.render(format, handler)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return PlainTextResponse(body)
+
+    app.add_api_route(path, profile_endpoint, methods=["GET"], include_in_schema=False)
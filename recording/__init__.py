@@ -0,0 +1,12 @@
+from .recorder import UpdateRecorder, list_segments
+from .middleware import RecordingMiddleware
+from .replay import ReplayResult, read_trace, replay_trace
+
+__all__ = [
+    "UpdateRecorder",
+    "list_segments",
+    "RecordingMiddleware",
+    "ReplayResult",
+    "read_trace",
+    "replay_trace",
+]
@@ -0,0 +1,32 @@
+import time
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from aiogram.types.base import TelegramObject
+
+from fastbot.recording.recorder import UpdateRecorder
+
+
+class RecordingMiddleware(BaseMiddleware):
+    """Outer update middleware that records raw updates with arrival time and duration"""
+
+    def __init__(self, recorder: UpdateRecorder):
+        self.recorder = recorder
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        arrival = time.time()
+        started = perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.recorder.record(arrival, perf_counter() - started, event)
@@ -0,0 +1,140 @@
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+from typing import IO, Any, Dict, List, Optional, Union
+
+from aiogram.types import Update
+
+from fastbot.logger import Logger
+
+SEGMENT_PATTERN = re.compile(r"^(?P<prefix>.+)-(?P<index>\d{6})\.jsonl(\.gz)?$")
+
+
+class UpdateRecorder:
+    """Appends update records to rotating, optionally gzip-compressed JSONL segments
+
+    Every record is one compact JSON line ``{"t": arrival, "d": duration,
+    "u": update}``. Serialization and writes happen on a background thread so
+    recording never blocks the event loop; records are dropped when the queue is
+    full. ``max_bytes`` limits the uncompressed size of a segment.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "updates",
+        max_bytes: int = 64 * 1024 * 1024,
+        max_files: Optional[int] = 10,
+        compress: bool = True,
+        max_queue_size: int = 10000,
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.compress = compress
+        self.recorded = 0
+        self.dropped = 0
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(
+            max_queue_size
+        )
+        self._worker: Optional[threading.Thread] = None
+        self._file: Optional[IO[bytes]] = None
+        self._written = 0
+        self._index = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def record(
+        self, arrival: float, duration: float, update: Union[Update, Dict[str, Any]]
+    ) -> None:
+        if self._worker is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._index = self._last_index()
+            self._worker = threading.Thread(
+                target=self._write_loop, name="fastbot-update-recorder", daemon=True
+            )
+            self._worker.start()
+
+        try:
+            self._queue.put_nowait({"t": arrival, "d": duration, "u": update})
+        except queue.Full:
+            self.dropped += 1
+
+    def segments(self) -> List[str]:
+        """Existing segment paths in recording order"""
+        return list_segments(self.directory, self.prefix)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout)
+            self._worker = None
+
+    def _write_loop(self) -> None:
+        try:
+            while True:
+                record = self._queue.get()
+                if record is None:
+                    return
+                try:
+                    self._write(record)
+                except Exception as e:
+                    Logger.error(f"Failed to record update: {e}")
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if isinstance(record["u"], Update):
+            record["u"] = record["u"].model_dump(
+                mode="json", exclude_none=True, by_alias=True
+            )
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+        data = line.encode("utf-8") + b"\n"
+
+        if self._file is None or self._written + len(data) > self.max_bytes:
+            self._rotate()
+
+        self._file.write(data)
+        self._written += len(data)
+        self.recorded += 1
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+        self._index += 1
+        suffix = ".jsonl.gz" if self.compress else ".jsonl"
+        path = os.path.join(self.directory, f"{self.prefix}-{self._index:06d}{suffix}")
+        self._file = gzip.open(path, "wb") if self.compress else open(path, "wb")
+        self._written = 0
+
+        if self.max_files:
+            for old in self.segments()[: -self.max_files]:
+                os.remove(old)
+
+    def _last_index(self) -> int:
+        segments = self.segments()
+        if not segments:
+            return 0
+        return int(SEGMENT_PATTERN.match(os.path.basename(segments[-1]))["index"])
+
+
+def list_segments(directory: str, prefix: Optional[str] = None) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+
+    segments = []
+    for name in os.listdir(directory):
+        match = SEGMENT_PATTERN.match(name)
+        if match and (prefix is None or match["prefix"] == prefix):
+            segments.append((match["prefix"], int(match["index"]), name))
+    return [os.path.join(directory, name) for _, _, name in sorted(segments)]
@@ -0,0 +1,125 @@
+import asyncio
+import gzip
+import json
+import os
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from aiogram.types import Update
+
+from fastbot.logger import Logger
+from fastbot.metrics.metrics import HANDLER_DURATION, HistogramChild
+from fastbot.recording.recorder import list_segments
+
+
+@dataclass
+class ReplayResult:
+    updates: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    recorded_durations: List[float] = field(default_factory=list)
+    handlers: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+def read_trace(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield records from a segment file or from every segment in a directory"""
+    paths = list_segments(path) if os.path.isdir(path) else [path]
+    for segment in paths:
+        opener = gzip.open if segment.endswith(".gz") else open
+        with opener(segment, "rt", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+async def replay_trace(
+    bot: Any,
+    records: List[Dict[str, Any]],
+    speed: Optional[float] = 1.0,
+    concurrency: int = 1,
+) -> ReplayResult:
+    """Feed recorded updates into ``bot.dp``
+
+    With ``speed`` set, updates are started at their recorded offsets divided by
+    ``speed`` so overlapping traffic stays overlapping. With ``speed=None`` they
+    are fed as fast as possible, ``concurrency`` at a time.
+    """
+    result = ReplayResult()
+    if not records:
+        return result
+
+    updates = [
+        (record["t"], Update.model_validate(record["u"], context={"bot": bot.bot}))
+        for record in records
+    ]
+    result.recorded_durations = [record.get("d", 0.0) for record in records]
+    first_arrival = updates[0][0]
+    semaphore = asyncio.Semaphore(concurrency)
+    before = _histogram_snapshot()
+
+    async def feed(update: Update) -> None:
+        started = perf_counter()
+        try:
+            await bot.dp.feed_update(bot.bot, update)
+        except Exception as e:
+            result.errors += 1
+            Logger.debug(f"Replayed update {update.update_id} failed: {e}")
+        result.latencies.append(perf_counter() - started)
+
+    async def feed_limited(update: Update) -> None:
+        async with semaphore:
+            await feed(update)
+
+    started = perf_counter()
+    if speed:
+        tasks = []
+        for arrival, update in updates:
+            delay = started + (arrival - first_arrival) / speed - perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(feed(update)))
+        await asyncio.gather(*tasks)
+    elif concurrency > 1:
+        await asyncio.gather(*(feed_limited(update) for _, update in updates))
+    else:
+        for _, update in updates:
+            await feed(update)
+
+    result.elapsed = perf_counter() - started
+    result.updates = len(updates)
+    result.handlers = _handler_stats(before, _histogram_snapshot())
+    return result
+
+
+Snapshot = Dict[Tuple[str, ...], Tuple[List[int], int]]
+
+
+def _histogram_snapshot() -> Snapshot:
+    return {
+        labels: (list(child.counts), child.count)
+        for labels, child in HANDLER_DURATION.children()
+    }
+
+
+def _handler_stats(before: Snapshot, after: Snapshot) -> Dict[str, Dict[str, float]]:
+    """Quantiles of the handler calls made between two snapshots"""
+    stats = {}
+    for labels, (counts, count) in after.items():
+        previous_counts, previous_count = before.get(labels, ([0] * len(counts), 0))
+        if count == previous_count:
+            continue
+
+        delta = HistogramChild(HANDLER_DURATION.buckets)
+        for i, (now, then) in enumerate(zip(counts, previous_counts)):
+            delta.counts[i] = now - then
+        delta.count = count - previous_count
+
+        stats[labels[0]] = {
+            "count": delta.count,
+            "p50": delta.quantile(0.5),
+            "p90": delta.quantile(0.9),
+            "p99": delta.quantile(0.99),
+        }
+    return stats
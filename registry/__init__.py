@@ -0,0 +1,27 @@
+from .registry import (
+    EVENT_ARGUMENTS,
+    CompiledHandler,
+    HandlerAnalysis,
+    HandlerGroup,
+    HandlerKeys,
+    HandlerRegistry,
+    HandlerSignature,
+    analyze_filters,
+    analyze_handler,
+    analyze_signature,
+    registration_key,
+)
+
+__all__ = [
+    "EVENT_ARGUMENTS",
+    "CompiledHandler",
+    "HandlerAnalysis",
+    "HandlerGroup",
+    "HandlerKeys",
+    "HandlerRegistry",
+    "HandlerSignature",
+    "analyze_filters",
+    "analyze_handler",
+    "analyze_signature",
+    "registration_key",
+]
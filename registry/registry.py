@@ -0,0 +1,572 @@
+import inspect
+import operator
+from collections import defaultdict
+from dataclasses import dataclass, fields
+from functools import partial
+from itertools import chain
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.dispatcher.event.handler import FilterObject, HandlerObject
+from aiogram.dispatcher.flags import extract_flags_from_object
+from aiogram.filters import Command
+from aiogram.filters.base import Filter
+from aiogram.filters.callback_data import CallbackQueryFilter
+from aiogram.types import CallbackQuery, InlineQuery, Message
+from aiogram.types.base import TelegramObject
+from magic_filter import MagicFilter
+from magic_filter.operations import (
+    CallOperation,
+    CombinationOperation,
+    ComparatorOperation,
+    FunctionOperation,
+    GetAttributeOperation,
+)
+from magic_filter.util import and_op, in_op, or_op
+
+from fastbot.configs import HandlerConfig
+from fastbot.filters import StateFilter
+from fastbot.strategies import HandlerStrategy
+
+Keys = Optional[FrozenSet[str]]
+
+OBSERVERS = {
+    Message: "message",
+    CallbackQuery: "callback_query",
+    InlineQuery: "inline_query",
+}
+
+EVENT_ARGUMENTS = {
+    Message: ("message", "msg"),
+    CallbackQuery: ("callback", "callback_query", "query"),
+    InlineQuery: ("inline_query", "query"),
+}
+
+
+@dataclass(frozen=True)
+class HandlerKeys:
+    """What an update must look like for a handler to be considered
+
+    ``None`` means the handler does not constrain that part of the update.
+    """
+
+    commands: Keys = None
+    texts: Keys = None
+    data: Keys = None
+    data_prefixes: Keys = None
+    states: Keys = None
+
+    def dimensions(self) -> Iterator[Tuple[str, FrozenSet[str]]]:
+        for f in fields(self):
+            values = getattr(self, f.name)
+            if values is not None:
+                yield f.name, values
+
+    def matches(
+        self,
+        command: Optional[str],
+        text: Optional[str],
+        data: Optional[str],
+        state: Optional[str],
+    ) -> bool:
+        return (
+            (self.commands is None or command in self.commands)
+            and (self.texts is None or text in self.texts)
+            and (self.data is None or data in self.data)
+            and (
+                self.data_prefixes is None
+                or (data is not None and data.startswith(tuple(self.data_prefixes)))
+            )
+            and (self.states is None or state in self.states)
+        )
+
+    def covers(self, other: "HandlerKeys") -> bool:
+        """Whether every update matching ``other`` also matches these keys"""
+        for name, values in self.dimensions():
+            other_values = getattr(other, name)
+            if other_values is None:
+                return False
+            if name == "data_prefixes":
+                if not all(v.startswith(tuple(values)) for v in other_values):
+                    return False
+            elif not other_values <= values:
+                return False
+        return True
+
+
+@dataclass(frozen=True)
+class HandlerSignature:
+    """Handler parameters, resolved once instead of on every update"""
+
+    event_arguments: Tuple[str, ...]
+    injected: Tuple[Tuple[str, Any], ...]
+    is_coroutine: bool
+
+    @property
+    def parameters(self) -> FrozenSet[str]:
+        return frozenset(self.event_arguments) | {name for name, _ in self.injected}
+
+
+@dataclass(frozen=True)
+class HandlerAnalysis:
+    """Everything about a registration that can be computed ahead of time
+
+    ``remaining`` holds the positions of the filters still checked per update;
+    ``exact`` is True when the keys alone decide whether the handler runs.
+    """
+
+    keys: HandlerKeys
+    remaining: Tuple[int, ...]
+    exact: bool
+    signature: HandlerSignature
+
+
+@dataclass(frozen=True)
+class CompiledHandler:
+    position: int
+    name: str
+    event_type: Type[TelegramObject]
+    router: Router
+    key: str
+    analysis: HandlerAnalysis
+    handler: HandlerObject
+
+    @property
+    def keys(self) -> HandlerKeys:
+        return self.analysis.keys
+
+    @property
+    def exact(self) -> bool:
+        return self.analysis.exact
+
+
+def registration_key(position: int, config: HandlerConfig) -> str:
+    """Stable identity of a registration across process starts"""
+    handler = config.handler
+    while isinstance(handler, partial):
+        handler = handler.func
+    name = f"{handler.__module__}.{getattr(handler, '__qualname__', handler)}"
+    return f"{position}:{config.event_type.__name__}:{name}:{len(config.filters)}"
+
+
+def analyze_signature(
+    handler: Callable, event_type: Type[TelegramObject]
+) -> HandlerSignature:
+    original_handler = handler.func if isinstance(handler, partial) else handler
+    parameters = inspect.signature(original_handler).parameters
+    event_arguments = tuple(
+        name for name in EVENT_ARGUMENTS.get(event_type, ()) if name in parameters
+    )
+    return HandlerSignature(
+        event_arguments=event_arguments,
+        injected=tuple(
+            (name, param.annotation)
+            for name, param in parameters.items()
+            if name not in event_arguments
+        ),
+        is_coroutine=inspect.iscoroutinefunction(original_handler),
+    )
+
+
+def analyze_handler(
+    config: HandlerConfig, signature: Optional[HandlerSignature] = None
+) -> HandlerAnalysis:
+    keys, remaining, exact = analyze_filters(config.filters, config.event_type)
+    remaining_ids = {id(f) for f in remaining}
+    return HandlerAnalysis(
+        keys=keys,
+        remaining=tuple(
+            i for i, f in enumerate(config.filters) if id(f) in remaining_ids
+        ),
+        exact=exact,
+        signature=signature or analyze_signature(config.handler, config.event_type),
+    )
+
+
+def analyze_filters(
+    filters: List[Any], event_type: Type[TelegramObject]
+) -> Tuple[HandlerKeys, List[Any], bool]:
+    """Split filters into index keys and the filters still checked per update
+
+    Returns the keys, the remaining filters and whether the remaining filters
+    are fully described by the keys.
+    """
+    keys: Dict[str, FrozenSet[str]] = {}
+    remaining = []
+    exact = True
+
+    def narrow(name: str, values: FrozenSet[str]) -> None:
+        keys[name] = _both(name, keys[name], values) if name in keys else values
+
+    for f in filters:
+        if isinstance(f, StateFilter):
+            narrow("states", frozenset(s.state for s in f.states))
+            continue
+
+        if isinstance(f, MagicFilter):
+            indexed = _magic_keys(f, event_type)
+            if indexed:
+                narrow(*indexed)
+                continue
+
+        remaining.append(f)
+        if event_type is Message and _is_plain_command(f):
+            narrow("commands", frozenset(f.commands))
+        elif event_type is CallbackQuery and isinstance(f, CallbackQueryFilter):
+            data_class = f.callback_data
+            prefix = f"{data_class.__prefix__}{data_class.__separator__}"
+            narrow("data_prefixes", frozenset([prefix]))
+            exact = exact and f.rule is None
+        else:
+            exact = False
+
+    return HandlerKeys(**keys), remaining, exact
+
+
+def _both(name: str, left: FrozenSet[str], right: FrozenSet[str]) -> FrozenSet[str]:
+    """Keys matching updates that both key sets match"""
+    if name != "data_prefixes":
+        return left & right
+    # Data starting with "a" and with "ab" starts with "ab"
+    return frozenset(
+        a if a.startswith(b) else b
+        for a in left
+        for b in right
+        if a.startswith(b) or b.startswith(a)
+    )
+
+
+def _is_plain_command(f: Any) -> bool:
+    return (
+        isinstance(f, Command)
+        and f.prefix == "/"
+        and not f.ignore_case
+        and f.magic is None
+        and all(isinstance(c, str) for c in f.commands)
+    )
+
+
+def _magic_keys(
+    magic: MagicFilter, event_type: Type[TelegramObject]
+) -> Optional[Tuple[str, FrozenSet[str]]]:
+    """Index keys for ``F.text == x``, ``F.text.in_(...)``, ``F.data == x``,
+    ``F.data.in_(...)`` and ``F.data.startswith(...)``, and for ``|`` or
+    ``&`` of two of these on the same key"""
+    attribute = {Message: "text", CallbackQuery: "data"}.get(event_type)
+    operations = magic._operations
+    combination = operations[-1] if operations else None
+    if (
+        isinstance(combination, CombinationOperation)
+        and combination.combinator in (or_op, and_op)
+        and isinstance(combination.right, MagicFilter)
+    ):
+        left = _magic_keys(type(magic)(operations[:-1]), event_type)
+        right = _magic_keys(combination.right, event_type)
+        if left is None or right is None or left[0] != right[0]:
+            return None
+        name = left[0]
+        if combination.combinator is or_op:
+            return name, left[1] | right[1]
+        return name, _both(name, left[1], right[1])
+    if not (
+        attribute
+        and len(operations) in (2, 3)
+        and isinstance(operations[0], GetAttributeOperation)
+        and operations[0].name == attribute
+    ):
+        return None
+
+    values = None
+    if len(operations) == 2:
+        operation = operations[1]
+        if (
+            isinstance(operation, ComparatorOperation)
+            and operation.comparator is operator.eq
+        ):
+            values = (operation.right,)
+        elif (
+            isinstance(operation, FunctionOperation)
+            and operation.function is in_op
+            and len(operation.args) == 1
+            and not operation.kwargs
+        ):
+            values = operation.args[0]
+        name = "texts" if attribute == "text" else "data"
+    else:
+        method, call = operations[1:]
+        if (
+            attribute == "data"
+            and isinstance(method, GetAttributeOperation)
+            and method.name == "startswith"
+            and isinstance(call, CallOperation)
+            and len(call.args) == 1
+            and not call.kwargs
+        ):
+            values = call.args[0]
+            values = (values,) if isinstance(values, str) else values
+        name = "data_prefixes"
+
+    if not isinstance(values, (tuple, list, set, frozenset)):
+        return None
+    if not all(isinstance(v, str) for v in values):
+        return None
+    return name, frozenset(values)
+
+
+class HandlerGroup:
+    """Handlers of one event type on one router, indexed for lookup
+
+    The group is registered on its router as a single aiogram handler, so an
+    update only runs the filters of handlers whose keys it matches. The
+    group's filter picks the handler and puts it in ``data["handler"]``
+    before the router's inner middlewares run, so they see its flags.
+    """
+
+    def __init__(
+        self,
+        router: Router,
+        event_type: Type[TelegramObject],
+        handlers: Tuple[CompiledHandler, ...],
+    ):
+        self.router = router
+        self.event_type = event_type
+        self.handlers = handlers
+
+        indexes: Dict[str, Dict[str, List[int]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        unindexed = []
+        for i, handler in enumerate(handlers):
+            primary = next(handler.keys.dimensions(), None)
+            if primary is None:
+                unindexed.append(i)
+                continue
+            name, values = primary
+            for value in values:
+                indexes[name][value].append(i)
+
+        self._indexes: Mapping[str, Mapping[str, Tuple[int, ...]]] = MappingProxyType(
+            {
+                name: MappingProxyType({k: tuple(v) for k, v in index.items()})
+                for name, index in indexes.items()
+            }
+        )
+        self._unindexed = tuple(unindexed)
+        self._prefix_lengths = tuple(
+            sorted({len(p) for p in self._indexes.get("data_prefixes", {})})
+        )
+
+    def candidates(
+        self, event: TelegramObject, state: Optional[str] = None
+    ) -> List[CompiledHandler]:
+        """Handlers whose keys match the update, in registration order"""
+        command = text = data = None
+        if isinstance(event, Message):
+            text = event.text
+            source = text or event.caption
+            if source and source.startswith("/"):
+                parts = source[1:].split(maxsplit=1)
+                command = parts[0].partition("@")[0] if parts else ""
+        elif isinstance(event, CallbackQuery):
+            data = event.data
+
+        lookups = [self._unindexed]
+        indexes = self._indexes
+        for name, value in (
+            ("commands", command),
+            ("texts", text),
+            ("data", data),
+            ("states", state),
+        ):
+            if value is not None and name in indexes:
+                lookups.append(indexes[name].get(value, ()))
+        if data is not None and self._prefix_lengths:
+            prefixes = indexes["data_prefixes"]
+            for length in self._prefix_lengths:
+                lookups.append(prefixes.get(data[:length], ()))
+
+        positions = sorted(set(chain.from_iterable(lookups)))
+        return [
+            self.handlers[i]
+            for i in positions
+            if self.handlers[i].keys.matches(command, text, data, state)
+        ]
+
+    async def select(self, event: TelegramObject, **kwargs: Any) -> Any:
+        """Filter passing with the first matching handler and its filter data"""
+        for compiled in self.candidates(event, kwargs.get("raw_state")):
+            kwargs["handler"] = compiled.handler
+            passed, data = await compiled.handler.check(event, **kwargs)
+            if passed:
+                return data
+        return False
+
+    async def dispatch(self, event: TelegramObject, **kwargs: Any) -> Any:
+        """Call the handler chosen by ``select``, then any later matching one
+
+        Handlers after a ``SkipHandler`` are wrapped in the router's inner
+        middlewares, as aiogram does for each handler it tries.
+        """
+        selected = kwargs["handler"]
+        try:
+            return await selected.call(event, **kwargs)
+        except SkipHandler:
+            pass
+
+        candidates = self.candidates(event, kwargs.get("raw_state"))
+        position = next(
+            i for i, compiled in enumerate(candidates) if compiled.handler is selected
+        )
+        observer = self.router.observers[OBSERVERS[self.event_type]]
+        for compiled in candidates[position + 1 :]:
+            handler = compiled.handler
+            kwargs["handler"] = handler
+            passed, data = await handler.check(event, **kwargs)
+            if not passed:
+                continue
+            kwargs.update(data)
+            call = observer.outer_middleware.wrap_middlewares(
+                observer._resolve_middlewares(), handler.call
+            )
+            try:
+                return await call(event, kwargs)
+            except SkipHandler:
+                continue
+        raise SkipHandler()
+
+    def problems(self) -> List[str]:
+        """Handlers that can never run because an earlier one takes their updates"""
+        problems = []
+        by_key: Dict[Tuple[str, str], List[CompiledHandler]] = defaultdict(list)
+        broad: List[CompiledHandler] = []
+
+        for handler in self.handlers:
+            rivals = {rival.position: rival for rival in broad}
+            for name, values in handler.keys.dimensions():
+                for rival in by_key.get((name, min(values)), ()):
+                    rivals[rival.position] = rival
+
+            for _, rival in sorted(rivals.items()):
+                if rival.keys.covers(handler.keys):
+                    kind = (
+                        "conflicts with"
+                        if rival.keys == handler.keys
+                        else "is shadowed by"
+                    )
+                    problems.append(
+                        f"{self.event_type.__name__} handler {handler.name} {kind} "
+                        f"{rival.name} on router {self.router.name}"
+                    )
+                    break
+
+            if not handler.exact:
+                continue
+            primary = next(handler.keys.dimensions(), None)
+            if primary is None or primary[0] == "data_prefixes":
+                broad.append(handler)
+            else:
+                for value in primary[1]:
+                    by_key[(primary[0], value)].append(handler)
+
+        return problems
+
+
+class HandlerRegistry:
+    """Immutable, indexed set of handlers compiled from builder registrations
+
+    Handlers are grouped by router and event type and indexed by command,
+    message text, callback data or prefix and FSM state. The registry is built
+    once in ``FastBotBuilder.build`` and kept on the bot, so restarts reuse it.
+    """
+
+    def __init__(self, groups: Tuple[HandlerGroup, ...]):
+        self.groups = groups
+
+    @classmethod
+    def compile(
+        cls,
+        configs: List[HandlerConfig],
+        default_router: Router,
+        wrap: Callable[[HandlerConfig, HandlerSignature], Callable],
+        wrap_filter: Optional[Callable[[Any], Any]] = None,
+        name: Callable[[Callable], str] = lambda handler: handler.__name__,
+        signatures: Optional[Mapping[str, HandlerSignature]] = None,
+    ) -> "HandlerRegistry":
+        """Compile registrations, reusing ``signatures`` from a previous build
+
+        Filters are always analyzed again: they often carry runtime data such as
+        button lists that can change without any source change.
+        """
+        grouped: Dict[Tuple[Router, type], List[CompiledHandler]] = {}
+        signatures = signatures or {}
+
+        for position, config in enumerate(configs):
+            router = config.router or default_router
+            key = registration_key(position, config)
+            analysis = analyze_handler(config, signatures.get(key))
+            remaining = [config.filters[i] for i in analysis.remaining]
+
+            # Flags set with aiogram.flags live on the unwrapped handler
+            flags: Dict[str, Any] = extract_flags_from_object(config.handler)
+            for f in config.filters:
+                if isinstance(f, Filter):
+                    f.update_handler_flags(flags=flags)
+            if wrap_filter:
+                remaining = [wrap_filter(f) for f in remaining]
+
+            handlers = grouped.setdefault((router, config.event_type), [])
+            handlers.append(
+                CompiledHandler(
+                    position=position,
+                    name=name(config.handler),
+                    event_type=config.event_type,
+                    router=router,
+                    key=key,
+                    analysis=analysis,
+                    handler=HandlerObject(
+                        callback=wrap(config, analysis.signature),
+                        filters=[FilterObject(f) for f in remaining],
+                        flags=flags,
+                    ),
+                )
+            )
+
+        return cls(
+            tuple(
+                HandlerGroup(router, event_type, tuple(handlers))
+                for (router, event_type), handlers in grouped.items()
+            )
+        )
+
+    def __iter__(self) -> Iterator[CompiledHandler]:
+        return chain.from_iterable(group.handlers for group in self.groups)
+
+    def __len__(self) -> int:
+        return sum(len(group.handlers) for group in self.groups)
+
+    def signatures(self) -> Dict[str, HandlerSignature]:
+        return {handler.key: handler.analysis.signature for handler in self}
+
+    def validate(self) -> List[str]:
+        return [problem for group in self.groups for problem in group.problems()]
+
+    def install(self, strategy: Optional[HandlerStrategy] = None) -> None:
+        """Register every group on its router as one dispatching handler"""
+        strategy = strategy or HandlerStrategy()
+        for group in self.groups:
+            strategy.register(
+                group.router, group.dispatch, [group.select], group.event_type
+            )
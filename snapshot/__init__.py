@@ -0,0 +1,15 @@
+from typing import TYPE_CHECKING
+
+from fastbot.core.lazy import lazy_exports
+
+from .snapshot import BuildSnapshot, source_fingerprint
+
+if TYPE_CHECKING:
+    from .bytecode import SnapshotBytecodeCache
+
+# The bytecode cache needs Jinja, which bots without templates never import
+__getattr__, __dir__ = lazy_exports(
+    __name__, {"SnapshotBytecodeCache": (".bytecode", "SnapshotBytecodeCache")}
+)
+
+__all__ = ["BuildSnapshot", "SnapshotBytecodeCache", "source_fingerprint"]
@@ -0,0 +1,28 @@
+from jinja2 import BytecodeCache
+from jinja2.bccache import Bucket
+
+from fastbot.snapshot.snapshot import BuildSnapshot
+
+
+class SnapshotBytecodeCache(BytecodeCache):
+    """Jinja bytecode cache that stores compiled templates in a BuildSnapshot
+
+    Jinja checks the source checksum of every bucket, so edited templates are
+    recompiled even when the snapshot itself is still valid.
+    """
+
+    def __init__(self, snapshot: BuildSnapshot):
+        self.snapshot = snapshot
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        data = self.snapshot.templates.get(bucket.key)
+        if data is not None:
+            bucket.bytecode_from_string(data)
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        self.snapshot.templates[bucket.key] = bucket.bytecode_to_string()
+        self.snapshot.dirty = True
+
+    def clear(self) -> None:
+        self.snapshot.templates.clear()
+        self.snapshot.dirty = True
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import pickle
+import sys
+from typing import Any, Dict, Iterable, Optional
+
+from fastbot.logger import Logger
+
+FORMAT_VERSION = 2
+
+
+class BuildSnapshot:
+    """Build artifacts kept between process starts
+
+    Holds handler signature analysis, Jinja bytecode and prebuilt static
+    keyboards keyed by the names the builder gives them. The file is a pickle,
+    so only point it at snapshots the bot wrote itself. The whole snapshot is
+    discarded when the fingerprint of its source files changes; keyboards are
+    only valid for the templates of ``template_fingerprint``.
+    """
+
+    def __init__(self, path: str, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.handlers: Dict[str, Any] = {}
+        self.templates: Dict[str, bytes] = {}
+        self.template_fingerprint: Optional[str] = None
+        self.keyboards: Dict[str, Dict[str, Any]] = {}
+        self.loaded = False
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str) -> "BuildSnapshot":
+        """Read a snapshot, or start an empty one if it is missing or stale"""
+        snapshot = cls(path, fingerprint)
+        try:
+            with open(path, "rb") as file:
+                data = pickle.load(file)
+        except FileNotFoundError:
+            return snapshot
+        except Exception as e:
+            Logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+            return snapshot
+
+        if (
+            data.get("version") != FORMAT_VERSION
+            or data.get("fingerprint") != fingerprint
+        ):
+            Logger.info(f"Snapshot {path} is out of date, rebuilding")
+            return snapshot
+
+        snapshot.handlers = data["handlers"]
+        snapshot.templates = data["templates"]
+        snapshot.template_fingerprint = data["template_fingerprint"]
+        snapshot.keyboards = data["keyboards"]
+        snapshot.loaded = True
+        return snapshot
+
+    def update_handlers(self, handlers: Dict[str, Any]) -> None:
+        if handlers != self.handlers:
+            self.handlers = handlers
+            self.dirty = True
+
+    def update_templates(self, fingerprint: str) -> bool:
+        """Record the templates the snapshot describes; False if they changed"""
+        if self.loaded and fingerprint == self.template_fingerprint:
+            return True
+        # Keyboards built from other templates no longer apply
+        self.template_fingerprint = fingerprint
+        self.keyboards = {}
+        self.dirty = True
+        return False
+
+    def update_keyboards(self, key: str, keyboards: Dict[str, Any]) -> None:
+        if keyboards != self.keyboards.get(key):
+            self.keyboards[key] = keyboards
+            self.dirty = True
+
+    def save(self) -> None:
+        """Write the snapshot atomically, leaving out entries that cannot be pickled"""
+        handlers = _picklable("Handler", self.handlers)
+        keyboards = {
+            key: _picklable("Keyboard", entries)
+            for key, entries in self.keyboards.items()
+        }
+
+        data = {
+            "version": FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "handlers": handlers,
+            "templates": self.templates,
+            "template_fingerprint": self.template_fingerprint,
+            "keyboards": keyboards,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            pickle.dump(data, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.path)
+        self.dirty = False
+        Logger.info(
+            f"Snapshot saved to {self.path}: {len(handlers)} handlers, "
+            f"{len(self.templates)} templates, "
+            f"{sum(map(len, keyboards.values()))} keyboards"
+        )
+
+
+def _picklable(kind: str, entries: Dict[str, Any]) -> Dict[str, Any]:
+    kept = {}
+    for key, value in entries.items():
+        try:
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            Logger.debug(f"{kind} {key} is left out of the snapshot: {e}")
+            continue
+        kept[key] = value
+    return kept
+
+
+def source_fingerprint(paths: Iterable[str]) -> str:
+    """Hash of the size and modification time of every source file
+
+    Directories are walked recursively. Only ``stat`` is called, so computing
+    the fingerprint stays cheap next to the build it guards.
+    """
+    digest = hashlib.sha256(f"{FORMAT_VERSION}:{sys.version}".encode())
+    for path in sorted(set(paths)):
+        for file_path in _files(path):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                digest.update(f"{file_path}:missing\n".encode())
+                continue
+            digest.update(f"{file_path}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    return digest.hexdigest()
+
+
+def _files(path: str) -> Iterable[str]:
+    if not os.path.isdir(path):
+        return [path]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        files.extend(os.path.join(root, name) for name in sorted(names))
+    return files
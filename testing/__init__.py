@@ -0,0 +1,14 @@
+from .fake_api_server import FakeTelegramServer, RateLimiter, UpdateStream
+from .fake_session import FakeSession
+from .updates import make_callback_update, make_message, make_message_update, make_user
+
+__all__ = [
+    "FakeSession",
+    "FakeTelegramServer",
+    "RateLimiter",
+    "UpdateStream",
+    "make_callback_update",
+    "make_message",
+    "make_message_update",
+    "make_user",
+]
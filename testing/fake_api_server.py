@@ -0,0 +1,354 @@
+import asyncio
+import json
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl
+
+import aiohttp
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from fastbot.logger import Logger
+from fastbot.testing.updates import make_callback_update, make_message_update
+
+REPLY_METHODS = ("sendmessage", "editmessagetext", "answercallbackquery")
+TEXT_FIELDS = ("text", "caption", "callback_query_id", "url")
+
+
+@dataclass
+class UpdateStream:
+    """Shape of the generated traffic"""
+
+    users: int = 100
+    texts: Sequence[str] = ("/start", "/help", "hello")
+    callback_data: Sequence[str] = ("menu:1", "menu:2")
+    callback_ratio: float = 0.2
+    seed: Optional[int] = None
+
+
+class RateLimiter:
+    """Sliding one-second window, the way Telegram throttles outgoing messages"""
+
+    def __init__(self, per_second: Optional[float]):
+        self.per_second = per_second
+        self._sent: Deque[float] = deque()
+
+    def retry_after(self, now: float) -> int:
+        """Record a call and return 0, or the seconds to wait when over the limit"""
+        if not self.per_second:
+            return 0
+
+        while self._sent and now - self._sent[0] >= 1.0:
+            self._sent.popleft()
+        if len(self._sent) >= self.per_second:
+            return max(1, math.ceil(1.0 - (now - self._sent[0])))
+
+        self._sent.append(now)
+        return 0
+
+
+class FakeTelegramServer:
+    """Local stand-in for the Telegram Bot API for polling and webhook load tests
+
+    Serves ``/bot<token>/<method>`` like api.telegram.org, so a bot created with
+    ``TelegramAPIServer.from_base(server_url)`` talks to it unchanged. Replies
+    are matched to the oldest unanswered update of the same chat to measure
+    update-to-reply latency.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[UpdateStream] = None,
+        latency: float = 0.0,
+        chat_rate_limit: Optional[float] = None,
+        global_rate_limit: Optional[float] = None,
+    ):
+        self.stream = stream or UpdateStream()
+        self.latency = latency
+        self.chat_rate_limit = chat_rate_limit
+        self.app = FastAPI(title="Fake Telegram Bot API", docs_url=None, redoc_url=None)
+
+        self.webhook_url: Optional[str] = None
+        self.updates_generated = 0
+        self.updates_delivered = 0
+        self.webhook_errors = 0
+        self.rate_limited = 0
+        self.method_calls: Dict[str, int] = {}
+        self.reply_latencies: List[float] = []
+
+        self._rng = random.Random(self.stream.seed)
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._queue_changed = asyncio.Event()
+        self._closed = False
+        self._last_delivered = 0
+        self._pending: Dict[int, Deque[Tuple[int, float]]] = {}
+        self._callback_chats: Dict[str, int] = {}
+        self._global_limiter = RateLimiter(global_rate_limit)
+        self._chat_limiters: Dict[int, RateLimiter] = {}
+
+        self._methods: Dict[str, Callable[[str, Dict[str, Any]], Any]] = {
+            "getme": self._get_me,
+            "getupdates": self._get_updates,
+            "setwebhook": self._set_webhook,
+            "deletewebhook": self._delete_webhook,
+            "getwebhookinfo": self._get_webhook_info,
+            "sendmessage": self._send_message,
+            "editmessagetext": self._edit_message_text,
+            "answercallbackquery": self._answer_callback_query,
+        }
+        self.app.add_api_route(
+            "/bot{token}/{method}", self._handle, methods=["GET", "POST"]
+        )
+
+    @property
+    def pending_replies(self) -> int:
+        return sum(len(pending) for pending in self._pending.values())
+
+    def generate(self, count: int) -> List[Dict[str, Any]]:
+        """Create ``count`` updates and queue them for ``getUpdates``"""
+        updates = [self._make_update() for _ in range(count)]
+        self._queue.extend(updates)
+        self._queue_changed.set()
+        return updates
+
+    async def generate_at_rate(self, count: int, rate: float) -> None:
+        """Queue updates for polling at ``rate`` updates per second"""
+        await self._paced(count, rate, lambda: self.generate(1))
+
+    async def push_webhooks(
+        self, count: int, rate: float, concurrency: int = 100
+    ) -> None:
+        """POST updates to the URL registered with ``setWebhook`` at a target rate"""
+        if not self.webhook_url:
+            raise RuntimeError("No webhook registered, call setWebhook first")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = set()
+
+        async with aiohttp.ClientSession() as session:
+
+            async def deliver(update: Dict[str, Any]) -> None:
+                async with semaphore:
+                    try:
+                        async with session.post(self.webhook_url, json=update) as r:
+                            if r.status >= 400:
+                                self.webhook_errors += 1
+                            else:
+                                self.updates_delivered += 1
+                    except aiohttp.ClientError as e:
+                        self.webhook_errors += 1
+                        Logger.debug(f"Webhook delivery failed: {e}")
+
+            def push() -> None:
+                task = asyncio.ensure_future(deliver(self._make_update()))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            await self._paced(count, rate, push)
+            if tasks:
+                await asyncio.gather(*tasks)
+
+    def close(self) -> None:
+        """Release pending long polls so the server can shut down"""
+        self._closed = True
+        self._queue_changed.set()
+
+    async def wait_for_replies(self, timeout: float = 10.0) -> bool:
+        """Wait until every generated update got a reply"""
+        deadline = perf_counter() + timeout
+        while self.pending_replies and perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        return not self.pending_replies
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "updates_generated": self.updates_generated,
+            "updates_delivered": self.updates_delivered,
+            "replies": len(self.reply_latencies),
+            "pending_replies": self.pending_replies,
+            "rate_limited": self.rate_limited,
+            "webhook_errors": self.webhook_errors,
+            "method_calls": dict(self.method_calls),
+        }
+
+    async def _paced(self, count: int, rate: float, emit: Callable[[], Any]) -> None:
+        started = perf_counter()
+        for i in range(count):
+            delay = started + i / rate - perf_counter() if rate else 0
+            if delay > 0:
+                await asyncio.sleep(delay)
+            emit()
+
+    def _make_update(self) -> Dict[str, Any]:
+        update_id = self._next_update_id
+        self._next_update_id += 1
+        chat_id = self._rng.randint(1, self.stream.users)
+
+        if (
+            self.stream.callback_data
+            and self._rng.random() < self.stream.callback_ratio
+        ):
+            data = self._rng.choice(self.stream.callback_data)
+            update = make_callback_update(update_id, data, chat_id)
+            self._callback_chats[str(update_id)] = chat_id
+        else:
+            text = self._rng.choice(self.stream.texts)
+            update = make_message_update(update_id, text, chat_id)
+
+        self.updates_generated += 1
+        self._pending.setdefault(chat_id, deque()).append((update_id, perf_counter()))
+        return update.model_dump(mode="json", exclude_none=True, by_alias=True)
+
+    async def _handle(self, token: str, method: str, request: Request):
+        params = await _read_params(request)
+        name = method.lower()
+        self.method_calls[method] = self.method_calls.get(method, 0) + 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        handler = self._methods.get(name)
+        if handler is None:
+            return JSONResponse({"ok": True, "result": True})
+
+        if name in REPLY_METHODS:
+            retry_after = self._check_rate_limit(params.get("chat_id"))
+            if retry_after:
+                self.rate_limited += 1
+                return JSONResponse(
+                    {
+                        "ok": False,
+                        "error_code": 429,
+                        "description": f"Too Many Requests: retry after {retry_after}",
+                        "parameters": {"retry_after": retry_after},
+                    },
+                    status_code=429,
+                )
+
+        result = handler(token, params)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return JSONResponse({"ok": True, "result": result})
+
+    def _check_rate_limit(self, chat_id: Any) -> int:
+        now = perf_counter()
+        if self.chat_rate_limit and chat_id is not None:
+            limiter = self._chat_limiters.get(chat_id)
+            if limiter is None:
+                limiter = self._chat_limiters[chat_id] = RateLimiter(
+                    self.chat_rate_limit
+                )
+            retry_after = limiter.retry_after(now)
+            if retry_after:
+                return retry_after
+        return self._global_limiter.retry_after(now)
+
+    def _record_reply(self, chat_id: Any) -> None:
+        pending = self._pending.get(chat_id)
+        if pending:
+            _, created = pending.popleft()
+            self.reply_latencies.append(perf_counter() - created)
+
+    def _message(self, chat_id: Any, text: str) -> Dict[str, Any]:
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text,
+        }
+
+    def _get_me(self, token: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        bot_id = token.split(":", 1)[0]
+        return {
+            "id": int(bot_id) if bot_id.isdigit() else 1,
+            "is_bot": True,
+            "first_name": "FastBot",
+            "username": "fastbot_load_test_bot",
+        }
+
+    async def _get_updates(
+        self, token: str, params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        offset = params.get("offset") or 0
+        limit = params.get("limit") or 100
+        timeout = params.get("timeout") or 0
+
+        while self._queue and self._queue[0]["update_id"] < offset:
+            self._queue.popleft()
+
+        if not self._queue and timeout and not self._closed:
+            self._queue_changed.clear()
+            try:
+                await asyncio.wait_for(self._queue_changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        updates = [self._queue[i] for i in range(min(limit, len(self._queue)))]
+        for update in updates:
+            if update["update_id"] > self._last_delivered:
+                self._last_delivered = update["update_id"]
+                self.updates_delivered += 1
+        return updates
+
+    def _set_webhook(self, token: str, params: Dict[str, Any]) -> bool:
+        self.webhook_url = params.get("url") or None
+        return True
+
+    def _delete_webhook(self, token: str, params: Dict[str, Any]) -> bool:
+        self.webhook_url = None
+        if params.get("drop_pending_updates"):
+            self._queue.clear()
+        return True
+
+    def _get_webhook_info(self, token: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "url": self.webhook_url or "",
+            "has_custom_certificate": False,
+            "pending_update_count": len(self._queue),
+        }
+
+    def _send_message(self, token: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        chat_id = params.get("chat_id")
+        self._record_reply(chat_id)
+        return self._message(chat_id, params.get("text", ""))
+
+    def _edit_message_text(self, token: str, params: Dict[str, Any]) -> Any:
+        chat_id = params.get("chat_id")
+        if chat_id is None:
+            return True
+        self._record_reply(chat_id)
+        return self._message(chat_id, params.get("text", ""))
+
+    def _answer_callback_query(self, token: str, params: Dict[str, Any]) -> bool:
+        chat_id = self._callback_chats.pop(str(params.get("callback_query_id")), None)
+        if chat_id is not None:
+            self._record_reply(chat_id)
+        return True
+
+
+async def _read_params(request: Request) -> Dict[str, Any]:
+    """Decode a Bot API call sent as a query string, urlencoded form or JSON"""
+    params: Dict[str, Any] = dict(request.query_params)
+    body = await request.body()
+    if body:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            params.update(json.loads(body))
+        else:
+            params.update(parse_qsl(body.decode("utf-8"), keep_blank_values=True))
+
+    for key, value in params.items():
+        if isinstance(value, str) and key not in TEXT_FIELDS:
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                pass
+    return params
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.types import Message
+
+ResponseFactory = Union[Any, Callable[[TelegramMethod], Any]]
+
+
+class FakeSession(BaseSession):
+    """In-memory Bot API session that answers every method without network I/O"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        responses: Optional[Dict[str, ResponseFactory]] = None,
+        max_recorded: Optional[int] = 1000,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.responses = responses or {}
+        self.requests: Deque[TelegramMethod] = deque(maxlen=max_recorded)
+        self.request_count = 0
+        self._message_id = 0
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None
+    ) -> Any:
+        self.request_count += 1
+        self.requests.append(method)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        result = self._build_result(bot, method)
+        content = json.dumps({"ok": True, "result": result}, default=str)
+        response = self.check_response(bot, method, 200, content)
+        return response.result
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+    def _build_result(self, bot: Bot, method: TelegramMethod) -> Any:
+        api_method = method.__api_method__
+        if api_method in self.responses:
+            factory = self.responses[api_method]
+            return factory(method) if callable(factory) else factory
+
+        if api_method == "getMe":
+            return {
+                "id": bot.id,
+                "is_bot": True,
+                "first_name": "FastBot",
+                "username": "fastbot_test_bot",
+            }
+
+        if _returns_message(method):
+            self._message_id += 1
+            chat_id = getattr(method, "chat_id", None) or 1
+            return {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": getattr(method, "text", None) or "",
+            }
+
+        return True
+
+
+def _returns_message(method: TelegramMethod) -> bool:
+    returning = method.__returning__
+    if returning is Message:
+        return True
+    return Message in getattr(returning, "__args__", ())
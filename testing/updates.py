@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Optional
+
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+
+def make_user(user_id: int = 1) -> User:
+    return User(id=user_id, is_bot=False, first_name=f"User {user_id}")
+
+
+def make_message(
+    text: str,
+    chat_id: int = 1,
+    user_id: Optional[int] = None,
+    message_id: int = 1,
+) -> Message:
+    return Message(
+        message_id=message_id,
+        date=datetime.now(),
+        chat=Chat(id=chat_id, type="private"),
+        from_user=make_user(user_id or chat_id),
+        text=text,
+    )
+
+
+def make_message_update(
+    update_id: int, text: str, chat_id: int = 1, user_id: Optional[int] = None
+) -> Update:
+    return Update(
+        update_id=update_id,
+        message=make_message(text, chat_id, user_id, message_id=update_id),
+    )
+
+
+def make_callback_update(
+    update_id: int, data: str, chat_id: int = 1, user_id: Optional[int] = None
+) -> Update:
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id),
+            from_user=make_user(user_id or chat_id),
+            chat_instance=str(chat_id),
+            message=make_message("menu", chat_id, user_id, message_id=update_id),
+            data=data,
+        ),
+    )
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from fastbot.FastAdminPanel import FastAdminPanel
+from fastbot.metrics.metrics import (
+    CACHE_REQUESTS,
+    HANDLER_CALLS,
+    HANDLER_DURATION,
+    TEMPLATE_RENDER_DURATION,
+)
+
+TOKEN = "admin-secret"
+
+
+def _client(panel: FastAdminPanel) -> TestClient:
+    return TestClient(panel.app, headers={"Authorization": f"Bearer {TOKEN}"})
+
+
+def test_snapshot_reports_handlers_templates_and_caches():
+    HANDLER_CALLS.labels("admin_panel_handler", "Message").inc()
+    HANDLER_DURATION.labels("admin_panel_handler", "Message").observe(0.02)
+    TEMPLATE_RENDER_DURATION.labels("admin_panel.j2").observe(0.001)
+    CACHE_REQUESTS.labels("admin_panel", "hit").inc(3)
+    CACHE_REQUESTS.labels("admin_panel", "miss").inc()
+
+    client = _client(FastAdminPanel(token=TOKEN))
+    snapshot = client.get("/snapshot").json()
+
+    assert {
+        "loop_lag",
+        "queues",
+        "in_flight",
+        "outbound_backlog",
+        "handlers",
+        "resolvers",
+        "templates",
+        "outbound",
+        "caches",
+    } <= set(snapshot)
+    handler = next(
+        h for h in snapshot["handlers"] if h["handler"] == "admin_panel_handler"
+    )
+    assert handler["event_type"] == "Message"
+    assert handler["calls"] >= 1
+    assert 0 < handler["p50"] <= handler["p99"]
+    assert any(t["name"] == "admin_panel.j2" for t in snapshot["templates"])
+    assert snapshot["caches"]["admin_panel"]["hit_rate"] == pytest.approx(0.75)
+    assert "FastBot Admin" in client.get("/").text
+
+
+def test_snapshot_is_collected_once_per_refresh_interval():
+    panel = FastAdminPanel(refresh_interval=60.0, token=TOKEN)
+    collected = []
+    collect = panel._collect
+
+    async def counting_collect():
+        collected.append(1)
+        return await collect()
+
+    panel._collect = counting_collect
+    client = _client(panel)
+
+    first = client.get("/snapshot").json()
+    assert client.get("/snapshot").json() == first
+    assert len(collected) == 1
+
+    panel.refresh_interval = 0.0
+    client.get("/snapshot")
+    assert len(collected) == 2
+
+
+def test_every_route_requires_the_token():
+    with pytest.raises(ValueError):
+        FastAdminPanel()
+
+    panel = FastAdminPanel(title="<script>", token=TOKEN)
+    client = TestClient(panel.app)
+    assert client.get("/").status_code == 401
+    assert client.get("/snapshot", params={"token": "wrong"}).status_code == 401
+    assert client.get("/stream").status_code == 401
+    assert client.get("/snapshot", params={"token": TOKEN}).status_code == 200
+
+    assert "<title>&lt;script&gt;</title>" in _client(panel).get("/").text
+
+
+def test_stream_rejects_clients_over_the_limit():
+    panel = FastAdminPanel(max_stream_clients=1, token=TOKEN)
+    panel._stream_clients = 1
+
+    response = _client(panel).get("/stream")
+
+    assert response.status_code == 503
+    assert panel._stream_clients == 1
+
+
+def test_stream_slots_are_taken_when_clients_are_admitted():
+    panel = FastAdminPanel(max_stream_clients=1, token=TOKEN)
+    events = panel._stream(_Request(polls=0))
+
+    with pytest.raises(HTTPException) as error:
+        panel._stream(_Request(polls=0))
+    assert error.value.status_code == 503
+
+    async def consume():
+        return [event async for event in events]
+
+    assert asyncio.run(consume()) == []
+    assert panel._stream_clients == 0
+
+
+class _Request:
+    def __init__(self, polls: int):
+        self.polls = polls
+
+    async def is_disconnected(self) -> bool:
+        self.polls -= 1
+        return self.polls < 0
+
+
+def test_stream_counts_clients_until_they_disconnect():
+    panel = FastAdminPanel(refresh_interval=0.0, token=TOKEN)
+
+    async def consume():
+        events = []
+        async for event in panel._stream(_Request(polls=2)):
+            assert panel._stream_clients == 1
+            events.append(event)
+        return events
+
+    events = asyncio.run(consume())
+
+    assert len(events) == 2
+    assert all(e.startswith("data: {") and e.endswith("\n\n") for e in events)
+    assert panel._stream_clients == 0
+
+
+def test_profile_route_is_opt_in():
+    enabled = _client(FastAdminPanel(enable_profiling=True, token=TOKEN))
+    assert enabled.get("/profile?seconds=0").status_code == 400
+    assert _client(FastAdminPanel(token=TOKEN)).get("/profile").status_code == 404
@@ -0,0 +1,25 @@
+import pytest
+from aiogram import Bot
+from aiogram.types import Message
+
+from fastbot import FastBotBuilder
+from fastbot.testing import FakeSession, make_message_update
+
+
+async def start(message: Message):
+    await message.answer("Hello!")
+
+
+@pytest.mark.asyncio
+async def test_command_is_dispatched_to_fake_session():
+    session = FakeSession()
+    builder = FastBotBuilder().set_bot(Bot("123456:TEST-TOKEN", session=session))
+    await builder.add_command_handler("start", start)
+    bot = builder.build()
+
+    await bot.dp.feed_update(bot.bot, make_message_update(1, "/start", chat_id=7))
+
+    send_message = session.requests[-1]
+    assert send_message.__api_method__ == "sendMessage"
+    assert send_message.chat_id == 7
+    assert send_message.text == "Hello!"
@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+
+from fastbot.testing import FakeTelegramServer, RateLimiter, UpdateStream
+
+
+def test_rate_limiter_window():
+    limiter = RateLimiter(2)
+    assert limiter.retry_after(0.0) == 0
+    assert limiter.retry_after(0.1) == 0
+    assert limiter.retry_after(0.2) == 1
+    assert limiter.retry_after(1.05) == 0
+
+
+def test_polling_reply_and_flood_control():
+    server = FakeTelegramServer(
+        UpdateStream(users=1, callback_ratio=0), chat_rate_limit=1
+    )
+    client = TestClient(server.app)
+    server.generate(2)
+
+    updates = client.post("/bot1:token/getUpdates", data={"offset": "0"}).json()
+    assert [u["update_id"] for u in updates["result"]] == [1, 2]
+    assert updates["result"][0]["message"]["from"]["id"] == 1
+
+    sent = client.post("/bot1:token/sendMessage", data={"chat_id": "1", "text": "42"})
+    assert sent.json()["result"]["text"] == "42"
+
+    limited = client.post("/bot1:token/sendMessage", data={"chat_id": "1", "text": "x"})
+    assert limited.status_code == 429
+    assert limited.json()["parameters"]["retry_after"] == 1
+    assert len(server.reply_latencies) == 1
+    assert server.pending_replies == 1
@@ -0,0 +1,66 @@
+import pytest
+
+from fastbot import TemplateEngine
+
+
+class SharedStore:
+    """A stand-in for a networked cache with a coroutine API"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = []
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl):
+        self.data[key] = value
+        self.ttls.append(ttl)
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    (tmp_path / "list.j2").write_text(
+        '{% cache "items", 60 %}{% for i in items %}{{ i }};{% endfor %}'
+        "{% endcache %} for {{ name }}"
+    )
+    (tmp_path / "user.j2").write_text(
+        '{% cache ("profile", user_id) %}{{ user_id }}:{{ name }}{% endcache %}'
+    )
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_cached_section_is_reused_until_invalidated(template_dir):
+    engine = TemplateEngine(str(template_dir))
+
+    first = await engine.render_template("list.j2", items=[1, 2], name="Ann")
+    second = await engine.render_template("list.j2", items=[3], name="Bob")
+    assert first["text"] == "1;2; for Ann"
+    assert second["text"] == "1;2; for Bob"
+
+    engine.invalidate(["list.j2"])
+    third = await engine.render_template("list.j2", items=[3], name="Bob")
+    assert third["text"] == "3; for Bob"
+
+
+@pytest.mark.asyncio
+async def test_keys_are_evaluated_per_render_and_stores_are_pluggable(template_dir):
+    store = SharedStore()
+    engine = TemplateEngine(str(template_dir), fragment_cache=store)
+
+    for user_id, name in [(1, "Ann"), (2, "Bob"), (1, "Changed")]:
+        await engine.render_template("user.j2", user_id=user_id, name=name)
+
+    assert sorted(store.data.values()) == ["1:Ann", "2:Bob"]
+    assert store.ttls == [None, None]
+    result = await engine.render_template("user.j2", user_id=1, name="Other")
+    assert result["text"] == "1:Ann"
+
+
+def test_cache_tag_in_synchronous_environment(template_dir):
+    engine = TemplateEngine(str(template_dir), enable_async=False)
+    template = engine.env.get_template("list.j2")
+
+    assert template.render(items=[1], name="Ann") == "1; for Ann"
+    assert template.render(items=[2], name="Bob") == "1; for Bob"
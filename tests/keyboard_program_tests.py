@@ -0,0 +1,96 @@
+import json
+from dataclasses import dataclass
+
+import pytest
+
+from fastbot import TemplateEngine
+from fastbot.builders import KeyboardProgramError, compile_keyboard
+
+MENU = {
+    "rows": [
+        [{"text": "Help", "callback_data": "help"}],
+        {
+            "foreach": "items",
+            "as": "item",
+            "columns": 2,
+            "button": {"text": "{item.name}", "callback_data": "item:{item.id}"},
+        },
+        [{"text": "Admin", "callback_data": "admin", "visible": "is_admin"}],
+    ]
+}
+
+
+@dataclass
+class Item:
+    id: int
+    name: str
+
+
+def test_program_fills_slots_and_hides_buttons():
+    program = compile_keyboard(MENU)
+    items = [{"id": 1, "name": "One"}, Item(2, "Two"), {"id": 3, "name": "Three"}]
+
+    markup = program(items=items, is_admin=False)
+
+    rows = [[(b.text, b.callback_data) for b in row] for row in markup.inline_keyboard]
+    assert rows == [
+        [("Help", "help")],
+        [("One", "item:1"), ("Two", "item:2")],
+        [("Three", "item:3")],
+    ]
+    assert len(program(items=[], is_admin=True).inline_keyboard) == 2
+    with pytest.raises(KeyboardProgramError, match="items"):
+        program(is_admin=True)
+
+
+def test_static_reply_keyboard_is_built_once():
+    program = compile_keyboard(
+        {
+            "type": "reply",
+            "buttons": [{"text": "A"}, {"text": "B"}, {"text": "C"}],
+            "row_width": 2,
+            "resize_keyboard": True,
+        }
+    )
+
+    assert program.is_static
+    markup = program()
+    assert program(user="Ann") is markup
+    assert [[b.text for b in row] for row in markup.keyboard] == [["A", "B"], ["C"]]
+    assert markup.resize_keyboard
+
+
+@pytest.mark.parametrize(
+    "definition",
+    [
+        {"type": "grid"},
+        {"rows": [[{"callback_data": "x"}]]},
+        {"rows": [[{"text": "x", "colour": "red"}]]},
+        {"rows": [[{"text": "{}"}]]},
+        {"rows": [{"foreach": "items", "columns": 0, "button": {"text": "x"}}]},
+    ],
+)
+def test_invalid_definitions_fail_at_compile_time(definition):
+    with pytest.raises(KeyboardProgramError):
+        compile_keyboard(definition)
+
+
+@pytest.mark.asyncio
+async def test_template_engine_serves_keyboard_definitions(tmp_path):
+    (tmp_path / "menu.kb.json").write_text(json.dumps(MENU))
+    (tmp_path / "main.kb.yaml").write_text(
+        "type: reply\nbuttons:\n  - text: Start\n  - text: Stop\nrow_width: 2\n"
+    )
+    engine = TemplateEngine(str(tmp_path))
+
+    keyboards = await engine.prebuild_buttons(["menu.kb.json", "main.kb.yaml"])
+    assert list(keyboards) == ["main.kb.yaml"]
+
+    markup = await engine.load_keyboard_from_template(
+        "menu.kb.json", items=[Item(1, "One")], is_admin=True
+    )
+    assert [b.text for row in markup.inline_keyboard for b in row] == [
+        "Help",
+        "One",
+        "Admin",
+    ]
@@ -0,0 +1,79 @@
+import warnings
+
+import pytest
+from aiogram import Bot
+from fastapi.testclient import TestClient
+
+from fastbot import FastBotBuilder
+from fastbot.FastBot import ConfigurationError
+from fastbot.metrics import MetricsRequestMiddleware
+
+
+async def status():
+    return {"ok": True}
+
+
+def test_app_is_built_on_first_access():
+    bot = FastBotBuilder().set_bot(Bot("123456:TEST-TOKEN")).build()
+
+    assert bot._app is None
+    app = bot.app
+    assert bot.app is app
+    assert app.state.bot_instance is bot
+    assert TestClient(app).get("/metrics").status_code == 404
+
+
+def test_metrics_endpoint_is_opt_in_and_middleware_added_once():
+    shared = Bot("123456:TEST-TOKEN")
+    bot = FastBotBuilder().set_bot(shared).enable_metrics().build()
+    FastBotBuilder().set_bot(shared).build()
+
+    assert TestClient(bot.app).get("/metrics").status_code == 200
+    assert [type(m) for m in bot.bot.session.middleware] == [MetricsRequestMiddleware]
+
+
+async def create():
+    return {"created": True}
+
+
+async def item(item_id: int, q: str = ""):
+    return {"item_id": item_id, "q": q}
+
+
+@pytest.mark.asyncio
+async def test_http_handlers_build_app_eagerly():
+    builder = FastBotBuilder().set_bot(Bot("123456:TEST-TOKEN"))
+    await builder.add_get_handler("/status", status)
+    await builder.add_post_handler("/items", create)
+    await builder.add_get_handler("/items/{item_id:int}", item)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        bot = builder.build()
+
+    assert bot._app is not None
+    assert bot.app.url_path_for("wrapped_status") == "/status"
+    # Each handler is routed for its declared method only
+    client = TestClient(bot.app)
+    response = client.get("/status")
+    assert response.status_code == 200
+    assert response.json() == {"ok": True}
+    response = client.post("/items")
+    assert response.status_code == 200
+    assert response.json() == {"created": True}
+    response = client.get("/items/7", params={"q": "red"})
+    assert response.status_code == 200
+    assert response.json() == {"item_id": 7, "q": "red"}
+    assert client.post("/status").status_code == 405
+    assert client.delete("/status").status_code == 405
+    assert client.get("/items").status_code == 405
+
+
+@pytest.mark.asyncio
+async def test_polling_only_build():
+    bot = FastBotBuilder().set_bot(Bot("123456:TEST-TOKEN")).set_polling_only().build()
+    assert bot.app is None
+
+    builder = FastBotBuilder().set_bot(Bot("123456:TEST-TOKEN")).set_polling_only()
+    await builder.add_get_handler("/status", status)
+    with pytest.raises(ConfigurationError):
+        builder.build()
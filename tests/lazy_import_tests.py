@@ -0,0 +1,27 @@
+from fastbot.benchmarks.import_benchmark import probe_import
+
+WEB_AND_TEMPLATE_STACKS = {"fastapi", "starlette", "uvicorn", "jinja2", "pampy"}
+
+
+def test_package_import_is_light():
+    assert probe_import("import fastbot")["loaded"] == []
+
+
+def test_builder_import_skips_web_and_template_stacks():
+    loaded = set(probe_import("from fastbot import FastBotBuilder, FastBot")["loaded"])
+    assert not loaded & (WEB_AND_TEMPLATE_STACKS | {"loguru"})
+
+
+def test_lazy_exports_resolve():
+    loaded = probe_import("from fastbot import TemplateEngine, get_web_engine")[
+        "loaded"
+    ]
+    assert {"jinja2", "fastapi"} <= set(loaded)
+
+
+def test_polling_only_build_skips_web_stack():
+    statement = (
+        "from aiogram import Bot; from fastbot import FastBotBuilder; "
+        "FastBotBuilder().set_bot(Bot('123456:TOKEN')).set_polling_only().build()"
+    )
+    assert not set(probe_import(statement)["loaded"]) & WEB_AND_TEMPLATE_STACKS
@@ -0,0 +1,34 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from fastbot.monitoring import LoopLagMonitor, get_loop_monitor
+
+
+async def blocking_handler(monitor):
+    token = monitor.enter("blocking_handler", 42, sys._getframe())
+    try:
+        time.sleep(0.3)
+    finally:
+        monitor.exit(token)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_attributed_to_handler():
+    monitor = LoopLagMonitor(interval=0.02, threshold=0.1).start()
+    assert get_loop_monitor() is monitor
+
+    await asyncio.sleep(0.05)
+    await blocking_handler(monitor)
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    stats = monitor.get_stats()
+    assert stats["blocked_count"] == 1
+    event = monitor.events()[0]
+    assert event.handler == "blocking_handler"
+    assert event.update_id == 42
+    assert "time.sleep" in "".join(event.stack)
+    assert get_loop_monitor() is None
@@ -0,0 +1,154 @@
+import asyncio
+import random
+import re
+
+from fastbot import TemplateEngine
+from fastbot.engine.templates.splitter import CAPTION_LIMIT, _units, split_message
+
+
+def _balanced_html(chunk: str) -> bool:
+    stack = []
+    for closing, name in re.findall(r"<(/?)([a-z]+)[^>]*>", chunk):
+        if closing:
+            if not stack or stack.pop() != name:
+                return False
+        else:
+            stack.append(name)
+    return not stack
+
+
+def test_short_text_is_one_chunk():
+    assert list(split_message("hello", "HTML")) == ["hello"]
+
+
+def test_splits_on_paragraphs_first():
+    paragraphs = ["line one\nline two " * 5, "x" * 60, "tail words here"]
+    chunks = list(split_message("\n\n".join(paragraphs), limit=120))
+
+    assert chunks[0] == paragraphs[0].rstrip("\n")
+    assert all(len(chunk) <= 120 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "").replace(" ", "") == (
+        "".join(paragraphs).replace("\n", "").replace(" ", "")
+    )
+
+
+def test_long_word_is_cut_hard():
+    chunks = list(split_message("a" * 250, limit=100))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+
+
+def test_space_right_at_the_limit_stays_within_it():
+    assert [len(c) for c in split_message("a" * 4096 + " " + "b" * 50)] == [4096, 51]
+    html = "<b>" + "word " * 1000 + "</b>"
+    assert all(len(c) <= 4096 for c in split_message(html, "HTML"))
+    markdown = ("*" + "word " * 1000 + "*\n") * 3
+    assert all(len(c) <= 4096 for c in split_message(markdown, "MarkdownV2"))
+
+
+def test_random_text_never_exceeds_the_limit():
+    rng = random.Random(7)
+    words = ["word ", "a", "  ", "\\.", "&amp;", "\U0001f600 ", "x" * 35, "\n"]
+    for _ in range(300):
+        limit = rng.choice([60, 100, 200])
+        for parse_mode, bold in (
+            (None, "{}"),
+            ("HTML", "<b>{}</b>"),
+            ("MarkdownV2", "*{}*"),
+        ):
+            text = "".join(
+                (
+                    bold.format(rng.choice(words))
+                    if rng.random() < 0.2
+                    else rng.choice(words)
+                )
+                for _ in range(rng.randint(5, 200))
+            )
+            for chunk in split_message(text, parse_mode, limit):
+                assert _units(chunk) <= limit, (parse_mode, limit, chunk)
+
+
+def test_limit_counts_utf16_units():
+    chunks = list(split_message("\U0001f600" * 60, limit=50))
+    assert [len(chunk) for chunk in chunks] == [25, 25, 10]
+
+
+def test_html_tags_are_closed_and_reopened():
+    text = '<b>bold <a href="https://x.y">' + "word &amp; " * 40 + "</a></b> end"
+    chunks = list(split_message(text, "HTML", limit=100))
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk) <= 100
+        assert _balanced_html(chunk)
+        assert not re.search(r"&[a-z]*$|&[a-z]*<", chunk)
+    assert chunks[1].startswith('<b><a href="https://x.y">')
+    assert chunks[-1].endswith("</a></b> end")
+
+
+def test_markdown_entities_are_closed_and_reopened():
+    code = "\n".join(f"print({i})" for i in range(30))
+    text = "*bold " + "a\\.b " * 30 + "*\n```python\n" + code + "\n```"
+    chunks = list(split_message(text, "MarkdownV2", limit=80))
+
+    assert len(chunks) > 2
+    for chunk in chunks:
+        assert len(chunk) <= 80
+        assert not chunk.endswith("\\") or chunk.endswith("\\\\")
+        assert chunk.count("```") % 2 == 0
+    assert chunks[1].startswith("*")
+    assert any(chunk.startswith("```python\nprint(") for chunk in chunks[2:])
+
+
+def test_markdown_links_are_not_cut():
+    link = "[a long link text](https://example.com/path)"
+    chunks = list(split_message(f"{'word ' * 8}{link} after", "MarkdownV2", limit=60))
+    assert any(link in chunk for chunk in chunks)
+
+
+class _Message:
+    def __init__(self):
+        self.sent = []
+
+    async def answer(self, **kwargs):
+        self.sent.append(kwargs)
+        return kwargs
+
+
+def test_reply_sends_parts_with_keyboard_last(tmp_path):
+    (tmp_path / "report.j2").write_text(
+        "{% for i in range(800) %}<b>row {{ i }}</b>\n{% endfor %}"
+    )
+    engine = TemplateEngine(str(tmp_path))
+    message = _Message()
+    markup = object()
+
+    last = asyncio.run(
+        engine.reply(message, "report.j2", parse_mode="HTML", reply_markup=markup)
+    )
+
+    assert len(message.sent) > 1
+    assert last is message.sent[-1]
+    assert [part.get("reply_markup") for part in message.sent[:-1]] == [None] * (
+        len(message.sent) - 1
+    )
+    assert last["reply_markup"] is markup
+    assert all(part["parse_mode"] == "HTML" for part in message.sent)
+    assert all(len(part["text"]) <= 4096 for part in message.sent)
+    assert "".join(part["text"] for part in message.sent).count("<b>") == 800
+
+
+def test_reply_without_split_sends_one_message(tmp_path):
+    (tmp_path / "long.j2").write_text("{{ 'word ' * 1000 }}")
+    message = _Message()
+    asyncio.run(TemplateEngine(str(tmp_path)).reply(message, "long.j2", split=False))
+    assert len(message.sent) == 1
+
+
+def test_reply_splits_at_a_custom_limit(tmp_path):
+    (tmp_path / "caption.j2").write_text("{{ 'word ' * 500 }}")
+    message = _Message()
+    asyncio.run(
+        TemplateEngine(str(tmp_path)).reply(message, "caption.j2", limit=CAPTION_LIMIT)
+    )
+    assert len(message.sent) == 3
+    assert all(len(part["text"]) <= CAPTION_LIMIT for part in message.sent)
@@ -0,0 +1,38 @@
+from fastbot.metrics import MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "test_duration_seconds", "Test", ("handler",), buckets=(0.1, 1.0)
+    )
+
+    child = histogram.labels("start")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    rendered = registry.render()
+    assert 'test_duration_seconds_bucket{handler="start",le="0.1"} 2' in rendered
+    assert 'test_duration_seconds_bucket{handler="start",le="1"} 3' in rendered
+    assert 'test_duration_seconds_bucket{handler="start",le="+Inf"} 4' in rendered
+    assert 'test_duration_seconds_count{handler="start"} 4' in rendered
+
+
+def test_counter_escapes_label_values():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_calls_total", "Test", ("handler",))
+
+    counter.labels('say "hi"').inc()
+
+    assert 'test_calls_total{handler="say \\"hi\\""} 1' in registry.render()
+
+
+def test_histogram_quantile_interpolates_within_bucket():
+    registry = MetricsRegistry()
+    child = registry.histogram("test_seconds", "Test", buckets=(1.0, 2.0)).labels()
+
+    for value in (0.5, 1.5, 1.5, 1.5):
+        child.observe(value)
+
+    assert child.quantile(0.25) == 1.0
+    assert child.quantile(0.5) == 1 + 1 / 3
@@ -0,0 +1,15 @@
+import inspect
+
+import pytest
+
+from fastbot.benchmarks.microbenchmarks import BENCHMARKS, prepare
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("micro", BENCHMARKS, ids=lambda micro: micro.name)
+async def test_microbenchmark_cases_run(micro):
+    for _, size in micro.cases():
+        result = (await prepare(micro, size))()
+        if inspect.isawaitable(result):
+            result = await result
+        assert not getattr(result, "is_err", lambda: False)()
@@ -0,0 +1,40 @@
+import sys
+
+from fastbot.profiling import ProfilingSession, get_active_session
+
+
+def busy_handler(session):
+    token = session.enter("busy_handler", sys._getframe())
+    try:
+        return sum(i * i for i in range(10000))
+    finally:
+        session.exit(token)
+
+
+def test_cprofile_session_is_broken_down_per_handler():
+    session = ProfilingSession(mode="cprofile").start()
+    assert get_active_session() is session
+
+    busy_handler(session)
+    session.stop()
+
+    assert get_active_session() is None
+    assert session.handlers() == ["busy_handler"]
+    assert "=== busy_handler ===" in session.render()
+
+
+def test_cprofile_drops_runs_that_overlap_another_handler():
+    session = ProfilingSession(mode="cprofile").start()
+
+    first = session.enter("first", sys._getframe())
+    second = session.enter("second", sys._getframe())
+    session.exit(second)
+    session.exit(first)
+    busy_handler(session)
+    session.stop()
+
+    assert (session.profiled, session.skipped) == (1, 2)
+    assert session.handlers() == ["busy_handler"]
+    assert session.render().startswith(
+        "# 1 handler runs profiled, 2 skipped because they overlapped"
+    )
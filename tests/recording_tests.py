@@ -0,0 +1,50 @@
+import pytest
+from aiogram import Bot, F
+from aiogram.types import Message
+
+from fastbot import FastBotBuilder
+from fastbot.recording import UpdateRecorder, read_trace, replay_trace
+from fastbot.testing import FakeSession, make_message_update
+
+
+async def echo(message: Message):
+    await message.answer(message.text)
+
+
+def test_recorder_rotates_compressed_segments(tmp_path):
+    recorder = UpdateRecorder(str(tmp_path), max_bytes=600, max_files=2)
+    for i in range(1, 11):
+        recorder.record(float(i), 0.01, make_message_update(i, f"text {i}"))
+    recorder.close()
+
+    segments = recorder.segments()
+    assert len(segments) == 2
+    assert all(segment.endswith(".jsonl.gz") for segment in segments)
+
+    records = list(read_trace(str(tmp_path)))
+    assert records[-1]["t"] == 10.0
+    assert records[-1]["u"]["message"]["from"]["id"] == 1
+    assert [r["u"]["update_id"] for r in records] == sorted(
+        r["u"]["update_id"] for r in records
+    )
+
+
+@pytest.mark.asyncio
+async def test_replay_feeds_recorded_updates(tmp_path):
+    session = FakeSession()
+    builder = FastBotBuilder().set_bot(Bot("123456:TEST-TOKEN", session=session))
+    await builder.add_handler(echo, F.text)
+    bot = builder.build()
+
+    recorder = UpdateRecorder(str(tmp_path), compress=False)
+    for i in range(1, 4):
+        recorder.record(100.0 + i / 100, 0.001, make_message_update(i, f"hi {i}"))
+    recorder.close()
+
+    result = await replay_trace(bot, list(read_trace(str(tmp_path))), speed=10.0)
+
+    assert result.updates == 3
+    assert result.errors == 0
+    assert len(result.latencies) == 3
+    assert result.handlers["echo"]["count"] == 3
+    assert [request.text for request in session.requests] == ["hi 1", "hi 2", "hi 3"]
@@ -0,0 +1,183 @@
+import asyncio
+
+import pytest
+from aiogram import Bot, F, flags
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.dispatcher.flags import get_flag
+from aiogram.filters import Command
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import CallbackQuery, Message
+
+from fastbot import FastBotBuilder
+from fastbot.decorators import menu, menu_handler
+from fastbot.filters import StateFilter
+from fastbot.logger import Logger
+from fastbot.registry import analyze_filters
+from fastbot.testing import FakeSession, make_callback_update, make_message_update
+
+
+class Shop(StatesGroup):
+    browsing = State()
+    paying = State()
+
+
+def make_builder(session: FakeSession) -> FastBotBuilder:
+    return FastBotBuilder().set_bot(Bot("123456:TEST-TOKEN", session=session))
+
+
+def reply(text: str):
+    async def handler(message: Message):
+        await message.answer(text)
+
+    handler.__name__ = text
+    return handler
+
+
+async def answer_item(callback: CallbackQuery):
+    await callback.answer("item")
+
+
+def test_filters_are_split_into_index_keys():
+    keys, remaining, exact = analyze_filters(
+        [Command("start", "help"), F.text.in_(["/start"]), StateFilter(Shop.browsing)],
+        Message,
+    )
+    assert keys.commands == {"start", "help"}
+    assert keys.texts == {"/start"}
+    assert keys.states == {Shop.browsing.state}
+    assert len(remaining) == 1 and exact
+
+    keys, remaining, exact = analyze_filters(
+        [F.data.startswith("item:"), F.from_user.id == 1], CallbackQuery
+    )
+    assert keys.data_prefixes == {"item:"}
+    assert len(remaining) == 1 and not exact
+
+
+@pytest.mark.asyncio
+async def test_reply_menu_registers_without_await():
+    @menu("Shop", "Open the shop", state=Shop.browsing)
+    async def shop(message: Message, state):
+        await message.answer("Welcome")
+
+    @menu_handler(["Buy"], state=Shop.browsing)
+    async def buy(message: Message, state):
+        await message.answer("Bought")
+
+    session = FakeSession()
+    bot = make_builder(session).add_reply_menu(shop, buy).build()
+
+    await bot.dp.feed_update(bot.bot, make_message_update(1, "/shop"))
+    await asyncio.sleep(0)
+    await bot.dp.feed_update(bot.bot, make_message_update(2, "Buy"))
+
+    assert [r.text for r in session.requests] == ["Welcome", "Bought"]
+    assert len(bot.handler_registry) == 2
+
+
+@pytest.mark.asyncio
+async def test_dispatch_uses_index_and_keeps_registration_order():
+    session = FakeSession()
+    builder = make_builder(session)
+    await builder.add_handler(reply("paying"), F.text == "pay", Shop.paying)
+    await builder.add_handler(reply("any state"), Shop.browsing, Shop.paying)
+    await builder.add_handler(reply("fallback"), F.text)
+    await builder.add_callback_query_handler(answer_item, F.data.startswith("it"))
+    bot = builder.build()
+
+    context = bot.dp.fsm.get_context(bot.bot, chat_id=1, user_id=1)
+    await context.set_state(Shop.paying)
+    await bot.dp.feed_update(bot.bot, make_message_update(1, "pay"))
+    await bot.dp.feed_update(bot.bot, make_message_update(2, "other"))
+    await context.set_state(None)
+    await bot.dp.feed_update(bot.bot, make_message_update(3, "pay"))
+    await bot.dp.feed_update(bot.bot, make_callback_update(4, "item:1"))
+
+    assert [r.text for r in session.requests] == [
+        "paying",
+        "any state",
+        "fallback",
+        "item",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_shadowed_handlers_are_reported(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(
+        Logger, "warning", lambda message, **_: warnings.append(message)
+    )
+
+    builder = make_builder(FakeSession())
+    await builder.add_command_handler(["start", "help"], reply("first"))
+    await builder.add_command_handler("help", reply("second"))
+    await builder.add_handler(reply("one"), F.text == "hi")
+    await builder.add_handler(reply("two"), F.text == "hi")
+    builder.build()
+
+    assert len(warnings) == 1
+    assert "second is shadowed by first" in warnings[0]
+    assert "two conflicts with one" in warnings[0]
+
+
+def test_prefix_filters_narrow_by_union_and_longest_prefix():
+    keys, remaining, _ = analyze_filters(
+        [F.data.startswith("buy:") | F.data.startswith("sell:")], CallbackQuery
+    )
+    assert keys.data_prefixes == {"buy:", "sell:"}
+    assert not remaining
+
+    keys, _, _ = analyze_filters(
+        [
+            F.data.startswith("buy:") | F.data.startswith("sell:"),
+            F.data.startswith("buy:item"),
+        ],
+        CallbackQuery,
+    )
+    assert keys.data_prefixes == {"buy:item"}
+
+    keys, remaining, _ = analyze_filters(
+        [F.data.startswith("buy:") | (F.from_user.id == 1)], CallbackQuery
+    )
+    assert keys.data_prefixes is None
+    assert len(remaining) == 1
+
+
+@pytest.mark.asyncio
+async def test_inner_middlewares_see_the_matched_handler_flags():
+    seen = []
+
+    async def record_flags(handler, event, data):
+        seen.append((get_flag(data, "commands"), get_flag(data, "chat_action")))
+        return await handler(event, data)
+
+    async def skip(message: Message):
+        raise SkipHandler()
+
+    session = FakeSession()
+    builder = make_builder(session).add_middleware(record_flags)
+    await builder.add_command_handler("start", reply("started"))
+    await builder.add_handler(flags.chat_action("typing")(skip), F.text == "hi")
+    await builder.add_handler(flags.chat_action("upload")(reply("hello")), F.text)
+    bot = builder.build()
+
+    await bot.dp.feed_update(bot.bot, make_message_update(1, "/start"))
+    await bot.dp.feed_update(bot.bot, make_message_update(2, "hi"))
+
+    assert [r.text for r in session.requests] == ["started", "hello"]
+    assert seen[0][0][0].commands == ("start",)
+    assert seen[1:] == [(None, "typing"), (None, "upload")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("text", ["/", "/ "])
+async def test_bare_slash_reaches_the_text_handler(text):
+    session = FakeSession()
+    builder = make_builder(session)
+    await builder.add_command_handler("start", reply("started"))
+    await builder.add_handler(reply("fallback"), F.text)
+    bot = builder.build()
+
+    await bot.dp.feed_update(bot.bot, make_message_update(1, text))
+
+    assert [r.text for r in session.requests] == ["fallback"]
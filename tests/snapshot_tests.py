@@ -0,0 +1,124 @@
+import os
+import pickle
+
+import jinja2
+import pytest
+from aiogram import Bot
+from aiogram.types import Message
+
+import fastbot.registry.registry as registry_module
+from fastbot import FastBotBuilder, TemplateEngine
+from fastbot.snapshot import source_fingerprint
+from fastbot.testing import FakeSession
+
+
+async def start(message: Message):
+    await message.answer("Hello!")
+
+
+async def build(tmp_path, sources=None, buttons=None):
+    builder = FastBotBuilder().set_bot(Bot("123456:TEST-TOKEN", session=FakeSession()))
+    builder.add_dependency("te", TemplateEngine(str(tmp_path / "templates")))
+    builder.enable_snapshot(str(tmp_path / "build.snapshot"), sources)
+    if buttons:
+        builder.enable_template_warmup(buttons=buttons)
+    await builder.add_command_handler("start", start)
+    return builder.build()
+
+
+async def run_startup(bot):
+    for callback in bot._startup_callbacks:
+        await callback(bot)
+
+
+@pytest.fixture
+def templates(tmp_path):
+    (tmp_path / "templates").mkdir()
+    (tmp_path / "templates" / "hello.j2").write_text("Hello, {{ name }}!")
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_second_build_loads_the_snapshot(templates, monkeypatch):
+    path = templates / "build.snapshot"
+    await build(templates)
+    with open(path, "rb") as file:
+        data = pickle.load(file)
+    assert len(data["handlers"]) == 1
+    assert len(data["templates"]) == 1
+    written = os.stat(path).st_mtime_ns
+
+    def analyze_signature(*args):
+        raise AssertionError("signature analysis should come from the snapshot")
+
+    monkeypatch.setattr(registry_module, "analyze_signature", analyze_signature)
+    bot = await build(templates)
+
+    assert os.stat(path).st_mtime_ns == written
+    assert bot.handler_registry is not None
+
+
+@pytest.mark.asyncio
+async def test_changed_sources_invalidate_the_snapshot(templates):
+    source = templates / "settings.py"
+    source.write_text("A = 1")
+    before = source_fingerprint([str(source)])
+    await build(templates, [str(source)])
+    written = os.stat(templates / "build.snapshot").st_mtime_ns
+
+    source.write_text("A = 22")
+    assert source_fingerprint([str(source)]) != before
+    await build(templates, [str(source)])
+
+    assert os.stat(templates / "build.snapshot").st_mtime_ns != written
+
+
+@pytest.mark.asyncio
+async def test_unchanged_templates_are_not_recompiled(templates, monkeypatch):
+    await build(templates)
+    list_templates = jinja2.Environment.list_templates
+    listed = []
+
+    def counting_list_templates(self, *args, **kwargs):
+        listed.append(1)
+        return list_templates(self, *args, **kwargs)
+
+    monkeypatch.setattr(jinja2.Environment, "list_templates", counting_list_templates)
+    await build(templates)
+    assert listed == []
+
+    (templates / "templates" / "bye.j2").write_text("Bye!")
+    await build(templates)
+    assert listed
+
+
+@pytest.mark.asyncio
+async def test_prebuilt_keyboards_are_kept_in_the_snapshot(templates, monkeypatch):
+    (templates / "templates" / "menu.j2").write_text(
+        '[{"text": "Shop", "callback_data": "shop"}]'
+    )
+    (templates / "templates" / "main.kb.json").write_text(
+        '{"rows": [[{"text": "Help", "callback_data": "help"}]]}'
+    )
+    buttons = ["menu.j2", "main.kb.json"]
+    await run_startup(await build(templates, buttons=buttons))
+    with open(templates / "build.snapshot", "rb") as file:
+        (keyboards,) = pickle.load(file)["keyboards"].values()
+    assert set(keyboards) == set(buttons)
+
+    def not_rebuilt(*args, **kwargs):
+        raise AssertionError("keyboards should come from the snapshot")
+
+    monkeypatch.setattr(TemplateEngine, "_parse_buttons", not_rebuilt)
+    monkeypatch.setattr(TemplateEngine, "_load_keyboard", not_rebuilt)
+    bot = await build(templates, buttons=buttons)
+    await run_startup(bot)
+    engine = bot.get_dependency("te")
+
+    menu = await engine.load_keyboard_from_template("menu.j2")
+    assert menu.inline_keyboard[0][0].callback_data == "shop"
+    assert await engine.load_buttons_from_template("menu.j2") == [
+        {"text": "Shop", "callback_data": "shop"}
+    ]
+    main = await engine.render_keyboard("main.kb.json")
+    assert main.inline_keyboard[0][0].callback_data == "help"
@@ -0,0 +1,304 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from fastbot import TemplateEngine
+from fastbot.engine.templates.template_engine import TemplateNotFoundError
+from fastbot.metrics.metrics import CACHE_REQUESTS, TEMPLATE_RENDER_DURATION
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    directory = tmp_path / "templates"
+    directory.mkdir()
+    (directory / "hello.j2").write_text("Hello, {{ name }}!")
+    (directory / "items.j2").write_text("{% for i in items %}{{ i }};{% endfor %}")
+    return directory
+
+
+@pytest.mark.asyncio
+async def test_warmup_compiles_templates_and_reports_failures(template_dir):
+    (template_dir / "broken.j2").write_text("{% for %}")
+    engine = TemplateEngine(str(template_dir))
+
+    report = await engine.warmup(concurrency=2)
+
+    assert set(report.compiled) == {"hello.j2", "items.j2"}
+    assert set(report.failed) == {"broken.j2"}
+    assert "hello.j2" in engine._template_cache
+    result = await engine.render_template("hello.j2", name="Ann")
+    assert result["text"] == "Hello, Ann!"
+
+
+@pytest.mark.asyncio
+async def test_bytecode_cache_is_shared_between_engines(template_dir, tmp_path):
+    cache_dir = tmp_path / "bytecode"
+    await TemplateEngine(str(template_dir), bytecode_cache_dir=str(cache_dir)).warmup()
+    assert len(os.listdir(cache_dir)) == 2
+
+    engine = TemplateEngine(str(template_dir), bytecode_cache_dir=str(cache_dir))
+
+    def compile_template(*args, **kwargs):
+        raise AssertionError("template should be loaded from the bytecode cache")
+
+    engine.env.compile = compile_template
+    report = await engine.warmup()
+    assert not report.failed
+
+    TemplateEngine(
+        str(template_dir), enable_async=False, bytecode_cache_dir=str(cache_dir)
+    ).env.get_template("hello.j2")
+    assert len(os.listdir(cache_dir)) == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compile_once(template_dir):
+    engine = TemplateEngine(str(template_dir))
+    get_template = engine.env.get_template
+    calls = []
+
+    def counting_get_template(name, *args, **kwargs):
+        calls.append(name)
+        return get_template(name, *args, **kwargs)
+
+    engine.env.get_template = counting_get_template
+    results = await asyncio.gather(
+        *(engine.render_template("hello.j2", name=str(i)) for i in range(10))
+    )
+
+    assert calls == ["hello.j2"]
+    assert [r["text"] for r in results] == [f"Hello, {i}!" for i in range(10)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("auto_reload", [True, False])
+async def test_cached_templates_follow_auto_reload(template_dir, auto_reload):
+    engine = TemplateEngine(str(template_dir), auto_reload=auto_reload)
+    await engine.render_template("hello.j2", name="Ann")
+
+    path = template_dir / "hello.j2"
+    path.write_text("Bye, {{ name }}!")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    result = await engine.render_template("hello.j2", name="Ann")
+    assert result["text"] == ("Bye, Ann!" if auto_reload else "Hello, Ann!")
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_inotify", [True, False])
+async def test_watcher_reloads_changed_templates_and_dependents(
+    template_dir, use_inotify
+):
+    (template_dir / "base.j2").write_text("[{% block body %}{% endblock %}]")
+    (template_dir / "page.j2").write_text(
+        '{% extends "base.j2" %}{% block body %}{{ name }}{% endblock %}'
+    )
+    engine = TemplateEngine(str(template_dir))
+    watcher = engine.start_watching(0.05, use_inotify=use_inotify, wait=True)
+    try:
+        assert watcher.backend_name == ("inotify" if use_inotify else "scan")
+        assert not engine.env.auto_reload
+        assert (await engine.render_template("page.j2", name="Ann"))["text"] == "[Ann]"
+        await engine.render_template("hello.j2", name="Ann")
+
+        (template_dir / "base.j2").write_text("<{% block body %}{% endblock %}>")
+        await wait_for(lambda: "page.j2" not in engine._template_cache)
+
+        assert "hello.j2" in engine._template_cache
+        assert (await engine.render_template("page.j2", name="Ann"))["text"] == "<Ann>"
+    finally:
+        engine.stop_watching()
+
+
+@pytest.mark.asyncio
+async def test_watcher_changes_are_applied_on_the_loop(template_dir):
+    engine = TemplateEngine(str(template_dir))
+    await engine.render_template("hello.j2", name="Ann")
+    threads = []
+    invalidate = engine.invalidate
+
+    def recording(names):
+        threads.append(threading.current_thread())
+        return invalidate(names)
+
+    engine.invalidate = recording
+    watcher = threading.Thread(target=engine._templates_changed, args=({"hello.j2"},))
+    watcher.start()
+    watcher.join()
+    assert "hello.j2" in engine._template_cache
+
+    await wait_for(lambda: threads)
+    assert threads == [threading.current_thread()]
+    assert "hello.j2" not in engine._template_cache
+
+
+@pytest.mark.asyncio
+async def test_render_cache_keys_on_selected_context(template_dir):
+    engine = TemplateEngine(str(template_dir))
+    engine.cache_template("hello.j2", keys=["name"])
+    calls = []
+    render = engine._render
+
+    async def counting_render(template_name, template, context):
+        calls.append(context["name"])
+        return await render(template_name, template, context)
+
+    engine._render = counting_render
+    for name, request_id in [("Ann", 1), ("Ann", 2), ("Bob", 3)]:
+        result = await engine.render_template("hello.j2", name=name, id=request_id)
+        assert result["text"] == f"Hello, {name}!"
+    assert calls == ["Ann", "Bob"]
+
+    assert engine.invalidate_rendered(["hello.j2"]) == 2
+    await engine.render_template("hello.j2", name="Ann")
+    assert calls == ["Ann", "Bob", "Ann"]
+
+
+@pytest.mark.asyncio
+async def test_render_cache_expires_evicts_and_bypasses_impure(template_dir):
+    (template_dir / "clock.j2").write_text("{{ now().isoformat() }}")
+    (template_dir / "page.j2").write_text('{% include "clock.j2" %} {{ name }}')
+    engine = TemplateEngine(str(template_dir))
+    cache = engine.enable_render_cache(max_size=2, ttl=60, cache_all=True)
+
+    first = await engine.render_template("page.j2", name="Ann")
+    await asyncio.sleep(0.001)
+    assert (await engine.render_template("page.j2", name="Ann")) != first
+    assert len(cache) == 0
+
+    await engine.render_template("items.j2", items=[1])
+    await engine.render_template("items.j2", items=[2])
+    await engine.render_template("items.j2", items=[3])
+    assert len(cache) == 2
+
+    engine.cache_template("hello.j2", ttl=0.01)
+    await engine.render_template("hello.j2", name="Ann")
+    key = next(key for key in cache._entries if key[0] == "hello.j2")
+    await asyncio.sleep(0.02)
+    assert cache.get(key) is None
+
+    # Values without a stable representation are rendered every time
+    await engine.render_template("hello.j2", name=object())
+    assert key not in cache._entries and len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_keyboards_are_cached_per_context_and_static_ones_once(template_dir):
+    (template_dir / "menu.j2").write_text('[{"text": "Help", "callback_data": "help"}]')
+    (template_dir / "items_buttons.j2").write_text(
+        '[{% for i in items %}{"text": "{{ i }}", "callback_data": "item:{{ i }}"}'
+        "{% if not loop.last %},{% endif %}{% endfor %}]"
+    )
+    engine = TemplateEngine(str(template_dir))
+    hits = CACHE_REQUESTS.labels("keyboard", "hit")
+    misses = CACHE_REQUESTS.labels("keyboard", "miss")
+
+    keyboards = await engine.prebuild_buttons(["menu.j2", "items_buttons.j2"])
+    assert list(keyboards) == ["menu.j2"]
+    menu = keyboards["menu.j2"]
+    before = hits.value
+    assert await engine.load_keyboard_from_template("menu.j2", user="Ann") == menu
+    assert hits.value == before + 1
+
+    first = await engine.load_keyboard_from_template("items_buttons.j2", items=[1, 2])
+    again = await engine.load_keyboard_from_template("items_buttons.j2", items=[1, 2])
+    other = await engine.load_keyboard_from_template("items_buttons.j2", items=[3])
+    assert again == first and other != first
+    assert hits.value == before + 2
+    assert other.inline_keyboard[0][0].callback_data == "item:3"
+
+    # Returned keyboards are copies, so changing them leaves the cache alone
+    expected = again.model_copy(deep=True)
+    again.inline_keyboard[0].append(again.inline_keyboard[0][0])
+    again.inline_keyboard.append([])
+    again.inline_keyboard[0][0].text = "changed"
+    assert (
+        await engine.load_keyboard_from_template("items_buttons.j2", items=[1, 2])
+        == expected
+    )
+
+    buttons = await engine.load_buttons_from_template("items_buttons.j2", items=[3])
+    buttons[0]["text"] = "changed"
+    buttons = await engine.load_buttons_from_template("items_buttons.j2", items=[3])
+    assert buttons[0]["text"] == "3"
+
+    before = misses.value
+    engine.invalidate(["menu.j2"])
+    assert await engine.load_keyboard_from_template("menu.j2") == menu
+    assert misses.value == before + 1
+
+
+async def user_contexts(count):
+    for i in range(count):
+        yield {"name": f"user{i}"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("processes", [0, 2])
+async def test_render_many_streams_results_in_order(template_dir, processes):
+    engine = TemplateEngine(str(template_dir))
+    duration = TEMPLATE_RENDER_DURATION.labels("hello.j2")
+    observed = duration.count
+
+    results = [
+        result
+        async for result in engine.render_many(
+            "hello.j2",
+            user_contexts(25),
+            parse_mode="HTML",
+            chunk_size=4,
+            processes=processes,
+        )
+    ]
+
+    assert [r["text"] for r in results] == [f"Hello, user{i}!" for i in range(25)]
+    assert all(r["parse_mode"] == "HTML" for r in results)
+    # One duration sample per render, as for render_template
+    assert duration.count - observed == 25
+
+
+@pytest.mark.asyncio
+async def test_render_many_wraps_errors(template_dir):
+    engine = TemplateEngine(str(template_dir))
+    with pytest.raises(TemplateNotFoundError):
+        async for _ in engine.render_many("missing.j2", [{}]):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_sync_fast_path_only_for_templates_that_never_await(template_dir):
+    (template_dir / "keyboard.j2").write_text(
+        "{{ generate_inline_keyboard([]) }}|{{ name|bold }}"
+    )
+    (template_dir / "method.j2").write_text("{{ user.greet() }}")
+    engine = TemplateEngine(str(template_dir))
+
+    class User:
+        async def greet(self):
+            return "hi"
+
+    await engine.render_template("hello.j2", name="Ann")
+    await engine.render_template("keyboard.j2", name="Ann")
+    result = await engine.render_template("method.j2", user=User())
+
+    assert result["text"] == "hi"
+    assert engine._sync_templates["hello.j2"][1] is not None
+    assert engine._sync_templates["keyboard.j2"][1] is None
+    assert engine._sync_templates["method.j2"][1] is None
+
+    async def items():
+        for i in range(3):
+            yield i
+
+    result = await engine.render_template("items.j2", items=items())
+    assert result["text"] == "0;1;2;"
@@ -0,0 +1,56 @@
+import pytest
+
+from fastbot import TemplateEngine
+from fastbot.engine.templates.filters import (
+    escape_html,
+    escape_markdown,
+    escape_markdown_code,
+    telegram_escape,
+    truncate,
+)
+
+
+def test_markdown_v2_escaping():
+    assert escape_markdown("1.5 * (a_b) - c!") == r"1\.5 \* \(a\_b\) \- c\!"
+    assert escape_markdown("back\\slash") == "back\\\\slash"
+    assert escape_markdown(42) == "42"
+    assert escape_markdown_code("a`b\\c*") == "a\\`b\\\\c*"
+
+
+def test_html_escaping_and_parse_mode_dispatch():
+    text = '<b>"Tom" & Jerry</b>'
+    assert escape_html(text) == "&lt;b&gt;&quot;Tom&quot; &amp; Jerry&lt;/b&gt;"
+    assert telegram_escape(text, "HTML") == escape_html(text)
+    assert telegram_escape("a.b") == r"a\.b"
+
+
+@pytest.mark.parametrize(
+    "value, length, expected",
+    [
+        ("short", 10, "short"),
+        ("plain text here", 5, "plain..."),
+        ("Tom &amp; Jerry", 5, "Tom &amp;..."),
+        ("Tom &amp; Jerry", 4, "Tom ..."),
+        ("a&#128512;b&#x1F600;c", 4, "a&#128512;b&#x1F600;..."),
+        ("&lt;&gt;", 5, "&lt;&gt;"),
+    ],
+)
+def test_truncate_never_cuts_entities_or_escapes(value, length, expected):
+    assert truncate(value, length) == expected
+
+
+def test_truncate_escapes_the_ending_for_the_parse_mode():
+    assert truncate(r"1\.5\.6", 2, parse_mode="MarkdownV2") == r"1\.\.\.\."
+    assert truncate("a &lt; b", 3, end="…>", parse_mode="HTML") == "a &lt;…&gt;"
+    assert truncate("short", 10, parse_mode="MarkdownV2") == "short"
+
+
+@pytest.mark.asyncio
+async def test_filters_are_registered(tmp_path):
+    (tmp_path / "t.j2").write_text(
+        "{{ name|html_escape }} {{ name|telegram_escape('HTML')|truncate(6) }} "
+        "{{ price|markdown_escape }}"
+    )
+    engine = TemplateEngine(str(tmp_path))
+    result = await engine.render_template("t.j2", name="A & B", price="1.5")
+    assert result["text"] == r"A &amp; B A &amp; B 1\.5"
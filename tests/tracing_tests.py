@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+from aiogram import Bot
+
+from fastbot import FastBotBuilder
+from fastbot.tracing import (
+    NOOP_SPAN,
+    Tracer,
+    get_current_span,
+    set_tracer,
+    start_span,
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans, service_name):
+        self.traces.append(spans)
+
+
+def test_child_spans_share_trace_of_root():
+    tracer = Tracer(ListExporter())
+
+    with tracer.start_trace("update", update_id=1) as root:
+        with start_span("handler", handler="start") as child:
+            assert get_current_span() is child
+        assert get_current_span() is root
+
+    assert child.trace_id == root.trace_id
+    assert child.parent_id == root.span_id
+    assert get_current_span() is None
+    tracer.shutdown()
+
+
+def test_unsampled_trace_is_noop():
+    tracer = Tracer(ListExporter(), sample_rate=0.0)
+
+    with tracer.start_trace("update") as root:
+        assert root is NOOP_SPAN
+        assert start_span("handler") is NOOP_SPAN
+
+
+class ThreadExporter(ListExporter):
+    def shutdown(self):
+        self.thread = threading.current_thread()
+
+
+def test_bot_shutdown_flushes_traces_off_the_loop():
+    exporter = ThreadExporter()
+    bot = (
+        FastBotBuilder()
+        .set_bot(Bot("123456:TEST-TOKEN"))
+        .set_polling_only()
+        .enable_tracing(exporter)
+        .build()
+    )
+
+    async def shutdown():
+        for callback in bot._shutdown_callbacks:
+            if asyncio.iscoroutinefunction(callback):
+                await callback(bot)
+
+    try:
+        asyncio.run(shutdown())
+    finally:
+        set_tracer(None)
+    assert exporter.thread is not threading.main_thread()
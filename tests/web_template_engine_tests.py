@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from fastbot.engine.templates import TemplateEngine, WebTemplateEngine
+from fastbot.engine.templates.template_engine import TemplateNotFoundError
+
+PAGE = "<ul>{% for i in range(rows) %}<li>{{ i }}</li>{% endfor %}</ul>"
+
+
+def _client(tmp_path, **options) -> TestClient:
+    (tmp_path / "page.html").write_text(PAGE)
+    web = WebTemplateEngine(TemplateEngine(str(tmp_path), **options))
+    app = FastAPI()
+
+    @app.get("/{name}")
+    async def page(request: Request, name: str, stream: bool = False):
+        return await web.render_page(
+            request, name, additional_context={"rows": 2000}, stream=stream
+        )
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("enable_async", [True, False])
+def test_streamed_page_matches_rendered_page(tmp_path, enable_async):
+    client = _client(tmp_path, enable_async=enable_async)
+
+    rendered = client.get("/page.html")
+    streamed = client.get("/page.html", params={"stream": True})
+
+    assert streamed.status_code == 200
+    assert streamed.headers["content-type"].startswith("text/html")
+    assert "content-length" not in streamed.headers
+    assert streamed.text == rendered.text
+    assert streamed.text.count("<li>") == 2000
+
+
+def test_streamed_page_errors_before_response_starts(tmp_path):
+    client = _client(tmp_path)
+    with pytest.raises(TemplateNotFoundError):
+        client.get("/missing.html", params={"stream": True})
+
+
+def test_stream_html_template_yields_buffered_chunks(tmp_path):
+    (tmp_path / "page.html").write_text(PAGE)
+    engine = TemplateEngine(str(tmp_path))
+
+    async def collect():
+        return [
+            chunk
+            async for chunk in engine.stream_html_template(
+                "page.html", {"rows": 2000}, buffer_size=1024
+            )
+        ]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) > 10
+    assert all(len(chunk) >= 1024 for chunk in chunks[:-1])
+    assert all(len(chunk) < 1100 for chunk in chunks)
+
+
+def test_stream_html_template_awaits_async_values(tmp_path):
+    (tmp_path / "items.html").write_text(
+        "{% for i in items %}<p>{{ i }}</p>{% endfor %}"
+    )
+    engine = TemplateEngine(str(tmp_path))
+
+    async def items():
+        for i in range(3):
+            yield i
+
+    async def collect():
+        chunks = engine.stream_html_template("items.html", {"items": items()})
+        return "".join([chunk async for chunk in chunks])
+
+    assert asyncio.run(collect()) == "<p>0</p><p>1</p><p>2</p>"
@@ -0,0 +1,32 @@
+from .tracing import (
+    Span,
+    Tracer,
+    NOOP_SPAN,
+    get_current_span,
+    get_tracer,
+    set_tracer,
+    start_span,
+)
+from .exporters import FileSpanExporter, OTLPHttpSpanExporter
+from .instrumentation import (
+    TracingMiddleware,
+    TracingRequestMiddleware,
+    trace_filter,
+    trace_middleware,
+)
+
+__all__ = [
+    "Span",
+    "Tracer",
+    "NOOP_SPAN",
+    "get_current_span",
+    "get_tracer",
+    "set_tracer",
+    "start_span",
+    "FileSpanExporter",
+    "OTLPHttpSpanExporter",
+    "TracingMiddleware",
+    "TracingRequestMiddleware",
+    "trace_filter",
+    "trace_middleware",
+]
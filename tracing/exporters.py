@@ -0,0 +1,96 @@
+import json
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+from fastbot.tracing.tracing import Span
+
+
+class FileSpanExporter:
+    """Appends finished spans to a file, one JSON object per line"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span], service_name: str) -> None:
+        lines = []
+        for span in spans:
+            record = span.to_dict()
+            record["service"] = service_name
+            lines.append(json.dumps(record, ensure_ascii=False, default=str))
+
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class OTLPHttpSpanExporter:
+    """Sends spans as OTLP/HTTP JSON to a collector, e.g. http://localhost:4318/v1/traces"""
+
+    def __init__(
+        self,
+        endpoint: str = "http://localhost:4318/v1/traces",
+        headers: Dict[str, str] = None,
+        timeout: float = 5.0,
+    ):
+        self.endpoint = endpoint
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout = timeout
+
+    def export(self, spans: List[Span], service_name: str) -> None:
+        payload = json.dumps(self._encode(spans, service_name)).encode("utf-8")
+        request = urllib.request.Request(
+            self.endpoint, data=payload, headers=self.headers, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    @staticmethod
+    def _encode(spans: List[Span], service_name: str) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [_otlp_attribute("service.name", service_name)]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "fastbot"},
+                            "spans": [_otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    encoded = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_time),
+        "endTimeUnixNano": str(span.end_time),
+        "attributes": [
+            _otlp_attribute(key, value) for key, value in span.attributes.items()
+        ],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    return encoded
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
@@ -0,0 +1,79 @@
+from typing import Any, Awaitable, Callable, Dict, Type
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.dispatcher.event.handler import FilterObject
+from aiogram.methods import Response, TelegramMethod
+from aiogram.types import Update
+from aiogram.types.base import TelegramObject
+
+from fastbot.tracing.tracing import Tracer, start_span
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Outer update middleware that opens the root span of every update"""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update):
+            attributes = {"update_id": event.update_id, "event_type": event.event_type}
+        else:
+            attributes = {"event_type": type(event).__name__}
+
+        with self.tracer.start_trace("update", **attributes):
+            return await handler(event, data)
+
+
+def trace_middleware(
+    middleware: Callable, event_type: Type[TelegramObject]
+) -> Callable:
+    middleware_name = getattr(middleware, "__name__", type(middleware).__name__)
+    event_type_name = event_type.__name__
+
+    async def traced_middleware(
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        with start_span(
+            "middleware", middleware=middleware_name, event_type=event_type_name
+        ):
+            return await middleware(handler, event, data)
+
+    traced_middleware.__name__ = middleware_name
+    return traced_middleware
+
+
+def trace_filter(filter_: Any) -> Callable:
+    filter_object = FilterObject(filter_)
+    filter_name = getattr(filter_, "__name__", type(filter_).__name__)
+
+    async def traced_filter(event: TelegramObject, **kwargs) -> Any:
+        with start_span("filter", filter=filter_name) as span:
+            result = await filter_object.call(event, **kwargs)
+            span.set_attribute("passed", bool(result))
+            return result
+
+    return traced_filter
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Response:
+        method_name = getattr(method, "__api_method__", type(method).__name__)
+        with start_span("bot_api", method=method_name):
+            return await make_request(bot, method)
@@ -0,0 +1,196 @@
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from fastbot.logger import Logger
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar(
+    "fastbot_current_span", default=None
+)
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_time",
+        "end_time",
+        "error",
+        "_trace",
+        "_tracer",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        tracer: "Tracer",
+        trace_id: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes or {}
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+        self.error: Optional[str] = None
+        self._trace: List["Span"] = parent._trace if parent else []
+        self._tracer = tracer
+        self._token = None
+
+    @property
+    def is_root(self) -> bool:
+        return self.parent_id is None
+
+    @property
+    def duration(self) -> float:
+        if self.end_time is None:
+            return 0.0
+        return (self.end_time - self.start_time) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self._trace.append(self)
+        if self.is_root:
+            self._tracer._submit(list(self._trace))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+        self.end(exc)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    def __init__(
+        self,
+        exporter: Any,
+        sample_rate: float = 1.0,
+        service_name: str = "fastbot",
+        max_queue_size: int = 2048,
+    ):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.service_name = service_name
+        self.dropped_traces = 0
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(max_queue_size)
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def pending_traces(self) -> int:
+        return self._queue.qsize()
+
+    def start_trace(self, name: str, **attributes) -> Any:
+        """Open a root span, subject to head sampling"""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return NOOP_SPAN
+        return Span(name, self, os.urandom(16).hex(), attributes=attributes)
+
+    def _submit(self, spans: List[Span]) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._export_loop, name="fastbot-trace-exporter", daemon=True
+            )
+            self._worker.start()
+
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped_traces += 1
+
+    def _export_loop(self) -> None:
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                return
+            try:
+                self.exporter.export(spans, self.service_name)
+            except Exception as e:
+                Logger.error(f"Failed to export trace: {e}")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout)
+            self._worker = None
+        shutdown = getattr(self.exporter, "shutdown", None)
+        if shutdown:
+            shutdown()
+
+
+_tracer: Optional[Tracer] = None
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, **attributes) -> Any:
+    """Open a child of the current span, or a no-op span outside of a sampled trace"""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(name, parent._tracer, parent.trace_id, parent, attributes)